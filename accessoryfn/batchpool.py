@@ -0,0 +1,140 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Function and windows that handle running a folder of files through a worker pool, one file per worker,
+or a single long task in a background thread, with progress reported back to the GUI
+
+Workers are threads: OpenCV releases the interpreter lock while decoding, transforming and encoding,
+so a folder of files uses every core without starting new processes from the GUI
+Worker functions must only take plain values (read tkinter variables before submitting)
+
+"""
+
+import os
+import threading
+import concurrent.futures
+import tkinter as tk
+from tkinter import ttk
+from accessoryfn import error, complete
+
+
+def workers():
+    """Number of workers, one per core"""
+
+    return os.cpu_count() or 1
+
+
+class BatchProgress(tk.Toplevel):
+    """Submit one job per file to a worker pool and show progress, raises the done window when finished
+
+    jobs is a list of (function, args) tuples, labels the matching file names shown as they finish"""
+
+    def __init__(self, jobs, labels=None, title="Processing files", done_message=True):
+        super().__init__()
+
+        self.title(title)
+        self.labels = labels if labels is not None else [str(i) for i in range(len(jobs))]
+        self.done_message = done_message
+        self.n_total = len(jobs)
+        self.n_done = 0
+        self.errors = []
+
+        # Widgets
+        self.count_label = tk.Label(self, text='0 of %d files' % self.n_total)
+        self.count_label.grid(row=0, column=0, padx=10, pady=5)
+        self.progress = ttk.Progressbar(self, orient='horizontal', length=300, mode='determinate',
+                                        maximum=max(self.n_total, 1))
+        self.progress.grid(row=1, column=0, padx=10, pady=5)
+        self.file_label = tk.Label(self, text='')
+        self.file_label.grid(row=2, column=0, padx=10, pady=5)
+
+        # Start pool, finished files are collected on the Tk thread by polling
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers())
+        self.futures = {self.pool.submit(function, *args): i for i, (function, args) in enumerate(jobs)}
+        self.pending = set(self.futures)
+
+        self.after(50, self.poll)
+
+    def poll(self):
+        """Update progress with any files finished since the last check"""
+
+        finished = [f for f in self.pending if f.done()]
+        for future in finished:
+            self.pending.discard(future)
+            self.n_done += 1
+            label = self.labels[self.futures[future]]
+            if future.exception() is not None:
+                self.errors.append(label + ': ' + str(future.exception()))
+            self.file_label.config(text=os.path.basename(label))
+
+        self.count_label.config(text='%d of %d files' % (self.n_done, self.n_total))
+        self.progress['value'] = self.n_done
+
+        if len(self.pending) > 0:
+            self.after(50, self.poll)
+        else:
+            self.pool.shutdown(wait=False)
+            self.destroy()
+            if len(self.errors) > 0:
+                error.ErrorWindow(message='Some files could not be processed:\n' + '\n'.join(self.errors[:5]))
+            elif self.done_message:
+                complete.DoneWindow()
+
+
+class TaskProgress(tk.Toplevel):
+    """Run one long task in a background thread and show its progress, raises the done window when finished
+
+    function is called as function(*args, progress=callback), and reports with callback(n_done, n_total)"""
+
+    def __init__(self, function, args=(), title="Processing", unit='frames', done_message=True):
+        super().__init__()
+
+        self.title(title)
+        self.unit = unit
+        self.done_message = done_message
+        self.n_done = 0
+        self.n_total = 0
+        self.error = None
+        self.finished = False
+
+        # Widgets
+        self.count_label = tk.Label(self, text='Starting')
+        self.count_label.grid(row=0, column=0, padx=10, pady=5)
+        self.progress = ttk.Progressbar(self, orient='horizontal', length=300, mode='determinate')
+        self.progress.grid(row=1, column=0, padx=10, pady=5)
+
+        # Task reports by updating counts, read on the Tk thread by polling
+        self.thread = threading.Thread(target=self.run, args=(function, args), daemon=True)
+        self.thread.start()
+
+        self.after(50, self.poll)
+
+    def report(self, n_done, n_total):
+        self.n_done = n_done
+        self.n_total = n_total
+
+    def run(self, function, args):
+        try:
+            function(*args, progress=self.report)
+        except Exception as e:  # Shown once the task ends
+            self.error = e
+        finally:
+            self.finished = True
+
+    def poll(self):
+        """Update progress with the task's latest count"""
+
+        self.count_label.config(text='%d of %d %s' % (self.n_done, self.n_total, self.unit))
+        self.progress['maximum'] = max(self.n_total, 1)
+        self.progress['value'] = self.n_done
+
+        if not self.finished:
+            self.after(50, self.poll)
+        else:
+            self.destroy()
+            if self.error is not None:
+                error.ErrorWindow(message='Processing could not be completed:\n' + str(self.error))
+            elif self.done_message:
+                complete.DoneWindow()
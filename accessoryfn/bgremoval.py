@@ -0,0 +1,156 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handles background removal for brightfield video applications (deformability, tracking)
+
+Background removal runs as a separate stage in a background thread once a video is opened
+Frames are produced in order, so a displayed frame is available as soon as it (and, for adaptive methods,
+the frames before it) are processed rather than after the whole video
+Finished results are kept for the session per video, region of interest and method
+
+"""
+
+import threading
+import cv2
+import numpy as np
+
+METHODS = ['MOG2', 'KNN', 'Running median', 'Static median']  # Selectable background removal algorithms
+
+_finished = {}  # Completed results this session, keyed by video, ROI and method
+_MAX_FINISHED = 4  # Results kept, oldest dropped first to bound memory
+POLL = 100  # Time between checks for a frame still being processed, for displays that don't wait (ms)
+
+
+def close(mask, kernel):
+    """Morphological closing operation, fills small gaps in detected cells"""
+
+    return cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+
+
+def static_background(frames_crop, n=50):
+    """Median of n frames evenly spaced through the video, calculated once"""
+
+    idx = np.unique(np.linspace(0, len(frames_crop) - 1, min(n, len(frames_crop))).astype(int))
+
+    return np.median(np.stack([frames_crop[i] for i in idx]), axis=0).astype(np.uint8)
+
+
+def iter_foreground(frames_crop, method='MOG2', thresh=25, kernel_size=5):
+    """Yield background-removed (0/255), closed frames in order for the chosen method
+
+    MOG2 and KNN use OpenCV's adaptive subtractors
+    Running median approximates a per-pixel median by stepping the background 1 intensity toward each frame
+    Static median subtracts one median-of-N background, vectorized over chunks of frames"""
+
+    kernel = np.ones((kernel_size, kernel_size), np.uint8)
+
+    if method in ('MOG2', 'KNN'):
+        if method == 'MOG2':
+            fgbg = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+        else:
+            fgbg = cv2.createBackgroundSubtractorKNN(detectShadows=False)
+        for frame in frames_crop:
+            yield close(fgbg.apply(frame), kernel)
+
+    elif method == 'Running median':
+        background = frames_crop[0].astype(np.int16)
+        for frame in frames_crop:
+            frame_i = frame.astype(np.int16)
+            background += np.sign(frame_i - background).astype(np.int16)  # Step toward median
+            mask = (np.abs(frame_i - background) > thresh).astype(np.uint8) * 255
+            yield close(mask, kernel)
+
+    elif method == 'Static median':
+        background = static_background(frames_crop).astype(np.int16)
+        chunk = 64  # Frames subtracted at once, bounds temporary memory
+        for start in range(0, len(frames_crop), chunk):
+            stack = np.stack(frames_crop[start:start + chunk]).astype(np.int16)
+            masks = (np.abs(stack - background) > thresh).astype(np.uint8) * 255
+            for mask in masks:
+                yield close(mask, kernel)
+
+    else:
+        raise ValueError('Unknown background removal method: ' + str(method))
+
+
+class BackgroundStage():
+    """Background removal for one cropped video, computed in a background thread
+
+    frame(i) returns as soon as frame i is ready, frames() waits for the full video"""
+
+    def __init__(self, frames_crop, method='MOG2', key=None):
+        self.frames_crop = frames_crop
+        self.method = method
+        self.key = None if key is None else tuple(key) + (method,)
+
+        self.results = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+        if self.key is not None and self.key in _finished:  # Already run this session
+            self.results = _finished[self.key]
+            self.done = True
+
+    def start(self):
+        """Begin processing in a daemon thread, returns immediately"""
+
+        if not self.done and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        return self
+
+    def cancel(self):
+        """Stop processing, e.g. when a new video or method is chosen"""
+
+        self._stop = True
+
+    def _run(self):
+        try:
+            for mask in iter_foreground(self.frames_crop, self.method):
+                if self._stop:
+                    return
+                with self._cond:
+                    self.results.append(mask)
+                    self._cond.notify_all()
+        except Exception as e:  # Reported to caller waiting on frames
+            self.error = e
+        finally:
+            with self._cond:
+                self.done = True
+                if self.error is None and not self._stop and self.key is not None:
+                    _finished[self.key] = self.results
+                    while len(_finished) > _MAX_FINISHED:
+                        del _finished[next(iter(_finished))]
+                self._cond.notify_all()
+
+    def _wait(self, n):
+        self.start()
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.results) >= n or self.done)
+        if self.error is not None:
+            raise self.error
+
+    def ready(self, i):
+        """True once frame i is processed (or processing has ended), so frame(i) returns without waiting"""
+
+        return len(self.results) > i or self.done
+
+    def frame(self, i):
+        """Background-removed frame i, waits only until that frame is processed"""
+
+        self._wait(i + 1)
+
+        return self.results[i]
+
+    def frames(self):
+        """All background-removed frames, waits for the stage to finish"""
+
+        self._wait(len(self.frames_crop))
+
+        return self.results
@@ -0,0 +1,81 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Functions that handle locating the folder iCLOTS stores reusable cached data in and bounding its size
+Defaults to a hidden folder in the user's home directory, can be moved with the ICLOTS_CACHE environment variable
+Entries (files or folders) are marked as used by their modification time, least recently used are removed first
+
+"""
+
+import os
+import shutil
+
+
+def cachefolder(name):
+    """Return the path to a named cache folder, created if it does not exist yet"""
+
+    base = os.environ.get('ICLOTS_CACHE', os.path.join(os.path.expanduser('~'), '.iclots', 'cache'))
+    folder = os.path.join(base, name)
+
+    os.makedirs(folder, exist_ok=True)
+
+    return folder
+
+
+def touch(path):
+    """Mark a cache entry (file or folder) as recently used"""
+
+    try:
+        os.utime(path)
+    except OSError:  # Removed meanwhile
+        pass
+
+
+def _entrysize(path):
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    size = 0
+    for folder, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(folder, name))
+            except OSError:
+                pass
+
+    return size
+
+
+def evict(name, max_mb, keep=()):
+    """Remove least recently used entries of a named cache folder until it is within max_mb megabytes
+
+    Entries listed in keep (paths, e.g. a dataset in use) are never removed but count towards the size"""
+
+    folder = cachefolder(name)
+    keep = set(os.path.abspath(path) for path in keep)
+    entries = []
+    for entry in os.listdir(folder):
+        if '.tmp' in entry:  # Being written
+            continue
+        path = os.path.join(folder, entry)
+        try:
+            entries.append((os.stat(path).st_mtime, _entrysize(path), path))
+        except OSError:  # Removed meanwhile
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):  # Oldest use first
+        if total <= max_mb * 1E6:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            pass
+        total -= size
@@ -0,0 +1,123 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handles a reusable index of a binary channel map for the occlusion/accumulation apps
+
+The index is built once per map and region of interest: per-channel row bands, the sum of the map
+and a 3-layer copy of the map to paint overlays on
+Indices are kept in memory for the session and saved to disk keyed by a hash of the map,
+so repeat analyses of the same device design skip the setup cost
+--Recently used indices are kept in memory (default 8, ICLOTS_CHANNELMAPS environment variable)
+--Saved indices are bounded in size (default 256 MB, ICLOTS_CHANNELMAP_CACHE_MB environment variable,
+0 turns saving off), least recently used are removed first
+
+"""
+
+import os
+import hashlib
+import collections
+import numpy as np
+from skimage import measure
+from scipy.ndimage import label
+from accessoryfn import cachefolder
+
+MAX_MB = float(os.environ.get('ICLOTS_CHANNELMAP_CACHE_MB', 256))  # Disk space used by saved indices
+_MAX_LOADED = int(os.environ.get('ICLOTS_CHANNELMAPS', 8))  # Indices kept in memory, oldest dropped first
+
+_SAVED = ('band_start', 'band_end', 'map_sum', 'map_rgb')  # Everything channel_sums, paint and analyses read
+
+_loaded = collections.OrderedDict()  # Indices already built or read this session, keyed by map hash
+
+
+def maphash(map_crop, x, y, w, h):
+    """Return a hex digest identifying a cropped channel map and the ROI it was cropped with"""
+
+    map_crop = np.ascontiguousarray(map_crop)
+
+    digest = hashlib.sha1()
+    digest.update(str((map_crop.shape, str(map_crop.dtype), x, y, w, h)).encode())
+    digest.update(map_crop.tobytes())
+
+    return digest.hexdigest()
+
+
+def build_index(map_crop):
+    """Calculate channel row bands, map sum and a 3-layer map for a cropped channel map"""
+
+    map_crop = np.asarray(map_crop)
+    map_bin = map_crop > 0
+
+    # Create a numbered list of channels
+    lbl, _ = label(map_bin)
+    rp = measure.regionprops_table(lbl, properties=('label', 'bbox'))
+
+    # 3-layer map, copied rather than rebuilt each time an overlay is painted
+    map_uint8 = np.clip(map_crop, 0, 255).astype(np.uint8)
+    map_rgb = np.dstack((map_uint8, map_uint8, map_uint8))
+
+    index = {'band_start': np.asarray(rp['bbox-0'], dtype=np.int64),  # First row of each channel
+             'band_end': np.asarray(rp['bbox-2'], dtype=np.int64),  # Last row (exclusive) of each channel
+             'map_sum': np.array(np.sum(map_crop), dtype=np.float64),  # Sum of map, for percent of device
+             'map_rgb': map_rgb}
+
+    return index
+
+
+def load_index(map_crop, x, y, w, h):
+    """Return the index for a cropped channel map, from memory, from disk, or built and saved if new"""
+
+    key = maphash(map_crop, x, y, w, h)
+
+    if key in _loaded:
+        _loaded.move_to_end(key)  # Recently used
+        return _loaded[key]
+
+    path = os.path.join(cachefolder.cachefolder('channelmaps'), key + '.npz')
+
+    index = None
+    if MAX_MB > 0 and os.path.exists(path):
+        try:
+            with np.load(path) as saved:
+                index = {name: saved[name] for name in _SAVED}
+            cachefolder.touch(path)
+        except (OSError, ValueError, KeyError):  # Unreadable, partial or older file, rebuild
+            index = None
+
+    if index is None:
+        index = build_index(map_crop)
+        if MAX_MB > 0:
+            try:
+                # Write to a temporary name first so an interrupted save never leaves a partial index
+                tmp_path = path + '.tmp.npz'
+                np.savez_compressed(tmp_path, **index)
+                os.replace(tmp_path, path)
+                cachefolder.evict('channelmaps', MAX_MB)
+            except OSError:  # Cache is an optimization only, analysis continues without it
+                pass
+
+    _loaded[key] = index
+    while len(_loaded) > _MAX_LOADED:
+        _loaded.popitem(last=False)
+
+    return index
+
+
+def channel_sums(binary, index):
+    """Sum a binary (0/1) image down each channel band, returns an (n channels x width) array"""
+
+    # Cumulative sum along rows lets every band be summed with two lookups
+    row_cumsum = np.zeros((binary.shape[0] + 1, binary.shape[1]))
+    row_cumsum[1:] = np.cumsum(binary, axis=0)
+
+    return row_cumsum[index['band_end']] - row_cumsum[index['band_start']]
+
+
+def paint(index, binary, color):
+    """Return a copy of the 3-layer map with pixels set in a binary image painted a color"""
+
+    overlay = index['map_rgb'].copy()
+    overlay.reshape(-1, 3)[np.flatnonzero(binary)] = color
+
+    return overlay
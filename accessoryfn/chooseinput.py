@@ -39,16 +39,27 @@ def dirimgfile():
 
     return dirname, filelist
 
-def videofile():
-    """Return a single video file (.avi)"""
-    filename = filedialog.askopenfilename(
-        filetypes=[(".avi", "*.avi")])
+def videofile(stacks=False):
+    """Return a single video file (.avi), or with stacks also a frame stack (.npy, multipage .tif)"""
+    filetypes = [(".avi", "*.avi")]
+    if stacks:  # Readable with accessoryfn/videoframes.py
+        filetypes += [(".npy stack", "*.npy"), (".tif stack", "*.tif")]
+    filename = filedialog.askopenfilename(filetypes=filetypes)
 
     # Change directory
     os.chdir(os.path.dirname(filename))
 
     return filename
 
+def imgsequence():
+    """Return a directory of image files (.png, .jpg, .tif) to read as frames of a single video"""
+    inputdirectory = filedialog.askdirectory()  # Select directory
+
+    # Change directory, outputs are saved beside the folder as they are beside a video
+    os.chdir(os.path.dirname(inputdirectory))
+
+    return inputdirectory
+
 def dirvideofile():
     """Return a directory of video files (.avi)"""
     inputdirectory = filedialog.askdirectory()  # Select directory
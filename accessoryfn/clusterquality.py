@@ -0,0 +1,103 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Function that handles scoring the quality of a clustering with a bounded cost for large cell populations
+
+--Silhouette coefficient: exact for populations up to a sample size (default 5000 events,
+ICLOTS_SILHOUETTE_SAMPLE environment variable), above that the mean of repeated random samples
+(default 10, ICLOTS_SILHOUETTE_REPEATS) with a 95% confidence interval
+The exact coefficient needs every pairwise distance, time and memory grow with the square of the number of events
+--Davies-Bouldin index (lower is better, 0 best) and Calinski-Harabasz index (higher is better),
+always calculated on every event, cost grows linearly with the number of events
+Both can also be calculated from per-cluster sums accumulated in chunks (see accessoryfn/outofcore.py)
+
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn import metrics
+
+SILHOUETTE_SAMPLE = int(os.environ.get('ICLOTS_SILHOUETTE_SAMPLE', 5000))  # Max. events per silhouette score
+SILHOUETTE_REPEATS = int(os.environ.get('ICLOTS_SILHOUETTE_REPEATS', 10))  # Samples averaged above that
+
+
+def silhouette(X, labels, sample_size=None, repeats=None, seed=100):
+    """Silhouette coefficient, exact or from repeated samples
+
+    Returns the coefficient, 95% confidence interval (low, high; equal to the coefficient if exact)
+    and a description of the method used"""
+
+    if sample_size is None:
+        sample_size = SILHOUETTE_SAMPLE
+    if repeats is None:
+        repeats = SILHOUETTE_REPEATS
+
+    n = len(labels)
+    if n <= sample_size:
+        score = metrics.silhouette_score(X, labels)
+        return score, (score, score), 'Exact, all ' + str(n) + ' events'
+
+    scores = np.array([metrics.silhouette_score(X, labels, sample_size=sample_size, random_state=seed + i)
+                       for i in range(repeats)])
+    mean = scores.mean()
+    if repeats > 1:
+        half = stats.t.ppf(0.975, repeats - 1) * scores.std(ddof=1) / np.sqrt(repeats)
+    else:
+        half = np.nan
+    method = ('Mean of ' + str(repeats) + ' random samples of ' + str(sample_size) + ' of ' + str(n) +
+              ' events, 95% CI')
+
+    return mean, (mean - half, mean + half), method
+
+
+def indices(means, n, sum_dist, sum_sqdist):
+    """Davies-Bouldin and Calinski-Harabasz indices from per-cluster sums, as sklearn.metrics calculates them
+
+    means: cluster means (clusters x features), n: events per cluster,
+    sum_dist/sum_sqdist: sum of (squared) distances of each cluster's events to its mean"""
+
+    keep = n > 0
+    means, n, sum_dist, sum_sqdist = means[keep], n[keep], sum_dist[keep], sum_sqdist[keep]
+    k = len(n)
+    n_total = n.sum()
+    if k < 2 or k >= n_total:  # Indices are undefined
+        return np.nan, np.nan
+
+    # Calinski-Harabasz: between-cluster over within-cluster dispersion
+    overall = (means * n[:, None]).sum(axis=0) / n_total
+    extra_disp = (n * ((means - overall) ** 2).sum(axis=1)).sum()
+    intra_disp = sum_sqdist.sum()
+    ch = 1. if intra_disp == 0 else extra_disp * (n_total - k) / (intra_disp * (k - 1))
+
+    # Davies-Bouldin: mean over clusters of the worst ratio of spread to separation
+    spread = sum_dist / n
+    separation = np.sqrt(((means[:, None, :] - means[None, :, :]) ** 2).sum(axis=2))
+    if np.allclose(spread, 0) or np.allclose(separation, 0):
+        return 0., ch
+    separation[separation == 0] = np.inf
+    ratio = (spread[:, None] + spread[None, :]) / separation
+    np.fill_diagonal(ratio, -np.inf)  # Compare each cluster to others only
+
+    return np.mean(ratio.max(axis=1)), ch
+
+
+def quality(X, labels, sample_size=None, repeats=None):
+    """One-row dataframe of clustering quality scores, with the silhouette method used"""
+
+    n_clusters = len(np.unique(labels))
+    if n_clusters < 2 or n_clusters >= len(labels):  # Scores are undefined
+        return pd.DataFrame({'Silhouette coefficient': [np.nan],
+                             'Silhouette method': ['Not defined for ' + str(n_clusters) + ' cluster(s)']})
+
+    score, (low, high), method = silhouette(X, labels, sample_size, repeats)
+
+    return pd.DataFrame({'Silhouette coefficient': [score],
+                         'Silhouette 95% CI, low': [low],
+                         'Silhouette 95% CI, high': [high],
+                         'Silhouette method': [method],
+                         'Davies-Bouldin index': [metrics.davies_bouldin_score(X, labels)],
+                         'Calinski-Harabasz index': [metrics.calinski_harabasz_score(X, labels)]})
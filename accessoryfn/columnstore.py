@@ -0,0 +1,144 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle a simple columnar on-disk store for tabular data (one folder per table)
+
+A table is saved as one or more parts (e.g. one per sample file), appended one at a time,
+so a table larger than memory can be written and later read back in chunks
+Within a part, each numerical column is saved as its own .npy file, so single columns can be read
+without loading the table, and read in chunks through memory-mapping
+Text columns (e.g. sample names) are saved as integer codes with a list of categories
+Only needs numpy, no columnar file libraries (pyarrow, etc.) are required
+
+"""
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+_STORE_VERSION = 2
+
+
+class StoreWriter():
+    """Append dataframes to a new store as parts, the store is only visible once close() is called"""
+
+    def __init__(self, folder):
+        self.folder = folder
+        # Write to a temporary folder first so an interrupted save never leaves a partial store
+        self.tmp_folder = folder + '.tmp'
+        if os.path.exists(self.tmp_folder):
+            shutil.rmtree(self.tmp_folder)
+        os.makedirs(self.tmp_folder)
+        self.parts = []  # Rows in each part
+        self.sources = []  # Description of where each part came from, e.g. file name, size and time
+
+    def append(self, df, source=''):
+        part_folder = os.path.join(self.tmp_folder, 'part_%05d' % len(self.parts))
+        os.makedirs(part_folder)
+
+        columns = []
+        for i, name in enumerate(df.columns):
+            column = df[name]
+            filename = 'col_%d.npy' % i  # Column names may not be valid file names
+            if pd.api.types.is_numeric_dtype(column):
+                np.save(os.path.join(part_folder, filename), column.to_numpy())
+                columns.append({'name': str(name), 'file': filename, 'kind': 'numeric'})
+            else:
+                codes, categories = pd.factorize(column.astype(str).where(column.notna()))
+                np.save(os.path.join(part_folder, filename), codes.astype(np.int32))  # -1 where missing
+                columns.append({'name': str(name), 'file': filename, 'kind': 'text',
+                                'categories': list(categories)})
+
+        with open(os.path.join(part_folder, 'columns.json'), 'w') as f:
+            json.dump(columns, f)
+        self.parts.append(len(df))
+        self.sources.append(source)
+
+    def discard(self):
+        """Abandon the store, nothing is left on disk"""
+
+        shutil.rmtree(self.tmp_folder, ignore_errors=True)
+
+    def close(self):
+        meta = {'version': _STORE_VERSION, 'n_rows': int(sum(self.parts)), 'parts': self.parts,
+                'sources': self.sources}
+        with open(os.path.join(self.tmp_folder, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+        if os.path.exists(self.folder):
+            shutil.rmtree(self.folder)
+        os.replace(self.tmp_folder, self.folder)
+
+
+def write(df, folder):
+    """Save a dataframe to a store folder as a single part, replacing any existing store"""
+
+    writer = StoreWriter(folder)
+    writer.append(df)
+    writer.close()
+
+
+def meta(folder):
+    """Description of a store (row count, rows per part), raises OSError/ValueError if missing or unreadable"""
+
+    with open(os.path.join(folder, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') != _STORE_VERSION:
+        raise ValueError('Column store version not supported: ' + str(folder))
+
+    return meta
+
+
+def exists(folder):
+    try:
+        meta(folder)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def _column(part_folder, column, start=None, end=None):
+    values = np.load(os.path.join(part_folder, column['file']), mmap_mode='r')[start:end]
+    if column['kind'] == 'numeric':
+        return np.array(values)
+    categories = np.array(column['categories'] + [np.nan], dtype=object)
+    return categories[values]  # Code -1 selects the trailing missing value
+
+
+def read_part(folder, part, start=None, end=None, columns=None):
+    """Load rows start to end - 1 of one part (or only the named columns) as a dataframe
+
+    Named columns the part doesn't have are filled with missing values, as pandas.concat would"""
+
+    part_folder = os.path.join(folder, 'part_%05d' % part)
+    with open(os.path.join(part_folder, 'columns.json')) as f:
+        stored = json.load(f)
+    if columns is not None:  # Only the named columns are read from disk
+        stored = [c for c in stored if c['name'] in columns]
+
+    df = pd.DataFrame({c['name']: _column(part_folder, c, start, end) for c in stored},
+                      index=range(len(range(meta(folder)['parts'][part])[start:end])))
+    if columns is not None:
+        df = df.reindex(columns=columns)
+
+    return df
+
+
+def read(folder, columns=None):
+    """Load a store (or only the named columns) as one dataframe, parts combined as pandas.concat would"""
+
+    parts = [read_part(folder, i, columns=columns) for i in range(len(meta(folder)['parts']))]
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def chunks(folder, columns=None, chunksize=1000000):
+    """Yield a store as dataframes of up to chunksize rows (never spanning parts), one chunk in memory at once"""
+
+    for i, n_rows in enumerate(meta(folder)['parts']):
+        for start in range(0, n_rows, chunksize):
+            yield read_part(folder, i, start, min(start + chunksize, n_rows), columns)
@@ -0,0 +1,126 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle calculating a feature correlation matrix from per-file partial sums
+
+Pearson correlation with pairwise-complete events (as pandas DataFrame.corr) is built from sums of values,
+squares and products of each pair of features, which can be added up file by file
+--Sums for each file are calculated with float32 matrix products on values centered on the file's means,
+then combined in float64, so large values don't lose precision
+--Sums are cached per file (keyed by file name, size, modification time and features, see accessoryfn/mldata.py),
+so adding files to a folder only calculates the new files, within the stored dataset size limit
+
+"""
+
+import os
+import hashlib
+import warnings
+import numpy as np
+import pandas as pd
+from accessoryfn import cachefolder, columnstore, mldata
+
+_CORR_VERSION = '1'  # Increase if calculation changes so stale cached sums aren't reused
+
+
+def partsums(X):
+    """Partial sums for one file's events (events x features), missing values as NaN"""
+
+    X = np.asarray(X, dtype=np.float64)
+    present = np.isfinite(X)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # Features with no values
+        center = np.nanmean(np.where(present, X, np.nan), axis=0)
+    center = np.where(np.isfinite(center), center, 0)
+
+    Xc = np.where(present, X - center, 0).astype(np.float32)  # Missing values add nothing
+    P = present.astype(np.float32)
+
+    # Entry i, j sums feature i over events where both i and j are present
+    return {'center': center,
+            'n': (P.T @ P).astype(np.float64),
+            'sx': (Xc.T @ P).astype(np.float64),
+            'sxx': ((Xc * Xc).T @ P).astype(np.float64),
+            'sxy': (Xc.T @ Xc).astype(np.float64)}
+
+
+def combine(sums, features):
+    """Correlation matrix (dataframe) from a list of partial sums"""
+
+    n = sum(s['n'] for s in sums)
+    counts = np.maximum(np.diag(n), 1)
+    shared = sum(s['center'] * np.diag(s['n']) for s in sums) / counts  # Common center for all files
+
+    sx, sxx, sxy = 0, 0, 0
+    for s in sums:  # Move each file's sums from its own center to the shared center
+        d = s['center'] - shared
+        sx = sx + s['sx'] + d[:, None] * s['n']
+        sxx = sxx + s['sxx'] + 2 * d[:, None] * s['sx'] + d[:, None] ** 2 * s['n']
+        sxy = sxy + s['sxy'] + d[:, None] * s['sx'].T + d[None, :] * s['sx'] + np.outer(d, d) * s['n']
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        numerator = n * sxy - sx * sx.T
+        denominator = np.sqrt((n * sxx - sx ** 2) * (n * sxx.T - sx.T ** 2))
+        corr = np.clip(numerator / denominator, -1, 1)
+    np.fill_diagonal(corr, np.where(np.diag(denominator) > 0, 1., np.nan))  # Undefined for constant features
+
+    return pd.DataFrame(corr, index=features, columns=features)
+
+
+def _cachepath(source, features):
+    digest = hashlib.sha1()
+    digest.update((_CORR_VERSION + '\n' + source + '\n' + '\n'.join(features)).encode())
+
+    return os.path.join(cachefolder.cachefolder('correlation'), digest.hexdigest() + '.npz')
+
+
+def storecorr(folder, features):
+    """Correlation matrix of a column store, from cached per-file sums where available"""
+
+    features = list(features)
+    sources = columnstore.meta(folder).get('sources', [])
+    sums = []
+    saved_any = False
+    for i in range(len(columnstore.meta(folder)['parts'])):
+        path = None
+        if mldata.MAX_MB > 0 and i < len(sources) and sources[i]:
+            path = _cachepath(sources[i], features)
+
+        s = None
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as saved:
+                    s = {name: saved[name] for name in saved.files}
+                cachefolder.touch(path)  # Recently used
+            except (OSError, ValueError, KeyError):  # Unreadable or partial file, calculate again
+                s = None
+
+        if s is None:
+            part = columnstore.read_part(folder, i, columns=features)
+            s = partsums(part.to_numpy(dtype=np.float64))
+            if path is not None:
+                try:
+                    # Write to a temporary name first so an interrupted save never leaves partial sums
+                    np.savez(path + '.tmp.npz', **s)
+                    os.replace(path + '.tmp.npz', path)
+                    saved_any = True
+                except OSError:  # Cache is an optimization only
+                    pass
+        sums.append(s)
+
+    if saved_any:
+        try:
+            cachefolder.evict('correlation', mldata.MAX_MB)
+        except OSError:
+            pass
+
+    return combine(sums, features)
+
+
+def dfcorr(df, features):
+    """Correlation matrix of a dataframe, with the same float32 calculation"""
+
+    features = list(features)
+
+    return combine([partsums(df[features].to_numpy(dtype=np.float64))], features)
@@ -0,0 +1,90 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle a per-frame cache of located features (Trackpy) for video applications
+
+Features are kept for the session per video source (file, its size and modification time, region of interest and
+preprocessing, e.g. background removal method), frame index and location parameters (diameter, minimum mass, invert)
+A file rewritten at the same path (e.g. a cropped video saved again) is a new source, so its features are located again
+The preview (one displayed frame) and the final analysis (every frame) locate features through the same cache,
+so frames inspected while choosing parameters are not located again during analysis, and rerunning analysis
+after changing only parameters used after location (e.g. linking, filtering) does not locate any frames again
+
+"""
+
+import os
+import collections
+import warnings
+import pandas as pd
+import trackpy as tp
+
+_MAX_SETS = int(os.environ.get('ICLOTS_FEATURE_SETS', 16))  # Location parameter sets kept, oldest dropped first
+
+_features = collections.OrderedDict()  # (source, diameter, minmass, invert): {frame index: features}
+
+
+def fileidentity(filename):
+    """Identify a file by size and modification time, or a folder of frames by those of every file in it"""
+
+    if os.path.isdir(filename):
+        return tuple((name,) + fileidentity(os.path.join(filename, name)) for name in sorted(os.listdir(filename))
+                     if os.path.isfile(os.path.join(filename, name)))
+
+    stat = os.stat(filename)
+
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def source(filename, x, y, w, h, preprocessing=None):
+    """Identify the frames features are located in: video and its identity, region of interest and any preprocessing"""
+
+    return (os.path.abspath(filename), fileidentity(filename), int(x), int(y), int(w), int(h), preprocessing)
+
+
+def _found(source, diameter, minmass, invert):
+    key = (source, diameter, minmass, bool(invert))
+    if key in _features:
+        _features.move_to_end(key)  # Recently used
+    else:
+        _features[key] = {}
+        while len(_features) > _MAX_SETS:
+            _features.popitem(last=False)
+
+    return _features[key]
+
+
+def _locate(frame, i, diameter, minmass, invert):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # Trackpy warns for frames with no features
+        f = tp.locate(frame, diameter, minmass=minmass, invert=invert)
+    f['frame'] = i
+
+    return f
+
+
+def locate(source, frame, i, diameter, minmass, invert=False):
+    """Features of frame i (as trackpy.locate, with a frame column), located only if not already cached"""
+
+    found = _found(source, diameter, minmass, invert)
+    if i not in found:
+        found[i] = _locate(frame, i, diameter, minmass, invert)
+
+    return found[i].copy()
+
+
+def batch(source, frames, diameter, minmass, invert=False):
+    """Features of every frame as one dataframe (as trackpy.batch), only frames not already cached are located"""
+
+    found = _found(source, diameter, minmass, invert)
+    for i in range(len(frames)):
+        if i not in found:
+            found[i] = _locate(frames[i], i, diameter, minmass, invert)
+
+    located = [found[i] for i in range(len(frames))]
+    nonempty = [f for f in located if len(f) > 0]
+    if len(nonempty) == 0:
+        return located[0].copy() if len(located) > 0 else pd.DataFrame()
+
+    return pd.concat(nonempty).reset_index(drop=True)
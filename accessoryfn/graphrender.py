@@ -0,0 +1,217 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handles deferred rendering of the per-image/per-video graphs shown after analysis
+
+Analyses describe each graph as a small spec (title, size, histogram/scatter/pie panels and their data) instead of drawing it
+Graphs are drawn on the Agg backend only when displayed or exported, in a process pool when exporting many,
+and rendered PNG bytes are kept in memory and saved to disk keyed by a hash of the spec
+--Saved graphs share the size limit of saved analysis results (accessoryfn/resultcache.py, 0 turns saving off),
+least recently used graphs are removed first
+
+"""
+
+import os
+import io
+import pickle
+import hashlib
+import concurrent.futures
+import cv2
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from accessoryfn import cachefolder, resultcache
+
+_RENDER_VERSION = '1'  # Increase if drawing changes so stale cached graphs aren't reused
+
+
+def histpanel(pos, data, xlabel, color='orangered'):
+    """Histogram panel, pos is a subplot position as used with plt.subplot (int or tuple)"""
+
+    return {'kind': 'hist', 'pos': pos, 'data': np.asarray(data, dtype=np.float64),
+            'xlabel': xlabel, 'ylabel': 'n', 'color': color}
+
+
+def scatterpanel(pos, xdata, ydata, xlabel, ylabel, color='springgreen'):
+    """Scatter plot panel, pos is a subplot position as used with plt.subplot (int or tuple)"""
+
+    return {'kind': 'scatter', 'pos': pos, 'xdata': np.asarray(xdata, dtype=np.float64),
+            'ydata': np.asarray(ydata, dtype=np.float64), 'xlabel': xlabel, 'ylabel': ylabel, 'color': color}
+
+
+def piepanel(pos, sizes, labels, colors, title):
+    """Pie chart panel, pos is a subplot position as used with plt.subplot (int or tuple)"""
+
+    return {'kind': 'pie', 'pos': pos, 'sizes': list(sizes), 'labels': list(labels),
+            'colors': list(colors), 'title': title}
+
+
+def graphspec(title, panels, figsize=(4, 4), layout=(2, 1), dpi=80):
+    """Description of one graph, panels is a list of histpanel/scatterpanel/piepanel dictionaries"""
+
+    return {'title': title, 'panels': panels, 'figsize': tuple(figsize), 'layout': tuple(layout), 'dpi': dpi}
+
+
+def spechash(spec):
+    """Return a hex digest identifying a graph spec, including the data it plots"""
+
+    digest = hashlib.sha1()
+    digest.update((_RENDER_VERSION + matplotlib.__version__).encode())
+    digest.update(pickle.dumps(spec, protocol=4))
+
+    return digest.hexdigest()
+
+
+def render_png(spec):
+    """Draw a graph spec on the Agg backend and return PNG bytes
+
+    Does not use pyplot, so it is safe to call from worker threads and processes"""
+
+    fig = Figure(figsize=spec['figsize'], dpi=spec['dpi'])
+    FigureCanvasAgg(fig)
+    fig.suptitle(spec['title'], fontweight='bold')
+
+    rows, cols = spec['layout']
+    for panel in spec['panels']:
+        ax = fig.add_subplot(rows, cols, panel['pos'])
+        if panel['kind'] == 'hist':
+            ax.hist(panel['data'], rwidth=0.8, color=panel['color'])
+            ax.set_xlabel(panel['xlabel'])
+            ax.set_ylabel(panel['ylabel'])
+        elif panel['kind'] == 'scatter':
+            ax.scatter(panel['xdata'], panel['ydata'], color=panel['color'])
+            ax.set_xlabel(panel['xlabel'])
+            ax.set_ylabel(panel['ylabel'])
+        elif panel['kind'] == 'pie':
+            ax.set_title(panel['title'])
+            ax.pie(panel['sizes'], labels=panel['labels'], colors=panel['colors'], autopct='%1.1f%%')
+
+    if len(spec['panels']) != 0:
+        fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=spec['dpi'])
+
+    return buffer.getvalue()
+
+
+class DeferredGraphs():
+    """Named graph specs, rendered on request and cached as PNG bytes"""
+
+    def __init__(self):
+        self.specs = {}  # Graph name: spec
+        self.keys = {}  # Graph name: spec hash
+        self.png = {}  # Spec hash: rendered PNG bytes
+
+    def add(self, name, spec):
+        """Record a graph to be drawn later, nothing is rendered here"""
+
+        self.specs[name] = spec
+        self.keys[name] = spechash(spec)
+
+    def _cachepath(self, key):
+        return os.path.join(cachefolder.cachefolder('graphs'), key + '.png')
+
+    def _fromdisk(self, key):
+        if resultcache.MAX_MB <= 0:
+            return None
+
+        path = self._cachepath(key)
+        try:
+            with open(path, 'rb') as f:
+                png = f.read()
+        except OSError:
+            return None
+        cachefolder.touch(path)  # Recently used
+
+        return png
+
+    def _todisk(self, key, png):
+        if resultcache.MAX_MB <= 0:
+            return
+
+        try:
+            # Write to a temporary name first so an interrupted save never leaves a partial graph
+            path = self._cachepath(key)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(png)
+            os.replace(path + '.tmp', path)
+        except OSError:  # Cache is an optimization only
+            pass
+
+    def getpng(self, name):
+        """Return PNG bytes for a named graph, rendering it now if needed"""
+
+        key = self.keys[name]
+        if key not in self.png:
+            self._load(name)
+            self._evict()
+
+        return self.png[key]
+
+    def _load(self, name):
+        key = self.keys[name]
+        png = self._fromdisk(key)
+        if png is None:
+            png = render_png(self.specs[name])
+            self._todisk(key, png)
+        self.png[key] = png
+
+    def _evict(self):
+        if resultcache.MAX_MB > 0:
+            try:
+                cachefolder.evict('graphs', resultcache.MAX_MB)
+            except OSError:  # Cache is an optimization only
+                pass
+
+    def getrgb(self, name):
+        """Return a named graph as an RGB array, for display in a tkinter window"""
+
+        png = self.getpng(name)
+        bgr = cv2.imdecode(np.frombuffer(png, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+    def renderall(self, names=None, processes=None):
+        """Render every named graph not yet cached, in a process pool if there are several"""
+
+        if names is None:
+            names = list(self.specs)
+
+        # Check disk before scheduling any drawing
+        todo = []
+        todo_keys = set()
+        for name in names:
+            key = self.keys[name]
+            if key in self.png:
+                continue
+            png = self._fromdisk(key)
+            if png is not None:
+                self.png[key] = png
+            elif key not in todo_keys:
+                todo.append(name)
+                todo_keys.add(key)
+
+        if len(todo) > 2 and processes != 1:
+            try:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+                    for name, png in zip(todo, pool.map(render_png, [self.specs[t] for t in todo])):
+                        self.png[self.keys[name]] = png
+                        self._todisk(self.keys[name], png)
+            except (OSError, RuntimeError, concurrent.futures.BrokenExecutor):
+                pass  # Pool unavailable, anything not rendered is drawn below
+
+        for name in todo:
+            if self.keys[name] not in self.png:
+                self._load(name)
+
+        self._evict()
+
+    def save(self, name, filename):
+        """Write a named graph to a .png file"""
+
+        with open(filename, 'wb') as f:
+            f.write(self.getpng(name))
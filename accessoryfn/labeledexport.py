@@ -0,0 +1,102 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle exporting video frames labeled with tracked particle/cell indices
+
+Tracks are grouped by frame once (one sort) rather than searched for every frame
+Labels are drawn with OpenCV into a reused frame buffer and streamed into a single annotated video
+(any format in accessoryfn/videowriters.py), or saved as one PNG image per frame, written in parallel
+(OpenCV releases the interpreter lock while drawing and encoding)
+
+"""
+
+import threading
+import concurrent.futures
+import cv2
+import numpy as np
+from accessoryfn import videowriters
+
+PNG = 'PNG images (one per frame)'
+FORMATS = videowriters.FORMATS + [PNG]
+DEFAULT = videowriters.DEFAULT
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_SCALE = 0.4  # Similar in size to the default pillow font previously used
+_TEXT_HEIGHT = cv2.getTextSize('0', _FONT, _SCALE, 1)[0][1]
+
+
+def byframe(tracks, n_frames):
+    """Group tracks (trackpy dataframe) by frame, returns positions, particle indices and row bounds per frame
+
+    Rows of frame i are start[i]:start[i + 1], in their original order"""
+
+    if len(tracks) == 0 or 'frame' not in tracks:
+        return np.zeros((0, 2), dtype=int), np.zeros(0, dtype=int), np.zeros(n_frames + 1, dtype=int)
+
+    frame = tracks['frame'].to_numpy().astype(int)
+    order = np.argsort(frame, kind='stable')
+    xy = tracks[['x', 'y']].to_numpy()[order].astype(int)
+    particle = tracks['particle'].to_numpy()[order].astype(int)
+    start = np.searchsorted(frame[order], np.arange(n_frames + 1))
+
+    return xy, particle, start
+
+
+def draw(frame, xy, texts, colors, buffer):
+    """Draw labels over a frame (grayscale or BGR) into buffer (height, width, 3), returns buffer"""
+
+    if frame.ndim == 2:
+        cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR, dst=buffer)
+    else:
+        np.copyto(buffer, frame)
+    for (x, y), text, color in zip(xy, texts, colors):
+        # Text placed below and right of the position (top-left corner), as pillow draws it
+        cv2.putText(buffer, text, (int(x), int(y) + _TEXT_HEIGHT), _FONT, _SCALE, color, 1, cv2.LINE_AA)
+
+    return buffer
+
+
+def export(frames, tracks, basename, fps, fmt=DEFAULT, color=(0, 0, 255), colors=None, workers=None):
+    """Export frames labeled with particle indices
+
+    frames are uint8 grayscale or BGR arrays, basename is the output path without extension (a video)
+    or frame number and extension (PNG images), color is one BGR label color, or colors is a BGR color per particle"""
+
+    n_frames = len(frames)
+    if n_frames == 0:
+        return
+
+    xy, particle, start = byframe(tracks, n_frames)
+    texts = [str(p) for p in particle]  # Formatted once
+    if colors is None:
+        label_colors = [color] * len(particle)
+    else:
+        label_colors = [tuple(int(c) for c in colors[p]) for p in particle]
+
+    height, width = frames[0].shape[:2]
+
+    def labeled(i, buffer):
+        rows = slice(start[i], start[i + 1])
+        return draw(frames[i], xy[rows], texts[rows], label_colors[rows], buffer)
+
+    if fmt == PNG:
+        local = threading.local()  # One buffer per worker thread
+
+        def save(i):
+            if not hasattr(local, 'buffer'):
+                local.buffer = np.empty((height, width, 3), dtype=np.uint8)
+            cv2.imwrite(basename + '_frame_' + str(i).zfill(5) + '_labeled.png', labeled(i, local.buffer))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(save, range(n_frames)))  # Raises any error from a worker
+        return
+
+    out = videowriters.open_writer(basename + '_labeled', fps, (width, height), fmt)
+    buffer = np.empty((height, width, 3), dtype=np.uint8)
+    try:
+        for i in range(n_frames):
+            out.write(labeled(i, buffer))
+    finally:
+        out.release()
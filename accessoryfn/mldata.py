@@ -0,0 +1,205 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle loading a folder of per-sample result files into one dataset for machine learning
+
+Inputs, one file per sample (the file name is used as the sample name):
+--Excel files (.xlsx) with a single sheet, as exported by iCLOTS analysis applications
+--Parquet (.parquet, requires pyarrow or fastparquet) or comma-separated (.csv) exports of the same tables
+
+Files are parsed in parallel in a process pool (Excel parsing does not release the interpreter lock)
+and combined once at the end
+Excel sheets are counted by opening workbooks read-only, without loading cell data
+The combined dataset is saved to a column store (see accessoryfn/columnstore.py), one part per file, keyed by the
+files' names, sizes and modification times, so running the workflow again on an unchanged folder skips parsing
+Files are written to the store as they are parsed, so datasets larger than memory can be stored and then
+clustered in chunks (out-of-core mode, see accessoryfn/outofcore.py) from a stratified sample and the store
+--Stores are bounded in size (default 4096 MB, ICLOTS_DATASET_CACHE_MB environment variable, 0 keeps only the
+dataset in use), least recently used stores are removed first
+
+"""
+
+import os
+import glob
+import collections
+import hashlib
+import concurrent.futures
+import pandas as pd
+import openpyxl
+from accessoryfn import cachefolder, columnstore
+
+EXTENSIONS = ('.xlsx', '.parquet', '.csv')
+MAX_MB = float(os.environ.get('ICLOTS_DATASET_CACHE_MB', 4096))  # Disk space used by stored datasets
+_DATA_VERSION = '2'  # Increase if loading changes so stale cached datasets aren't reused
+
+
+def datafiles(dirname):
+    """Sorted data files (.xlsx, .parquet, .csv) in a folder, Excel lock files (~$) are skipped"""
+
+    filelist = []
+    for ext in EXTENSIONS:
+        filelist += glob.glob(os.path.join(dirname, '*' + ext))
+
+    return sorted(f for f in filelist if not os.path.basename(f).startswith('~$'))
+
+
+def samplename(filename):
+    """Sample name: file name without extension"""
+
+    return os.path.basename(filename).split('.')[0]
+
+
+def sheetnames(filename):
+    """Sheet names of an Excel file, read without loading cell data"""
+
+    xl = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        return xl.sheetnames
+    finally:
+        xl.close()
+
+
+def read_datafile(filename):
+    """Read one sample's data with its sample name added as a column, raises ValueError for unusable files"""
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.xlsx':
+        if len(sheetnames(filename)) != 1:
+            raise ValueError('Too many or two few sheets included in:\n' + filename)
+        sheet = pd.read_excel(filename, engine='openpyxl')
+    elif ext == '.parquet':
+        sheet = pd.read_parquet(filename)
+    elif ext == '.csv':
+        sheet = pd.read_csv(filename)
+    else:
+        raise ValueError('Unsupported file type: ' + filename)
+
+    sheet['Sample'] = samplename(filename)  # Add as column
+
+    return sheet
+
+
+def source(filename):
+    """Identify a file by name, size and modification time"""
+
+    stat = os.stat(filename)
+
+    return '%s|%d|%d' % (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+
+
+def datasethash(filelist):
+    """Return a hex digest identifying a list of files by name, size and modification time"""
+
+    digest = hashlib.sha1()
+    digest.update(_DATA_VERSION.encode())
+    for filename in filelist:
+        digest.update((source(filename) + '\n').encode())
+
+    return digest.hexdigest()
+
+
+def storefolder(filelist):
+    """Column store folder the combined dataset of a list of files is cached in"""
+
+    return os.path.join(cachefolder.cachefolder('mldata'), datasethash(filelist))
+
+
+def parsed(filelist, workers=None):
+    """Yield (filename, dataframe or exception) in file order, files parsed ahead in a process pool
+
+    Only about two files per worker are held in memory at once"""
+
+    workers = workers or os.cpu_count() or 1
+    if len(filelist) == 1 or workers == 1:  # Not worth starting a pool
+        for filename in filelist:
+            try:
+                yield filename, read_datafile(filename)
+            except Exception as e:
+                yield filename, e
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        files = iter(filelist)
+        ahead = collections.deque()
+        for filename in files:  # Fill read-ahead window
+            ahead.append((filename, pool.submit(read_datafile, filename)))
+            if len(ahead) >= 2 * workers:
+                break
+        while len(ahead) > 0:
+            filename, future = ahead.popleft()
+            following = next(files, None)
+            if following is not None:
+                ahead.append((following, pool.submit(read_datafile, following)))
+            try:
+                yield filename, future.result()
+            except Exception as e:
+                yield filename, e
+
+
+def build_store(filelist, workers=None):
+    """Combine a list of data files into a column store, one part per file, unless already stored
+
+    Returns the store folder and a list of error messages for files that could not be read
+    (the folder is None if there were any errors)"""
+
+    folder = storefolder(filelist)
+    if columnstore.exists(folder):
+        cachefolder.touch(folder)  # Recently used
+        return folder, []
+
+    writer = columnstore.StoreWriter(folder)
+    errors = []
+    for filename, sheet in parsed(filelist, workers):
+        if isinstance(sheet, Exception):
+            errors.append(str(sheet))
+        elif len(errors) == 0:
+            writer.append(sheet, source(filename))
+
+    if len(errors) > 0:
+        writer.discard()
+        return None, errors
+
+    writer.close()
+    evict(keep=[folder])
+
+    return folder, []
+
+
+def evict(max_mb=None, keep=()):
+    """Remove least recently used stores until stored datasets are within their size limit"""
+
+    try:
+        cachefolder.evict('mldata', MAX_MB if max_mb is None else max_mb, keep)
+    except OSError:  # Cache is an optimization only
+        pass
+
+
+def load(filelist, workers=None):
+    """Combine a list of data files into one dataframe, from cache if the files are unchanged
+
+    Returns the dataframe and a list of error messages for files that could not be read
+    (the dataframe is None if there were any errors)"""
+
+    folder, errors = build_store(filelist, workers)
+    if len(errors) > 0:
+        return None, errors
+
+    return columnstore.read(folder), []  # Combined once, in file order
+
+
+def sample(folder, cap, seed=0):
+    """Deterministic random sample of about cap rows of a store, the same fraction from each file (sample)
+
+    Read one part at a time, so the store does not need to fit in memory"""
+
+    n_rows = columnstore.meta(folder)['n_rows']
+    frac = min(1., cap / max(n_rows, 1))
+
+    parts = []
+    for i in range(len(columnstore.meta(folder)['parts'])):
+        part = columnstore.read_part(folder, i)
+        parts.append(part.sample(frac=frac, random_state=seed + i) if frac < 1 else part)
+
+    return pd.concat(parts, ignore_index=True)
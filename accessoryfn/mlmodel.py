@@ -0,0 +1,122 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle saving a fitted clustering model and assigning new samples to its clusters
+
+The clustering step saves the features used, the fitted feature scaling and the centroid model
+(a .joblib file in the results folder)
+New per-sample exports (.xlsx, .parquet, .csv, see accessoryfn/mldata.py) can then be labeled against the saved
+clusters without clustering again: each event is standardized and given the label of its nearest centroid,
+in one vectorized pass per file, so labeling costs events x clusters rather than a full refit
+
+"""
+
+import os
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from accessoryfn import mldata
+
+_MODEL_VERSION = 1
+EXCEL_ROWS = 1048575  # Max. data rows in an Excel sheet (plus header)
+
+
+def save(filename, features, scaler, model):
+    """Save the features, fitted scaler and fitted centroid model of a clustering"""
+
+    saved = {'version': _MODEL_VERSION, 'sklearn': sklearn.__version__, 'features': list(features),
+             'scaler': scaler, 'model': model}
+    joblib.dump(saved, filename)
+
+
+def load(filename):
+    """Load a saved clustering, raises ValueError if it isn't one
+
+    Warns if it was saved with another scikit-learn version, as fitted models may not load or label identically"""
+
+    saved = joblib.load(filename)
+    if not isinstance(saved, dict) or saved.get('version') != _MODEL_VERSION:
+        raise ValueError('Not an iCLOTS clustering model: ' + str(filename))
+    if saved.get('sklearn') != sklearn.__version__:
+        warnings.warn('Clustering model was saved with scikit-learn ' + str(saved.get('sklearn')) +
+                      ', now using ' + sklearn.__version__ + ', labels may differ')
+
+    return saved
+
+
+def assign(df, saved):
+    """Labels for each event of a dataframe with the saved features, NaN where any feature is missing"""
+
+    missing = [f for f in saved['features'] if f not in df.columns]
+    if len(missing) > 0:
+        raise ValueError('Features used for clustering not found: ' + ', '.join(missing))
+
+    X = df[saved['features']].to_numpy(dtype=np.float64)
+    complete = np.isfinite(X).all(axis=1)
+    labels = np.full(len(df), np.nan)
+    if complete.any():
+        labels[complete] = saved['model'].predict(saved['scaler'].transform(X[complete]))
+
+    return labels
+
+
+def assign_files(filelist, saved, basename):
+    """Label every event of a list of data files against a saved clustering, files are read in parallel
+
+    Saves labeled data (.xlsx, or .csv if too large for Excel), counts and means by sample and cluster
+    Returns a list of error messages for files that could not be labeled"""
+
+    features = saved['features']
+    labeled = []  # Kept only while small enough for an Excel sheet
+    csvname = basename + '_assigned_labeled-data.csv'
+    counts = []
+    sums = []
+    n_rows = 0
+    errors = []
+
+    for filename, sheet in mldata.parsed(filelist):
+        try:
+            if isinstance(sheet, Exception):
+                raise sheet
+            labels = assign(sheet, saved)  # Checks features are present first
+            df_final = sheet[['Sample'] + features].copy()
+            df_final['Label'] = labels
+        except Exception as e:
+            errors.append(str(e))
+            continue
+
+        df_final = df_final.dropna(subset=['Label'])
+        df_final['Label'] = df_final['Label'].astype(int)
+        df_final.index = range(n_rows, n_rows + len(df_final))
+        df_final.to_csv(csvname, mode='w' if n_rows == 0 else 'a', header=(n_rows == 0))
+        n_rows += len(df_final)
+        if n_rows <= EXCEL_ROWS:
+            labeled.append(df_final)
+        else:
+            labeled = None
+
+        counts.append(df_final.groupby(['Sample', 'Label']).size())
+        sums.append(df_final.groupby(['Sample', 'Label'])[features].sum())
+
+    if n_rows == 0:
+        return errors if len(errors) > 0 else ['No events could be labeled']
+
+    count_series = pd.concat(counts).groupby(level=[0, 1]).sum()
+    df_mean = pd.concat(sums).groupby(level=[0, 1]).sum().div(count_series, axis=0)
+
+    writer = pd.ExcelWriter(basename + '_assigned.xlsx', engine='openpyxl')
+    if labeled is not None:
+        pd.concat(labeled).to_excel(writer, sheet_name='Labeled data')
+        os.remove(csvname)  # All labeled data fits in workbook
+    else:
+        note = pd.DataFrame({'Labeled data': ['Saved as ' + csvname + ', ' + str(n_rows) + ' events']})
+        note.to_excel(writer, sheet_name='Labeled data', index=False)
+    count_series.to_frame(name='size').reset_index().to_excel(writer, sheet_name='Counts')
+    df_mean.reset_index().to_excel(writer, sheet_name='Mean by sample, cluster')
+    writer.close()
+
+    return errors
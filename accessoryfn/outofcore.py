@@ -0,0 +1,184 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions and classes that handle clustering a dataset larger than memory (out-of-core mode)
+
+A stratified sample (default 200000 events, ICLOTS_OUTOFCORE_SAMPLE environment variable) is kept in memory for
+feature selection, the scree plot, starting centroids and graphs
+The dataset is read in chunks (default 500000 events, ICLOTS_CHUNKSIZE environment variable)
+from a column store (see accessoryfn/columnstore.py and accessoryfn/mldata.py), only feature columns are read
+--Feature scaling is fit chunk by chunk (StandardScaler.partial_fit)
+--Starting centroids come from k-means on a stratified sample, then mini-batch k-means is updated with every
+chunk (MiniBatchKMeans.partial_fit) for a number of passes (epochs)
+--Labels are assigned chunk by chunk and written to a .csv file rather than held in memory
+--Per-cluster min, mean, max, standard deviation and per-sample counts are accumulated chunk by chunk
+(means and deviations merged with Chan's parallel algorithm, so they match a single pass over all events)
+--Davies-Bouldin and Calinski-Harabasz indices are calculated on all events from per-cluster sums,
+the silhouette coefficient on the sample (see accessoryfn/clusterquality.py)
+
+Memory use depends on the chunk size and sample size, not on the number of events
+
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+from accessoryfn import columnstore, clusterquality
+
+CHUNKSIZE = int(os.environ.get('ICLOTS_CHUNKSIZE', 500000))  # Events read at once
+SAMPLE = int(os.environ.get('ICLOTS_OUTOFCORE_SAMPLE', 200000))  # Events kept in memory for plots and starting point
+EPOCHS = 3  # Passes over the dataset when updating centroids
+BATCH = 4096  # Events per mini-batch update
+
+
+def feature_chunks(folder, features, chunksize=None, extra=()):
+    """Yield chunks of a store with complete feature values, with any extra columns (e.g. 'Sample')"""
+
+    if chunksize is None:
+        chunksize = CHUNKSIZE
+
+    for chunk in columnstore.chunks(folder, list(extra) + list(features), chunksize):
+        chunk = chunk.dropna(subset=features)  # Drop any rows with any NaN values
+        if len(chunk) > 0:
+            yield chunk
+
+
+def fit_scaler(folder, features, chunksize=None):
+    """Standardization (mean 0, standard deviation 1) fit on every event"""
+
+    scaler = StandardScaler()
+    for chunk in feature_chunks(folder, features, chunksize):
+        scaler.partial_fit(chunk[features].to_numpy(dtype=np.float64))
+
+    return scaler
+
+
+def fit_model(folder, features, scaler, n_clusters, df_sample, epochs=EPOCHS, chunksize=None, seed=100):
+    """Mini-batch k-means, started from k-means on a sample and updated with every chunk"""
+
+    X_sample = scaler.transform(df_sample[features].dropna().to_numpy(dtype=np.float64))
+    init = KMeans(n_clusters=n_clusters, random_state=seed).fit(X_sample).cluster_centers_
+
+    model = MiniBatchKMeans(n_clusters=n_clusters, init=init, n_init=1, batch_size=BATCH, random_state=seed)
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        for chunk in feature_chunks(folder, features, chunksize):
+            X = scaler.transform(chunk[features].to_numpy(dtype=np.float64))
+            X = X[rng.permutation(len(X))]  # Files are stored in order, mix within chunk
+            if len(X) < n_clusters:
+                continue
+            for batch in np.array_split(X, max(1, len(X) // BATCH)):
+                model.partial_fit(batch)
+
+    return model
+
+
+class ClusterStats():
+    """Per-cluster descriptive statistics accumulated one chunk at a time"""
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.n = None  # Events per label
+        self.mean = None
+        self.m2 = None  # Sum of squared differences from the mean
+        self.min = None  # Incl. sample name, as a groupby on the full data would
+        self.max = None
+        self.counts = None  # Events per sample and label
+
+    def update(self, df):
+        """Add a chunk with 'Sample', feature and 'Label' columns"""
+
+        groups = df.groupby('Label')
+        n = groups.size().astype(np.float64)
+        mean = groups[self.features].mean()
+        m2 = groups[self.features].var(ddof=0).mul(n, axis=0)
+        cmin = groups[['Sample'] + self.features].min()
+        cmax = groups[['Sample'] + self.features].max()
+        counts = df.groupby(['Sample', 'Label']).size()
+
+        if self.n is None:
+            self.n, self.mean, self.m2, self.min, self.max, self.counts = n, mean, m2, cmin, cmax, counts
+            return
+
+        # Chan et al. merge of two sets of means and squared differences
+        labels = self.n.index.union(n.index)
+        na = self.n.reindex(labels, fill_value=0)
+        nb = n.reindex(labels, fill_value=0)
+        ma = self.mean.reindex(labels).fillna(0)
+        mb = mean.reindex(labels).fillna(0)
+        total = na + nb
+        delta = mb - ma
+        self.mean = ma + delta.mul(nb / total, axis=0)
+        self.m2 = (self.m2.reindex(labels).fillna(0) + m2.reindex(labels).fillna(0) +
+                   (delta ** 2).mul(na * nb / total, axis=0))
+        self.n = total
+        self.min = pd.concat([self.min, cmin]).groupby(level=0).min()
+        self.max = pd.concat([self.max, cmax]).groupby(level=0).max()
+        self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+
+    def tables(self):
+        """Min., mean, max, stdev. by cluster and counts by sample and cluster, as the in-memory workflow saves"""
+
+        std = np.sqrt(self.m2.div(self.n - 1, axis=0))  # Sample standard deviation (ddof=1), as pandas
+        count_series_df = self.counts.sort_index().to_frame(name='size').reset_index()
+
+        return self.min, self.mean, self.max, std, count_series_df
+
+
+def assign(folder, features, scaler, model, csvfile, chunksize=None):
+    """Label every event chunk by chunk, labeled events are appended to a .csv file
+
+    Returns per-cluster statistics and scaled-space sums used for cluster quality indices"""
+
+    stats = ClusterStats(features)
+    k = model.n_clusters
+    scaled_sum = np.zeros((k, len(features)))
+    start = 0
+
+    for chunk in feature_chunks(folder, features, chunksize, extra=('Sample',)):
+        X = scaler.transform(chunk[features].to_numpy(dtype=np.float64))
+        labels = model.predict(X)
+
+        df_final = chunk[['Sample'] + list(features)].copy()
+        df_final['Label'] = labels
+        df_final.index = range(start, start + len(df_final))  # Running index, as in the labeled data sheet
+        df_final.to_csv(csvfile, mode='w' if start == 0 else 'a', header=(start == 0))
+        start += len(df_final)
+
+        stats.update(df_final)
+        scaled_sum += np.stack([np.bincount(labels, X[:, j], minlength=k) for j in range(X.shape[1])], axis=1)
+
+    n = stats.n.reindex(range(k), fill_value=0).to_numpy()
+    scaled_mean = scaled_sum / np.maximum(n, 1)[:, None]
+
+    return stats, scaled_mean, n
+
+
+def quality(folder, features, scaler, model, scaled_mean, n, df_sample, chunksize=None):
+    """Cluster quality table: silhouette on the sample, Davies-Bouldin and Calinski-Harabasz on every event"""
+
+    k = model.n_clusters
+    sum_dist = np.zeros(k)
+    sum_sqdist = np.zeros(k)
+    for chunk in feature_chunks(folder, features, chunksize):
+        X = scaler.transform(chunk[features].to_numpy(dtype=np.float64))
+        labels = model.predict(X)
+        sqdist = ((X - scaled_mean[labels]) ** 2).sum(axis=1)
+        sum_dist += np.bincount(labels, np.sqrt(sqdist), minlength=k)
+        sum_sqdist += np.bincount(labels, sqdist, minlength=k)
+
+    db, ch = clusterquality.indices(scaled_mean, n, sum_dist, sum_sqdist)
+
+    X_sample = scaler.transform(df_sample[features].dropna().to_numpy(dtype=np.float64))
+    table = clusterquality.quality(X_sample, model.predict(X_sample))
+    table['Silhouette method'] = table['Silhouette method'] + ' (stratified sample of ' + str(len(X_sample)) + \
+        ' of ' + str(int(n.sum())) + ' events)'
+    if 'Davies-Bouldin index' in table:
+        table['Davies-Bouldin index'] = db  # All events rather than sample
+        table['Calinski-Harabasz index'] = ch
+
+    return table
@@ -0,0 +1,122 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Function that handles exporting pairplots with a bounded cost for large cell populations
+
+Populations up to a cap (default 5000 events, ICLOTS_PAIRPLOT_CAP environment variable) are plotted with seaborn as before
+Larger populations are drawn either as a density pairplot (hexbin off-diagonals, precomputed histograms on the diagonal)
+or from a deterministic subsample, so export time does not grow with the number of cells
+
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+PAIRPLOT_CAP = int(os.environ.get('ICLOTS_PAIRPLOT_CAP', 5000))  # Max. events drawn as individual points
+
+
+def subsample(df, cap, hue=None):
+    """Return a deterministic subsample of at most about cap rows, stratified by hue so small groups stay visible"""
+
+    if len(df) <= cap:
+        return df
+
+    if hue is None:
+        return df.sample(n=cap, random_state=0).sort_index()
+
+    frac = cap / len(df)
+    parts = [group.sample(n=max(1, int(round(len(group) * frac))), random_state=0)
+             for name, group in df.groupby(hue, sort=False)]
+
+    return pd.concat(parts).sort_index()
+
+
+def densitypairplot(df, filename, hue=None, dpi=300, note=None):
+    """Save a pairplot of every numeric column, hexbin density off the diagonal and histograms on the diagonal
+
+    Cost scales with the number of bins rather than the number of events"""
+
+    numeric = [c for c in df.columns if c != hue and pd.api.types.is_numeric_dtype(df[c])]
+    n = len(numeric)
+
+    fig = Figure(figsize=(2.5 * n, 2.5 * n), dpi=dpi)
+    FigureCanvasAgg(fig)
+
+    values = {c: df[c].to_numpy(dtype=np.float64) for c in numeric}
+    finite = {c: values[c][np.isfinite(values[c])] for c in numeric}
+
+    for i, yname in enumerate(numeric):
+        for j, xname in enumerate(numeric):
+            ax = fig.add_subplot(n, n, i * n + j + 1)
+            if i == j:
+                # Histogram counted once with numpy, drawn as bars
+                if hue is None:
+                    counts, edges = np.histogram(finite[xname], bins=30)
+                    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color='tab:blue', alpha=0.8)
+                else:
+                    edges = np.histogram_bin_edges(finite[xname], bins=30)
+                    for k, (name, group) in enumerate(df.groupby(hue, sort=False)):
+                        counts, edges = np.histogram(group[xname].to_numpy(dtype=np.float64), bins=edges)
+                        ax.stairs(counts, edges, color='C' + str(k % 10), label=str(name))
+                ax.set_yticks([])  # Counts don't share the row's value axis
+            else:
+                keep = np.isfinite(values[xname]) & np.isfinite(values[yname])
+                ax.hexbin(values[xname][keep], values[yname][keep], gridsize=40, bins='log', mincnt=1,
+                          cmap='viridis')
+            # Labels only on outer edge, as seaborn does
+            if i == n - 1:
+                ax.set_xlabel(xname)
+            else:
+                ax.set_xticklabels([])
+            if j == 0:
+                ax.set_ylabel(yname)
+            elif i != j:
+                ax.set_yticklabels([])
+
+    rect = (0, 0, 1, 1)
+    if hue is not None and n > 0:
+        handles, labels = fig.axes[0].get_legend_handles_labels()
+        fig.legend(handles, labels, title=hue, loc='center right')
+        rect = (0, 0, 0.88, 1)  # Leave room for legend
+    if note is not None:
+        fig.suptitle(note)
+
+    fig.tight_layout(rect=rect)
+    fig.savefig(filename, dpi=dpi)
+
+
+def savepairplot(df, filename, hue=None, cap=None, mode='auto', dpi=300):
+    """Save a pairplot of a dataframe with a bounded cost
+
+    mode 'auto' plots populations larger than cap as a density pairplot, or from a subsample when colored by hue
+    mode 'density' or 'subsample' forces that approach for populations larger than cap"""
+
+    if cap is None:
+        cap = PAIRPLOT_CAP
+
+    if len(df) <= cap:  # Small population, seaborn pairplot of every event
+        sns.pairplot(df, hue=hue)
+        plt.savefig(filename, dpi=dpi)
+        plt.close('all')
+        return
+
+    if mode == 'auto':
+        mode = 'density' if hue is None else 'subsample'
+
+    if mode == 'density':
+        densitypairplot(df, filename, hue=hue, dpi=dpi,
+                        note='Density of all ' + str(len(df)) + ' events')
+    else:
+        df_sub = subsample(df, cap, hue=hue)
+        grid = sns.pairplot(df_sub, hue=hue)
+        grid.fig.suptitle(str(len(df_sub)) + ' of ' + str(len(df)) + ' events shown (fixed random subsample)',
+                          y=1.02)
+        plt.savefig(filename, dpi=dpi, bbox_inches='tight')
+        plt.close('all')
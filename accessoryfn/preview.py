@@ -0,0 +1,99 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions and classes that keep parameter-tuning previews interactive
+
+--Decoded images are kept in a small least-recently-used cache, so parameter changes don't re-read files
+--Preview detection can run on a downscaled proxy of large images (longest side above ICLOTS_PREVIEW_MAX pixels,
+default 2048), areas are scaled to match, final analysis always uses full resolution images
+--Detection results are cached by image and parameter values, so returning to a setting is immediate
+--Redraws are debounced: while a spinbox or scale is held, only the last value is drawn
+
+"""
+
+import os
+import collections
+import cv2
+
+PREVIEW_MAX = int(os.environ.get('ICLOTS_PREVIEW_MAX', 2048))  # Longest side of preview proxy (pixels)
+DELAY = 120  # Time input must settle before redrawing (ms)
+
+
+class LRU():
+    """Least-recently-used cache of a fixed number of values"""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self.values = collections.OrderedDict()
+
+    def get(self, key, function):
+        """Cached value for key, calculated with function() if not present"""
+
+        if key in self.values:
+            self.values.move_to_end(key)
+            return self.values[key]
+
+        value = function()
+        self.values[key] = value
+        while len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        self.values.clear()
+
+
+_images = LRU(8)  # Decoded images, shared by all preview windows
+
+
+def imread(filename):
+    """Read an image through the shared cache, the returned array is read-only as it may be shared"""
+
+    def read():
+        img = cv2.imread(filename)
+        if img is not None:
+            img.flags.writeable = False
+        return img
+
+    return _images.get((filename, os.path.getmtime(filename)), read)
+
+
+def proxy(img, maxdim=None):
+    """Downscaled copy of an image with longest side maxdim for preview detection, and the scale factor applied
+
+    Images already within maxdim are returned unchanged with a factor of 1"""
+
+    if maxdim is None:
+        maxdim = PREVIEW_MAX
+
+    height, width = img.shape[:2]
+    if max(height, width) <= maxdim:
+        return img, 1.
+
+    factor = maxdim / max(height, width)
+    small = cv2.resize(img, (int(width * factor), int(height * factor)), interpolation=cv2.INTER_AREA)
+
+    return small, factor
+
+
+class Debounce():
+    """Call function once input has settled, each new request restarts the wait and replaces the arguments"""
+
+    def __init__(self, widget, function, delay=DELAY):
+        self.widget = widget
+        self.function = function
+        self.delay = delay
+        self.pending = None
+
+    def __call__(self, *args):
+        if self.pending is not None:
+            self.widget.after_cancel(self.pending)
+        self.pending = self.widget.after(self.delay, self.run, *args)
+
+    def run(self, *args):
+        self.pending = None
+        if self.widget.winfo_exists():  # Window may have been closed while waiting
+            self.function(*args)
@@ -0,0 +1,103 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle a persistent cache of final analysis results
+
+Results (feature tables, summaries, graph descriptions and labeled images) are saved keyed by a hash of the input
+file contents, the region of interest and the full set of analysis parameters, so running an analysis again on the
+same files with the same parameters (e.g. after reopening them) returns the saved results instead of reanalyzing
+--File contents are hashed once per session for each file name, size and modification time
+--The cache is bounded in size (default 2048 MB, ICLOTS_RESULT_CACHE_MB environment variable, 0 turns it off),
+least recently used results are removed first
+
+"""
+
+import os
+import pickle
+import hashlib
+from accessoryfn import cachefolder
+
+MAX_MB = float(os.environ.get('ICLOTS_RESULT_CACHE_MB', 2048))  # Disk space used by saved results
+_RESULT_VERSION = '1'  # Increase if any analysis changes so stale cached results aren't reused
+_BLOCK = 1 << 20  # Bytes read at once when hashing
+
+_filehashes = {}  # File name, size, modification time: content hash, for this session
+
+
+def filehash(filename):
+    """Return a hex digest of a file's contents, or of every file in a folder (e.g. a folder of frames)"""
+
+    if os.path.isdir(filename):
+        digest = hashlib.sha1()
+        for name in sorted(os.listdir(filename)):
+            path = os.path.join(filename, name)
+            if os.path.isfile(path):
+                digest.update((name + '\n' + filehash(path) + '\n').encode())
+        return digest.hexdigest()
+
+    stat = os.stat(filename)
+    source = (os.path.abspath(filename), stat.st_size, stat.st_mtime_ns)
+    if source not in _filehashes:
+        digest = hashlib.sha1()
+        with open(filename, 'rb') as f:
+            for block in iter(lambda: f.read(_BLOCK), b''):
+                digest.update(block)
+        _filehashes[source] = digest.hexdigest()
+
+    return _filehashes[source]
+
+
+def key(app, filelist, params, roi=None):
+    """Return a hex digest identifying an analysis: application, input file contents, ROI (x, y, w, h), parameters
+
+    params is a dictionary of parameter names and values (numbers, strings, booleans or numpy arrays)"""
+
+    digest = hashlib.sha1()
+    digest.update((_RESULT_VERSION + '\n' + app + '\n').encode())
+    for filename in filelist:
+        digest.update((os.path.basename(filename) + '\n' + filehash(filename) + '\n').encode())  # Names label results
+    digest.update(pickle.dumps(None if roi is None else tuple(int(v) for v in roi), protocol=4))
+    digest.update(pickle.dumps(sorted(params.items()), protocol=4))
+
+    return digest.hexdigest()
+
+
+def _cachepath(key):
+    return os.path.join(cachefolder.cachefolder('results'), key + '.pkl')
+
+
+def load(key):
+    """Return saved results for a key, or None if there are none"""
+
+    if MAX_MB <= 0:
+        return None
+
+    path = _cachepath(key)
+    try:
+        with open(path, 'rb') as f:
+            results = pickle.load(f)
+        os.utime(path)  # Mark as recently used
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+        return None  # Missing, partial or from an incompatible version, analyze again
+
+    return results
+
+
+def save(key, results):
+    """Save results (any picklable object) for a key, then remove least recently used results over the size limit"""
+
+    if MAX_MB <= 0:
+        return
+
+    try:
+        # Write to a temporary name first so an interrupted save never leaves partial results
+        path = _cachepath(key)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(results, f, protocol=4)
+        os.replace(path + '.tmp', path)
+        cachefolder.evict('results', MAX_MB)
+    except (OSError, pickle.PicklingError):  # Cache is an optimization only
+        pass
+
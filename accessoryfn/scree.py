@@ -0,0 +1,114 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of functions that handle calculating a scree (elbow) plot for choosing a number of clusters
+
+--Features are standardized (mean 0, standard deviation 1) so no feature dominates because of its units,
+matching the clustering step
+--Large datasets are fit on a subsample stratified by sample (default 100000 events, ICLOTS_SCREE_CAP environment
+variable), SSE is scaled to the full number of events
+--Each number of clusters is fit in its own process, results are reported as they finish
+--Optionally each number of clusters starts from the previous centroids plus the event furthest from them
+(warm start), fit in order, a single initialization is needed per fit
+--Mini-batch k-means can be used instead of k-means for very large inputs
+
+"""
+
+import os
+import concurrent.futures
+import numpy as np
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances_argmin_min
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+from accessoryfn import pairplots
+
+SCREE_CAP = int(os.environ.get('ICLOTS_SCREE_CAP', 100000))  # Max. events fit per number of clusters
+KS = list(range(1, 12))  # Range of 1 to 11 clusters
+METHODS = ['K-means', 'Mini-batch k-means']
+
+
+def prepare(df, features, cap=None, strata='Sample'):
+    """Standardized feature array for fitting, subsampled by strata above cap events
+
+    Returns the array and the number of events it represents"""
+
+    if cap is None:
+        cap = SCREE_CAP
+
+    df = df.dropna(subset=features)
+    scaler = StandardScaler().fit(df[features])  # Fit on all events
+    df_sub = pairplots.subsample(df, cap, hue=strata if strata in df.columns else None)
+
+    return scaler.transform(df_sub[features]), len(df)
+
+
+def estimator(k, method, init='k-means++', seed=100):
+    """Unfitted clustering model for k clusters, init may be an array of starting centroids"""
+
+    n_init = 1 if not isinstance(init, str) else 10
+    if method == 'Mini-batch k-means':
+        return MiniBatchKMeans(n_clusters=k, init=init, n_init=min(n_init, 3), batch_size=4096, random_state=seed)
+    else:
+        return KMeans(n_clusters=k, init=init, n_init=n_init, max_iter=1000, random_state=seed)
+
+
+def grow(X, centers):
+    """Starting centroids for one more cluster: previous centroids plus the event furthest from them"""
+
+    index, distance = pairwise_distances_argmin_min(X, centers)
+
+    return np.vstack((centers, X[np.argmax(distance)]))
+
+
+def fit_k(X, k, method, init='k-means++'):
+    """Fit k clusters, returns k, SSE (inertia) and centroids"""
+
+    with threadpool_limits(limits=1):  # One core per fit, fits run side by side
+        model = estimator(k, method, init=init).fit(X)
+
+    return k, model.inertia_, model.cluster_centers_
+
+
+def fit_chain(X, ks, method):
+    """Fit each number of clusters in order, each warm-started from the last, yields (k, SSE) as each finishes"""
+
+    centers = None
+    for k in ks:
+        if centers is not None and len(centers) == k - 1:
+            init = grow(X, centers)
+        else:
+            init = 'k-means++'
+        model = estimator(k, method, init=init).fit(X)  # All cores for each fit, fits are in order
+        centers = model.cluster_centers_
+        yield k, model.inertia_
+
+
+def scree(X, n_total, ks=None, method='K-means', warm_start=False, report=None, workers=None):
+    """SSE for each number of clusters, as a dictionary
+
+    report(k, sse) is called from this thread as each fit finishes, SSE is scaled to n_total events"""
+
+    if ks is None:
+        ks = KS
+    factor = n_total / max(len(X), 1)
+    sse = {}
+
+    if warm_start:
+        for k, inertia in fit_chain(X, ks, method):
+            sse[k] = inertia * factor
+            if report is not None:
+                report(k, sse[k])
+        return sse
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(fit_k, X, k, method) for k in ks]
+        for future in concurrent.futures.as_completed(futures):
+            k, inertia, centers = future.result()
+            sse[k] = inertia * factor
+            if report is not None:
+                report(k, sse[k])
+
+    return sse
@@ -0,0 +1,31 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Class that handles keeping the intermediate results of an analysis split into stages (e.g. locate, link, filter)
+
+Each stage's latest result is kept with a key describing everything it depends on (its parameters and the
+key of the stage before it), so rerunning an analysis after changing only later parameters (e.g. linking)
+starts from the first stage whose inputs changed
+Stage functions must not modify their inputs, cached results are passed to later stages as they are
+
+"""
+
+
+class StageCache():
+    """Latest result of each named stage, reused while the stage's key is unchanged"""
+
+    def __init__(self):
+        self.results = {}  # Stage name: (key, result)
+
+    def run(self, name, key, function, *args):
+        """Return function(*args), or the saved result if the stage last ran with the same key"""
+
+        if name in self.results and self.results[name][0] == key:
+            return self.results[name][1]
+
+        result = function(*args)
+        self.results[name] = (key, result)
+
+        return result
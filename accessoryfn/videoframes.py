@@ -0,0 +1,261 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Seek-based video frame provider, decodes only the frames that are requested rather than the whole video
+Frame stacks (raw .npy and multipage TIFF, see accessoryfn/videowriters.py) and folders of images (one image per frame)
+are read through the same interface, so any of them can be analyzed without first converting to a video
+A .npy stack is memory-mapped so frames are read from disk without decoding,
+images in a folder are read ahead in parallel while frames are used in order
+
+Frames are located with the OpenCV capture position (CAP_PROP_POS_FRAMES), which seeks to the nearest
+keyframe and decodes forward to the requested frame
+Requests a short distance ahead of the current position are reached by grabbing frames without conversion,
+and a small cache keeps recently shown frames so scrubbing back and forth doesn't decode them again
+
+"""
+
+import os
+import glob
+import collections
+import concurrent.futures
+import cv2
+import numpy as np
+from PIL import Image
+
+_SKIP_AHEAD = 16  # Frames grabbed forward rather than seeking
+_CACHE_SIZE = 32  # Recently requested frames kept
+STACK_FPS = 10  # Frame rate written when editing stacks and image folders, which don't record one
+
+
+class VideoFrames():
+    """Indexable frames of a video file, frames[i] decodes frame i on demand (BGR)"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.capture = cv2.VideoCapture(filename)
+        self.n_frames = int(self.capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.width = int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        self.pos = 0  # Index of the next frame read() would return
+        self.cache = collections.OrderedDict()
+
+    def __len__(self):
+        return self.n_frames
+
+    def __iter__(self):
+        return self.iter_range(0, self.n_frames)
+
+    def seek(self, i):
+        """Move the capture so the next read returns frame i"""
+
+        if i == self.pos:
+            return
+        if self.pos < i <= self.pos + _SKIP_AHEAD:  # Close ahead, cheaper to step than to seek
+            while self.pos < i and self.capture.grab():
+                self.pos += 1
+        else:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, i)
+            self.pos = int(self.capture.get(cv2.CAP_PROP_POS_FRAMES))
+            if self.pos > i:  # Backend could not land on the frame, fall back to stepping from the start
+                self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self.pos = 0
+            while self.pos < i and self.capture.grab():
+                self.pos += 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n_frames
+        if i in self.cache:
+            self.cache.move_to_end(i)
+            return self.cache[i]
+
+        self.seek(i)
+        ret, frame = self.capture.read()
+        if not ret:
+            raise IndexError('Frame ' + str(i) + ' could not be read from ' + str(self.filename))
+        self.pos += 1
+
+        self.cache[i] = frame
+        while len(self.cache) > _CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+        return frame
+
+    def iter_range(self, start, end):
+        """Yield frames start to end - 1 in order, seeking once to start"""
+
+        self.seek(start)
+        i = start
+        while i < end:
+            ret, frame = self.capture.read()
+            if not ret:
+                break
+            self.pos += 1
+            yield frame
+            i += 1
+
+    def release(self):
+        self.capture.release()
+        self.cache.clear()
+
+
+class StackFrames():
+    """Frames of a raw .npy stack (frame, height, width[, color]), memory-mapped"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.stack = np.load(filename, mmap_mode='r')
+        self.n_frames = self.stack.shape[0]
+        self.fps = 0  # Not recorded in stack
+        self.height, self.width = self.stack.shape[1:3]
+
+    def __len__(self):
+        return self.n_frames
+
+    def __iter__(self):
+        return self.iter_range(0, self.n_frames)
+
+    def __getitem__(self, i):
+        frame = np.asarray(self.stack[i])
+        if frame.ndim == 2:  # Grayscale stack, match video frames
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        return frame
+
+    def iter_range(self, start, end):
+        for i in range(max(start, 0), min(end, self.n_frames)):
+            yield self[i]
+
+    def release(self):
+        self.stack = None
+
+
+class TiffFrames():
+    """Frames of a multipage TIFF, one page per frame, returned as BGR"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.image = Image.open(filename)
+        self.n_frames = getattr(self.image, 'n_frames', 1)
+        self.fps = 0  # Not recorded in stack
+        self.width, self.height = self.image.size
+
+    def __len__(self):
+        return self.n_frames
+
+    def __iter__(self):
+        return self.iter_range(0, self.n_frames)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n_frames
+        if not 0 <= i < self.n_frames:
+            raise IndexError('Frame ' + str(i) + ' is not in ' + str(self.filename))
+        self.image.seek(i)
+        frame = np.array(self.image.convert('RGB'))
+        return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)  # Match layers to OpenCV convention
+
+    def iter_range(self, start, end):
+        for i in range(max(start, 0), min(end, self.n_frames)):
+            yield self[i]
+
+    def release(self):
+        self.image.close()
+
+
+class FolderFrames():
+    """Frames from a sorted list of image files, one image per frame, returned as BGR
+
+    Reading in order uses a pool of threads to load the next images while the current one is used"""
+
+    def __init__(self, filelist):
+        self.filelist = list(filelist)
+        self.filename = os.path.dirname(self.filelist[0]) if len(self.filelist) > 0 else ''
+        self.n_frames = len(self.filelist)
+        self.fps = 0  # Not recorded in images
+
+        self.workers = os.cpu_count() or 1
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
+        self.cache = collections.OrderedDict()
+
+        first = self[0]
+        self.height, self.width = first.shape[:2]
+
+    def __len__(self):
+        return self.n_frames
+
+    def __iter__(self):
+        return self.iter_range(0, self.n_frames)
+
+    def _read(self, i):
+        frame = cv2.imread(self.filelist[i])
+        if frame is None:
+            raise IOError('Could not read ' + self.filelist[i])
+        return frame
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n_frames
+        if not 0 <= i < self.n_frames:
+            raise IndexError('Frame ' + str(i) + ' is not in ' + str(self.filename))
+        if i in self.cache:
+            self.cache.move_to_end(i)
+            return self.cache[i]
+
+        frame = self._read(i)
+        self.cache[i] = frame
+        while len(self.cache) > _CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+        return frame
+
+    def iter_range(self, start, end):
+        """Yield frames start to end - 1 in order, the next images are read in parallel"""
+
+        indices = iter(range(max(start, 0), min(end, self.n_frames)))
+        ahead = collections.deque()
+        for i in indices:  # Fill read-ahead window
+            ahead.append(self.pool.submit(self._read, i))
+            if len(ahead) >= 2 * self.workers:
+                break
+        while len(ahead) > 0:
+            frame = ahead.popleft().result()
+            i = next(indices, None)
+            if i is not None:
+                ahead.append(self.pool.submit(self._read, i))
+            yield frame
+
+    def release(self):
+        self.pool.shutdown(wait=False)
+        self.cache.clear()
+
+
+def imagefiles(dirname):
+    """Sorted image files (.png, .jpg, .tif) in a folder"""
+
+    filelist = []
+    for ext in ('*.png', '*.jpg', '*.tif'):
+        filelist += sorted(glob.glob(os.path.join(dirname, ext)))
+
+    return filelist
+
+
+def openframes(filename):
+    """Open a video (.avi), frame stack (.npy, multipage .tif) or folder of images with the matching reader"""
+
+    if os.path.isdir(filename):
+        filelist = imagefiles(filename)
+        if len(filelist) == 0:
+            raise IOError('No images (.png, .jpg, .tif) found in ' + str(filename))
+        return FolderFrames(filelist)
+
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.npy':
+        return StackFrames(filename)
+    elif ext in ('.tif', '.tiff'):
+        return TiffFrames(filename)
+    else:
+        return VideoFrames(filename)
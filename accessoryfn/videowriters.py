@@ -0,0 +1,117 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Series of classes that handle writing frames to a video file or frame stack, chosen by output format
+
+Output formats:
+--XVID AVI: small files, lossy (previous iCLOTS default)
+--FFV1 AVI (lossless): pixel values unchanged, recommended before tracking or intensity measurements
+--MJPEG AVI: high-quality frame-by-frame compression, fast to decode
+--Raw stack (.npy): uncompressed uint8 array (frame, height, width, color), memory-mapped on reading, no decoding
+--Multipage TIFF: uncompressed, one page per frame, readable by ImageJ/FIJI
+
+All writers take BGR frames (OpenCV convention) through write(frame) and are finished with release()
+Stacks written here can be opened by the analysis applications (see accessoryfn/videoframes.py)
+
+"""
+
+import cv2
+import numpy as np
+from PIL import Image, TiffImagePlugin
+
+FORMATS = ['XVID AVI', 'FFV1 AVI (lossless)', 'MJPEG AVI', 'Raw stack (.npy)', 'Multipage TIFF']
+DEFAULT = FORMATS[0]
+
+_FOURCC = {'XVID AVI': 'XVID', 'FFV1 AVI (lossless)': 'FFV1', 'MJPEG AVI': 'MJPG'}
+_NPY_HEADER = 256  # Bytes reserved for .npy header, frame count is only known once writing finishes
+
+
+def extension(fmt):
+    """File extension written by an output format"""
+
+    if fmt == 'Raw stack (.npy)':
+        return '.npy'
+    elif fmt == 'Multipage TIFF':
+        return '.tif'
+    else:
+        return '.avi'
+
+
+class AviWriter():
+    """OpenCV video writer with a chosen codec"""
+
+    def __init__(self, filename, fourcc, fps, size):
+        self.filename = filename
+        self.out = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self.out.isOpened():
+            raise IOError(fourcc + ' video could not be written, codec may be unavailable')
+
+    def write(self, frame):
+        self.out.write(frame)
+
+    def release(self):
+        self.out.release()
+
+
+class NpyStackWriter():
+    """Raw uint8 frames appended to a .npy file, header written with final frame count on release"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'wb')
+        self.file.write(b'\x00' * _NPY_HEADER)  # Placeholder
+        self.shape = None
+        self.count = 0
+
+    def write(self, frame):
+        if self.shape is None:
+            self.shape = frame.shape
+        elif frame.shape != self.shape:
+            raise ValueError('All frames in a stack must have the same dimensions')
+        self.file.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        self.count += 1
+
+    def release(self):
+        shape = (self.count,) + (self.shape if self.shape is not None else (0, 0, 3))
+        header = "{'descr': '|u1', 'fortran_order': False, 'shape': %s, }" % repr(shape)
+        header = header.ljust(_NPY_HEADER - 10 - 1) + '\n'  # Padded with spaces, as numpy does
+        self.file.seek(0)
+        self.file.write(b'\x93NUMPY\x01\x00' + np.uint16(len(header)).tobytes() + header.encode('latin1'))
+        self.file.close()
+
+
+class TiffStackWriter():
+    """Uncompressed multipage TIFF, one page appended per frame"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'w+b')
+        self.tiff = TiffImagePlugin.AppendingTiffWriter(self.file, True)
+
+    def write(self, frame):
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)  # Match layers to pillow convention
+        Image.fromarray(frame).save(self.tiff, format='TIFF')
+        self.tiff.newFrame()
+
+    def release(self):
+        self.tiff.close()
+        self.file.close()
+
+
+def open_writer(basename, fps, size, fmt=DEFAULT):
+    """Open a writer for frames of dimensions size (width, height), basename is the output path without extension"""
+
+    filename = basename + extension(fmt)
+
+    if fmt in _FOURCC:
+        return AviWriter(filename, _FOURCC[fmt], fps, size)
+    elif fmt == 'Raw stack (.npy)':
+        return NpyStackWriter(filename)
+    elif fmt == 'Multipage TIFF':
+        return TiffStackWriter(filename)
+    else:
+        raise ValueError('Unknown output format: ' + str(fmt))
+
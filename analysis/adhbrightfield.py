@@ -16,10 +16,10 @@ import numpy as np
 import pandas as pd
 from math import pi
 import trackpy as tp
-import matplotlib.pyplot as plt
-import seaborn as sns
 import datetime
 import shutil
+import concurrent.futures
+from accessoryfn import graphrender, pairplots, resultcache
 
 class RunAdhBrightfieldAnalysis():
 
@@ -30,32 +30,40 @@ class RunAdhBrightfieldAnalysis():
         """Function runs final analysis based on the parameters chosen in GUI"""
 
         # Global variables for use with additional export functions within class
-        global df_img, df_summary, df_all, total_area
+        global df_img, df_summary, df_all, total_area, graphset
+
+        # Return saved results if these files were already analyzed with these parameters
+        cachekey = resultcache.key('adhbrightfield', filelist, {'umpix': umpix, 'maxdiameter': maxdiameter,
+                                                                'minintensity': minintensity, 'invert': invert})
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            df_img, df_summary, df_all, total_area, graphset = cached
+            GraphTopLevel(df_img)
+            return
 
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
 
         df_all = pd.DataFrame()  # For all events, good for plotting
         df_summary = pd.DataFrame()  # For descriptive statistics
-        df_img = pd.DataFrame(columns=['name', 'img', 'graph'])  # For images, graphs
+        df_img = pd.DataFrame(columns=['name', 'img', 'graph'])  # For images, graph names
+        graphset = graphrender.DeferredGraphs()  # Graphs, rendered on request
+
+        # Locate particles (ideally, cells) in each image using Trackpy, images spread across available cores
+        # See walkthrough: http://soft-matter.github.io/trackpy/dev/tutorial/walkthrough.html
+        # Each image is decoded once, in a worker, and returned with its features for labeling
+        f_byimg = located(filelist, self.maxdiameter.get(), self.minintensity.get(), self.invert.get())
 
         # For each image
         total_area = 0  # For calculating final density measurement
-        for imgname in filelist:
+        df_all_list = []  # Per-image dataframes, merged once at the end
+        for imgname, (f, img) in zip(filelist, f_byimg):
 
-            # Read image
-            img = cv2.imread(imgname)
-            img_gray = cv2.imread(imgname, 0)
             imgbasename = os.path.basename(imgname.split(".")[0])
 
             # Convert area of image (one layer) to mm2
-            img_size = img_gray.size * float(self.umpix.get()) * float(self.umpix.get()) / 1E6
+            img_size = img.shape[0] * img.shape[1] * float(self.umpix.get()) * float(self.umpix.get()) / 1E6
             total_area += img_size  # Record total area of all images for final density calculation
 
-            # Locate particles (ideally, cells) using Trackpy
-            # See walkthrough: http://soft-matter.github.io/trackpy/dev/tutorial/walkthrough.html
-            f = tp.locate(img_gray, self.maxdiameter.get(), minmass=self.minintensity.get(),
-                          invert=self.invert.get())
-
             # Add index to resultant dataframe
             index = range(len(f))
             f.insert(0, 'Index', index)
@@ -85,39 +93,21 @@ class RunAdhBrightfieldAnalysis():
                     color=(255, 0, 0),
                     thickness=1)
 
-            # Graph for display
-            graphs = plt.figure(figsize=(4, 4), dpi=80)
-            graphs.suptitle(imgbasename, fontweight='bold')
-
+            # Graph for display, described here and only drawn when viewed or exported
+            panels = []
             # If cells exist within the image
             if len(f) != 0:
-                # Subplot 211 (area hist)
-                plt.subplot(2, 1, 1)
-                plt.hist(f[u'Area (\u03bcm\u00b2)'], rwidth=0.8, color='orangered')
-                plt.xlabel(u'Area (\u03bcm\u00b2)')
-                plt.ylabel('n')
-                # Subplot 212 (circularity hist)
-                plt.subplot(2, 1, 2)
-                plt.hist(f['Circularity (a.u.)'], rwidth=0.8, color='orangered')
-                plt.xlabel('Circularity (a.u.)')
-                plt.ylabel('n')
-
-                plt.tight_layout()
-
-            # Prepare for saving to be later referenced in graph window and in exports
-            graphs.canvas.draw()
-            graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-            graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
-
-            plt.close()
+                panels = [graphrender.histpanel(1, f[u'Area (\u03bcm\u00b2)'], u'Area (\u03bcm\u00b2)'),  # Area hist
+                          graphrender.histpanel(2, f['Circularity (a.u.)'], 'Circularity (a.u.)')]  # Circularity hist
+            graphset.add(imgbasename, graphrender.graphspec(imgbasename, panels, figsize=(4, 4)))
 
             # Save images to special dataframe
             df_img = df_img.append({'name': imgbasename, 'img orig': [img],
-                                    'graph': [graphimg]}, ignore_index=True)
+                                    'graph': imgbasename}, ignore_index=True)
 
-            # Append individual image dataframe to larger dataframe
+            # Keep individual image dataframe for larger dataframe
             f.insert(0, 'Image', imgbasename)
-            df_all = df_all.append(f, ignore_index=True)
+            df_all_list.append(f)
 
             # Append summary data
             df_image = descriptive_statistics(f, img_size)
@@ -126,7 +116,12 @@ class RunAdhBrightfieldAnalysis():
 
             # Clear image variables
             img = None
-            img_gray = None
+
+        # Merge individual image dataframes into larger dataframe
+        if len(df_all_list) > 0:
+            df_all = pd.concat(df_all_list, ignore_index=True)
+
+        resultcache.save(cachekey, (df_img, df_summary, df_all, total_area, graphset))
 
         GraphTopLevel(df_img)  # Raise graph window
 
@@ -195,12 +190,12 @@ class RunAdhBrightfieldAnalysis():
         os.mkdir(graph_folder)
         os.chdir(graph_folder)
 
+        # Render any graphs not yet viewed in parallel, then write cached PNGs
+        graphset.renderall()
         for i in range(len(df_img)):
-            # Convert image to BGR
-            array = cv2.cvtColor(df_img['graph'].iloc[i][0], cv2.COLOR_RGB2BGR)
-            cv2.imwrite(df_img['name'].iloc[i] + '_graph.png', array)
+            graphset.save(df_img['graph'].iloc[i], df_img['name'].iloc[i] + '_graph.png')
 
-            unique_names = df_all.Image.unique()
+        unique_names = df_all.Image.unique()
 
         for un in unique_names:
             # Find all rows corresponding to unique name
@@ -208,23 +203,16 @@ class RunAdhBrightfieldAnalysis():
 
             # Create pairplots (with and without functional stain intensity data)
             # One color
-            pp = plt.figure(figsize=(4, 4), dpi=300)
             byname_subset = byname_df[['Image', u'Area (\u03bcm\u00b2)', 'Circularity (a.u.)']]
-            sns.pairplot(byname_subset)
-            plt.savefig(un + '_pairplot.png', dpi=300)
-            plt.close()
+            pairplots.savepairplot(byname_subset, un + '_pairplot.png')
 
         # All-image pairplots
         # One color
         df_all_subset = df_all[['Image', u'Area (\u03bcm\u00b2)', 'Circularity (a.u.)']]
-        sns.pairplot(df_all_subset)
-        plt.savefig('All-data_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_all_subset, 'All-data_pairplot.png')
 
         # One color per image
-        sns.pairplot(df_all_subset, hue='Image')
-        plt.savefig('All-data_multicolor_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_all_subset, 'All-data_multicolor_pairplot.png', hue='Image')
 
     def expimgs(self):
         """Export image data (.png image) with processing and labeling applied"""
@@ -298,7 +286,7 @@ class GraphTopLevel(tk.Toplevel):
         """Display graphs in toplevel window immediately after analysis is run"""
         # Add image name to image name label
         self.name_label.config(text=df_img['name'].iloc[idx])
-        graphimg = np.asarray(df_img['graph'].iloc[idx][0]).astype('uint8')
+        graphimg = graphset.getrgb(df_img['graph'].iloc[idx])  # Drawn now if not viewed before
         graphimgr_tk = ImageTk.PhotoImage(image=Image.fromarray(graphimg))
         self.graphimgr_tk = graphimgr_tk  # Some fix?
         self.img_canvas.create_image(0, 0, anchor='nw', image=graphimgr_tk)
@@ -308,6 +296,32 @@ class GraphTopLevel(tk.Toplevel):
 
         self.displaygraph(idx=(self.img_scale.get() - 1))
 
+def locate_image(imgname, maxdiameter, minintensity, invert):
+    """Locate particles (ideally, cells) in one image file, returns the features and the decoded (BGR) image"""
+
+    img = cv2.imread(imgname)
+    img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    tp.quiet()
+    f = tp.locate(img_gray, maxdiameter, minmass=minintensity, invert=invert)
+
+    return f.reset_index(drop=True), img
+
+
+def located(filelist, maxdiameter, minintensity, invert, workers=None):
+    """Yield (features, image) for each image of a list, in file order, using a process pool for several images"""
+
+    workers = workers or os.cpu_count() or 1
+    if len(filelist) <= 1 or workers == 1:  # Not worth starting a pool
+        for imgname in filelist:
+            yield locate_image(imgname, maxdiameter, minintensity, invert)
+        return
+
+    n = len(filelist)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(locate_image, filelist, [maxdiameter] * n, [minintensity] * n, [invert] * n)
+
+
 def descriptive_statistics(df_input, img_size):
     """Function to calculate descriptive statistics for each population, represented as a dataframe"""
 
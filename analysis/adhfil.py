@@ -19,10 +19,9 @@ import pandas as pd
 from skimage import measure # Region analysis
 from skimage.feature import corner_harris, corner_peaks  # Corner finding/filopodia counting
 import math
-import matplotlib.pyplot as plt
-import seaborn as sns
 import datetime
 import shutil
+from accessoryfn import graphrender, pairplots, resultcache
 
 class RunAdhFilAnalysis():
 
@@ -35,7 +34,17 @@ class RunAdhFilAnalysis():
         """Function runs final analysis based on the parameters chosen in GUI"""
 
         # Global variables for use with additional export functions within class
-        global df_img, df_summary, df_all, total_area
+        global df_img, df_summary, df_all, total_area, graphset
+
+        # Return saved results if these files were already analyzed with these parameters
+        cachekey = resultcache.key('adhfil', filelist, {'umpix': umpix, 'minarea': minarea, 'maxarea': maxarea,
+                                                        'mainthresh': mainthresh, 'k': k, 'tr': tr,
+                                                        'min_distance': min_distance, 'ps': ps})
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            df_img, df_summary, df_all, total_area, graphset = cached
+            GraphTopLevel(df_img)
+            return
 
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
         top, bottom, left, right = [10] * 4  # Used for creating border around individual cell images
@@ -43,6 +52,7 @@ class RunAdhFilAnalysis():
         df_all = pd.DataFrame()  # For all events, good for plotting
         df_summary = pd.DataFrame()  # For descriptive statistics
         df_img = pd.DataFrame(columns=['name', 'img', 'graph'])
+        graphset = graphrender.DeferredGraphs()  # Graphs, rendered on request
 
         # For each image
         total_area = 0  # For calculating final density measurement
@@ -200,38 +210,18 @@ class RunAdhFilAnalysis():
                             thickness=1)
 
 
-            # Graph for display
-            graphs = plt.figure(figsize=(4, 4), dpi=80)
-            graphs.suptitle(imgbasename, fontweight='bold')
-
+            # Graph for display, described here and only drawn when viewed or exported
+            panels = []
             # If cells exist within the image
             if len(p_df_filt) != 0:
-
-                # Subplot 211 (n filopodia histogram)
-                plt.subplot(2, 1, 1)
-                plt.hist(p_df_filt['Filopodia (n)'], rwidth=0.8, color='orangered')
-                plt.xlabel('Filopodia per cell (n)')
-                plt.ylabel('n')
-                # Subplot 212 (circularity hist)
-                plt.subplot(2, 1, 2)
-                plt.hist(p_df_filt['Mean filopodia length (\u03bcm)'], rwidth=0.8, color='orangered')
-                plt.xlabel('Mean filopodia length (\u03bcm)')
-                plt.ylabel('n')
-
-                plt.tight_layout()
-
-            graphs.canvas.draw()
-            graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-            graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
-
-            plt.close()
-
-
-
+                panels = [graphrender.histpanel(1, p_df_filt['Filopodia (n)'], 'Filopodia per cell (n)'),
+                          graphrender.histpanel(2, p_df_filt['Mean filopodia length (\u03bcm)'],
+                                                'Mean filopodia length (\u03bcm)')]
+            graphset.add(imgbasename, graphrender.graphspec(imgbasename, panels, figsize=(4, 4)))
 
             # Save images to special dataframe
             df_img = df_img.append({'name': imgbasename, 'img orig': [img_tolabel], 'img thresh': [t_tolabel],
-                                    'graph': [graphimg]}, ignore_index=True)
+                                    'graph': imgbasename}, ignore_index=True)
 
             # Append individual image dataframe to larger dataframe
             df_all = df_all.append(p_df_filt, ignore_index=True)
@@ -251,8 +241,8 @@ class RunAdhFilAnalysis():
             p_df_filt = None
             img_tolabel = None
             t_tolabel = None
-            graphimg = None
 
+        resultcache.save(cachekey, (df_img, df_summary, df_all, total_area, graphset))
 
         # Raise toplevel to show graphs
         GraphTopLevel(df_img)
@@ -327,13 +317,12 @@ class RunAdhFilAnalysis():
         os.mkdir(graph_folder)
         os.chdir(graph_folder)
 
+        # Render any graphs not yet viewed in parallel, then write cached PNGs
+        graphset.renderall()
         for i in range(len(df_img)):
+            graphset.save(df_img['graph'].iloc[i], df_img['name'].iloc[i] + '_graph.png')
 
-            # Convert image to BGR
-            array = cv2.cvtColor(df_img['graph'].iloc[i][0], cv2.COLOR_RGB2BGR)
-            cv2.imwrite(df_img['name'].iloc[i] + '_graph.png', array)
-
-            unique_names = df_all.Image.unique()
+        unique_names = df_all.Image.unique()
 
             # summary_df = pd.DataFrame()
         for un in unique_names:
@@ -343,14 +332,11 @@ class RunAdhFilAnalysis():
 
             # Create pairplots (with and without functional stain intensity data)
             # One color
-            pp = plt.figure(figsize=(6, 6), dpi=300)
             byname_subset = byname_df[[u'Area (\u03bcm\u00b2)',
                                'Circularity (a.u.)', 'Texture (a.u.)', 'Filopodia (n)', 'Min. filopodia length (\u03bcm)',
                                'Mean filopodia length (\u03bcm)', 'Max. filopodia length (\u03bcm)',
                                'Stdev. filopodia length (\u03bcm)']]
-            sns.pairplot(byname_subset)
-            plt.savefig(un + '_pairplot.png', dpi=300)
-            plt.close()
+            pairplots.savepairplot(byname_subset, un + '_pairplot.png')
 
         # all image pairplots
         # Create pairplots (with and without functional stain intensity data)
@@ -359,14 +345,10 @@ class RunAdhFilAnalysis():
                            'Circularity (a.u.)', 'Texture (a.u.)', 'Filopodia (n)', 'Min. filopodia length (\u03bcm)',
                            'Mean filopodia length (\u03bcm)', 'Max. filopodia length (\u03bcm)',
                            'Stdev. filopodia length (\u03bcm)']]
-        sns.pairplot(df_all_subset)
-        plt.savefig('All-data_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_all_subset, 'All-data_pairplot.png')
 
         # One color per image
-        sns.pairplot(df_all_subset, hue='Image')
-        plt.savefig('All-data_multicolor_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_all_subset, 'All-data_multicolor_pairplot.png', hue='Image')
 
 
     def expimgs(self):
@@ -446,7 +428,7 @@ class GraphTopLevel(tk.Toplevel):
 
         # Add image name to image name label
         self.name_label.config(text=df_img['name'].iloc[idx])
-        graphimg = np.asarray(df_img['graph'].iloc[idx][0]).astype('uint8')
+        graphimg = graphset.getrgb(df_img['graph'].iloc[idx])  # Drawn now if not viewed before
         graphimgr_tk = ImageTk.PhotoImage(image=Image.fromarray(graphimg))
         self.graphimgr_tk = graphimgr_tk  # Some fix?
         self.img_canvas.create_image(0, 0, anchor='nw', image=graphimgr_tk)
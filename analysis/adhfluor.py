@@ -18,10 +18,9 @@ import numpy as np
 import pandas as pd
 from skimage import measure, img_as_float  # Region analysis
 from skimage.feature import peak_local_max
-import matplotlib.pyplot as plt
-import seaborn as sns
 import datetime
 import shutil
+from accessoryfn import graphrender, pairplots, resultcache
 
 class RunAdhFluorAnalysis():
 
@@ -34,13 +33,24 @@ class RunAdhFluorAnalysis():
         """Function runs final analysis based on the parameters chosen in GUI"""
 
         # Global variables for use with additional export functions within class
-        global df_img, df_summary, df_all, total_area
+        global df_img, df_summary, df_all, total_area, graphset
+
+        # Return saved results if these files were already analyzed with these parameters
+        cachekey = resultcache.key('adhfluor', filelist, {'umpix': umpix, 'minarea': minarea, 'maxarea': maxarea,
+                                                          'mainthresh': mainthresh, 'fnthresh': fnthresh,
+                                                          'ps': ps, 'fs': fs})
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            df_img, df_summary, df_all, total_area, graphset = cached
+            GraphTopLevel(df_img)
+            return
 
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
 
         df_all = pd.DataFrame()  # For all events, good for plotting
         df_summary = pd.DataFrame()  # For descriptive statistics
         df_img = pd.DataFrame(columns=['name', 'img', 'graph'])
+        graphset = graphrender.DeferredGraphs()  # Graphs, rendered on request
 
         # For each image
         total_area = 0  # For calculating final density measurement
@@ -169,42 +179,20 @@ class RunAdhFluorAnalysis():
                             thickness=1)
 
 
-            # Graph for display
-            graphs = plt.figure(figsize=(6, 4), dpi=80)
-            graphs.suptitle(imgbasename, fontweight='bold')
-
+            # Graph for display, described here and only drawn when viewed or exported
+            panels = []
             # If cells exist within the image
             if len(p_df_filt) != 0:
-                # Subplot 311 (area hist)
-                plt.subplot(2, 3, (1, 2))
-                plt.hist(p_df_filt[u'Area (\u03bcm\u00b2)'], rwidth=0.8, color='orangered')
-                plt.xlabel(u'Area (\u03bcm\u00b2)')
-                plt.ylabel('n')
-                # Subplot 312 (eccentricity hist)
-                plt.subplot(2, 3, (4, 5))
-                plt.hist(p_df_filt['Circularity (a.u.)'], rwidth=0.8, color='orangered')
-                plt.xlabel('Circularity (a.u.)')
-                plt.ylabel('n')
-                # Subplot 313 (colocalization pie)
-                plt.subplot(2, 3, (3, 6))
                 perpos = np.sum(p_df_filt['Signal (binary)'])/len(p_df_filt)
-                labels = ['Positive', 'Negative']
-                colors = ['orangered', 'orange']
-                sizes = [perpos, 1-perpos]
-                plt.title('Functional staining')
-                plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%')
-
-                plt.tight_layout()
-
-            graphs.canvas.draw()
-            graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-            graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
-
-            plt.close()
+                panels = [graphrender.histpanel((1, 2), p_df_filt[u'Area (\u03bcm\u00b2)'], u'Area (\u03bcm\u00b2)'),
+                          graphrender.histpanel((4, 5), p_df_filt['Circularity (a.u.)'], 'Circularity (a.u.)'),
+                          graphrender.piepanel((3, 6), [perpos, 1-perpos], ['Positive', 'Negative'],
+                                               ['orangered', 'orange'], 'Functional staining')]  # Colocalization pie
+            graphset.add(imgbasename, graphrender.graphspec(imgbasename, panels, figsize=(6, 4), layout=(2, 3)))
 
             # Save images to special dataframe
             df_img = df_img.append({'name': imgbasename, 'img orig': [img], 'img thresh': [manip],
-                                    'graph': [graphimg]}, ignore_index=True)
+                                    'graph': imgbasename}, ignore_index=True)
 
             # Append individual image dataframe to larger dataframe
             df_all = df_all.append(p_df_filt, ignore_index=True)
@@ -226,6 +214,7 @@ class RunAdhFluorAnalysis():
             manip = None
             img = None
 
+        resultcache.save(cachekey, (df_img, df_summary, df_all, total_area, graphset))
 
         # Raise toplevel to show graphs
         GraphTopLevel(df_img)
@@ -300,13 +289,12 @@ class RunAdhFluorAnalysis():
         os.mkdir(graph_folder)
         os.chdir(graph_folder)
 
+        # Render any graphs not yet viewed in parallel, then write cached PNGs
+        graphset.renderall()
         for i in range(len(df_img)):
+            graphset.save(df_img['graph'].iloc[i], df_img['name'].iloc[i] + '_graph.png')
 
-            # Convert image to BGR
-            array = cv2.cvtColor(df_img['graph'].iloc[i][0], cv2.COLOR_RGB2BGR)
-            cv2.imwrite(df_img['name'].iloc[i] + '_graph.png', array)
-
-            unique_names = df_all.Image.unique()
+        unique_names = df_all.Image.unique()
 
             # summary_df = pd.DataFrame()
         for un in unique_names:
@@ -316,26 +304,19 @@ class RunAdhFluorAnalysis():
 
             # Create pairplots (with and without functional stain intensity data)
             # One color
-            pp = plt.figure(figsize=(6, 6), dpi=300)
             byname_subset = byname_df[['Image', u'Area (\u03bcm\u00b2)', 'Circularity (a.u.)', 'Texture (a.u.)',
                                     'Fn. stain intensity (a.u.)']]
-            sns.pairplot(byname_subset)
-            plt.savefig(un + '_pairplot.png', dpi=300)
-            plt.close()
+            pairplots.savepairplot(byname_subset, un + '_pairplot.png')
 
         # all image pairplots
         # Create pairplots (with and without functional stain intensity data)
         # One color
         df_all_subset = df_all[['Image', u'Area (\u03bcm\u00b2)', 'Circularity (a.u.)',
                                 'Texture (a.u.)', 'Fn. stain intensity (a.u.)']]
-        sns.pairplot(df_all_subset)
-        plt.savefig('All-data_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_all_subset, 'All-data_pairplot.png')
 
         # One color per image
-        sns.pairplot(df_all_subset, hue='Image')
-        plt.savefig('All-data_multicolor_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_all_subset, 'All-data_multicolor_pairplot.png', hue='Image')
 
 
     def expimgs(self):
@@ -415,7 +396,7 @@ class GraphTopLevel(tk.Toplevel):
 
         # Add image name to image name label
         self.name_label.config(text=df_img['name'].iloc[idx])
-        graphimg = np.asarray(df_img['graph'].iloc[idx][0]).astype('uint8')
+        graphimg = graphset.getrgb(df_img['graph'].iloc[idx])  # Drawn now if not viewed before
         # rf = 300 / np.max((graphimg.shape[0], graphimg.shape[1]))
         # dim = (int(graphimg.shape[1] * rf), int(graphimg.shape[0] * rf))
         # graphimgr = cv2.resize(graphimg, dim, interpolation=cv2.INTER_AREA)
@@ -11,39 +11,57 @@ import tkinter as tk
 import tkinter.font as font
 import os
 import cv2
-from PIL import Image, ImageTk, ImageDraw
+from PIL import Image, ImageTk
 import numpy as np
 from random import randint
 import pandas as pd
 import trackpy as tp
 import warnings
 warnings.filterwarnings("ignore", module="trackpy")
-import matplotlib.pyplot as plt
-import seaborn as sns
 import datetime
 import shutil
+from accessoryfn import graphrender, pairplots, resultcache, featurecache, labeledexport
 
 class RunBFDefAnalysis():
 
-    def __init__(self, filelist, frames_crop, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h):
-        super().__init__(filelist, frames_crop, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h)
+    def __init__(self, filelist, frames_crop, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h, source=None):
+        super().__init__(filelist, frames_crop, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h, source)
 
-    def analysis(self, filelist, frames_crop, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h):
-        """Function runs final analysis based on the parameters chosen in GUI"""
+    def analysis(self, filelist, frames_crop, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h, source=None):
+        """Function runs final analysis based on the parameters chosen in GUI
+
+        source identifies the frames for reusing located features, see featurecache.source"""
 
         # Base name for files
         self.video_basename = os.path.basename(self.filelist[0].split(".")[0])
 
+        # Return saved results if this video was already analyzed with these parameters
+        results = ['df_all', 'df_summary', 'df_img', 'graphset', 'df_video', 't_tt']
+        cachekey = resultcache.key('adhvideo', filelist, {'umpix': umpix, 'fps': fps, 'maxdiameter': maxdiameter,
+                                                          'minintensity': minintensity,
+                                                          'maxintensity': maxintensity},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            for name in results:
+                setattr(self, name, cached[name])
+            GraphTopLevel(self.df_img, self.graphset)
+            return
+
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
 
         self.df_all = pd.DataFrame()  # For all events, good for plotting
         self.df_summary = pd.DataFrame()  # For descriptive statistics
-        self.df_img = pd.DataFrame(columns=['name', 'graph'])  # For images, graphs
+        self.df_img = pd.DataFrame(columns=['name', 'graph'])  # For images, graph names
+        self.graphset = graphrender.DeferredGraphs()  # Graphs, rendered on request
 
         # Begin trackpy tracking analysis
         tp.quiet()
-        f = tp.batch(frames_crop[:len(frames_crop)], self.maxdiameter.get(),
-                     minmass=self.minintensity.get(), invert=False, processes=1);  # Detect particles/cells
+        # Frames already located while choosing parameters are reused
+        if source is None:  # Not given by the GUI
+            source = featurecache.source(filelist[0], x, y, w, h)
+        f = featurecache.batch(source, frames_crop, self.maxdiameter.get(),
+                               minmass=self.minintensity.get(), invert=False)  # Detect particles/cells
         # Filter by maximum mass
         f = f[f['mass'] < self.maxintensity.get()]
         # Link particles, cells into dataframe format
@@ -110,42 +128,18 @@ class RunBFDefAnalysis():
             uniqval = uniqvals[val]
             self.t_tt['particle'] = self.t_tt['particle'].replace(uniqval, val)
 
-        # Graph for display
-        graphs = plt.figure(figsize=(4, 6), dpi=80)
-        graphs.suptitle(self.video_basename, fontweight='bold')
-
+        # Graph for display, described here and only drawn when viewed or exported
         # If cells exist within the image
         if len(f) != 0:
-            # Subplot 311 (area histogram)
-            plt.subplot(3, 1, 1)
-            plt.hist(self.df_video['Area (\u03bcm\u00b2)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Area (\u03bcm\u00b2)')
-            plt.ylabel('n')
-
-            # Subplot 312 (circularity histogram)
-            plt.subplot(3, 1, 2)
-            plt.hist(self.df_video['Circularity (a.u.)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Circularity (a.u.)')
-            plt.ylabel('n')
-
-            # Subplot 312 (velocity histogram)
-            plt.subplot(3, 1, 3)
-            plt.hist(self.df_video['Transit time (s)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Transit time (s)')
-            plt.ylabel('n')
-
-            plt.tight_layout()
-
-            # Prepare for saving to be later referenced in graph window and in exports
-            graphs.canvas.draw()
-            graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-            graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
-
-            plt.close()
+            panels = [graphrender.histpanel(1, self.df_video['Area (\u03bcm\u00b2)'], 'Area (\u03bcm\u00b2)'),
+                      graphrender.histpanel(2, self.df_video['Circularity (a.u.)'], 'Circularity (a.u.)'),
+                      graphrender.histpanel(3, self.df_video['Transit time (s)'], 'Transit time (s)')]
+            self.graphset.add(self.video_basename,
+                              graphrender.graphspec(self.video_basename, panels, figsize=(4, 6), layout=(3, 1)))
 
             # Save images to special dataframe
             self.df_img = self.df_img.append({'name': self.video_basename,
-                                    'graph': [graphimg]}, ignore_index=True)
+                                    'graph': self.video_basename}, ignore_index=True)
 
             # Append individual image dataframe to larger dataframe
             f.insert(0, 'Image', self.video_basename)
@@ -155,8 +149,9 @@ class RunBFDefAnalysis():
             self.df_summary = descriptive_statistics(self.df_video)
             self.df_summary.insert(0, 'Video', self.video_basename)
 
+        resultcache.save(cachekey, {name: getattr(self, name) for name in results})
 
-        GraphTopLevel(self.df_img)  # Raise graph window
+        GraphTopLevel(self.df_img, self.graphset)  # Raise graph window
 
     def expnum(self, filelist, umpix, fps, maxdiameter, minintensity, maxintensity, x, y, w, h):
         """Export numerical (excel) data, including descriptive statistics and parameters used"""
@@ -194,18 +189,14 @@ class RunBFDefAnalysis():
     def expgraph(self):
         """Export graphical (.png image) data, including pairplots"""
 
-        array = cv2.cvtColor(self.df_img['graph'].iloc[0][0], cv2.COLOR_RGB2BGR)
-        cv2.imwrite(self.df_img['name'].iloc[0] + '_graph.png', array)
+        self.graphset.save(self.df_img['graph'].iloc[0], self.df_img['name'].iloc[0] + '_graph.png')
 
-        pp = plt.figure(figsize=(4, 4), dpi=300)
         df_subset = self.df_video[['Transit time (s)', 'Distance traveled (\u03bcm)',
                               'Avg. velocity (\u03bcm/s)', 'Area (\u03bcm\u00b2)', 'Circularity (a.u.)']]
-        sns.pairplot(df_subset)
-        plt.savefig(self.video_basename + '_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_subset, self.video_basename + '_pairplot.png')
 
     def expimgs(self, frames_crop):
-        """Export image data (.png image) with processing and labeling applied"""
+        """Export image data (labeled video or .png images) with processing and labeling applied"""
 
         current_dir = os.getcwd()  # Select filepath
         img_folder = os.path.join(current_dir, 'Results, labeled image data')
@@ -216,24 +207,16 @@ class RunBFDefAnalysis():
         os.mkdir(img_folder)
         os.chdir(img_folder)
 
-        # Set up colors - each event labeled with a different color
+        # Set up colors - each event labeled with a different color (BGR)
         color = []
         n = self.t_tt['particle'].max() + 1
         for i in range(n):
-            color.append('#%06X' % randint(0, 0xFFFFFF))
-
-        # For frame in cropped frames
-        for i in range(len(frames_crop)):
-            image_name = self.video_basename + '_frame_' + str(i).zfill(5)
+            color.append((randint(0, 255), randint(0, 255), randint(0, 255)))
 
-            f = self.t_tt[self.t_tt['frame'] == i]
-            # Set up image to label, including cropping
-            PILimg = Image.fromarray(np.dstack((frames_crop[i], frames_crop[i], frames_crop[i])))  # Color
-            drawimg = ImageDraw.Draw(PILimg)  # " "
-            for j in range(len(f)):
-                drawimg.text((f['x'].iloc[j], f['y'].iloc[j]), str(f['particle'].iloc[j]),
-                             fill=color[f['particle'].iloc[j]])  # Label
-            PILimg.save(image_name + "_labeled.png")  # Save image
+        # Tracks are grouped by frame once, labels drawn with OpenCV and streamed into one video,
+        # or saved as one .png image per frame if chosen
+        labeledexport.export(frames_crop, self.t_tt, self.video_basename, float(self.fps.get()),
+                             self.expformat.get(), colors=color)
 
         # Close large variables
         frames_crop = None
@@ -241,10 +224,11 @@ class RunBFDefAnalysis():
 
 
 class GraphTopLevel(tk.Toplevel):
-    def __init__(self, df_img):
+    def __init__(self, df_img, graphset):
         super().__init__()
 
         self.df_img = df_img
+        self.graphset = graphset
 
         # Fonts
         boldfont = font.Font(weight='bold')
@@ -276,7 +260,7 @@ class GraphTopLevel(tk.Toplevel):
     def displaygraph(self, idx):
         """Display graphs in toplevel window immediately after analysis is run"""
         # Add image name to image name label
-        graphimg = np.asarray(self.df_img['graph'].iloc[idx][0]).astype('uint8')
+        graphimg = self.graphset.getrgb(self.df_img['graph'].iloc[idx])  # Drawn now if not viewed before
         graphimgr_tk = ImageTk.PhotoImage(image=Image.fromarray(graphimg))
         self.graphimgr_tk = graphimgr_tk  # Some fix?
         self.img_canvas.create_image(0, 0, anchor='nw', image=graphimgr_tk)
@@ -11,41 +11,56 @@ import tkinter as tk
 import tkinter.font as font
 import os
 import cv2
-from PIL import Image, ImageTk, ImageDraw
+from PIL import Image, ImageTk
 import numpy as np
 import pandas as pd
 import trackpy as tp
 import warnings
 warnings.filterwarnings("ignore", module="trackpy")
-import matplotlib.pyplot as plt
-import seaborn as sns
 import datetime
 import shutil
+from accessoryfn import graphrender, pairplots, resultcache, featurecache, labeledexport
 
 class RunBFDefAnalysis():
 
-    def __init__(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, x, y, w, h):
-        super().__init__(filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, x, y, w, h)
+    def __init__(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, x, y, w, h, bgmethod, source=None):
+        super().__init__(filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, x, y, w, h, bgmethod, source)
 
-    def analysis(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, x, y, w, h):
-        """Function runs final analysis based on the parameters chosen in GUI"""
+    def analysis(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, x, y, w, h, bgmethod, source=None):
+        """Function runs final analysis based on the parameters chosen in GUI
+
+        source identifies the frames for reusing located features, see featurecache.source"""
 
         # Global variables for use with additional export functions within class
-        global df_img, df_summary, df_video, video_basename, t_sdi
+        global df_img, df_summary, df_video, video_basename, t_sdi, graphset
 
         # Base name for files
         video_basename = os.path.basename(filelist[0].split(".")[0])
 
+        # Return saved results if this video was already analyzed with these parameters
+        cachekey = resultcache.key('deform', filelist, {'umpix': umpix, 'fps': fps, 'maxdiameter': maxdiameter,
+                                                        'minintensity': minintensity, 'bgmethod': bgmethod},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            df_img, df_summary, df_video, t_sdi, graphset = cached
+            GraphTopLevel(df_img)
+            return
+
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
 
         df_all = pd.DataFrame()  # For all events, good for plotting
         df_summary = pd.DataFrame()  # For descriptive statistics
-        df_img = pd.DataFrame(columns=['name', 'graph'])  # For images, graphs
+        df_img = pd.DataFrame(columns=['name', 'graph'])  # For images, graph names
+        graphset = graphrender.DeferredGraphs()  # Graphs, rendered on request
 
         # Begin trackpy tracking analysis
         tp.quiet()
-        f = tp.batch(frames_bgr[:len(frames_bgr)], self.maxdiameter.get(),
-                     minmass=self.minintensity.get(), invert=False, processes=1);  # Detect particles/cells
+        # Frames already located while choosing parameters are reused
+        if source is None:  # Not given by the GUI
+            source = featurecache.source(filelist[0], x, y, w, h, bgmethod)
+        f = featurecache.batch(source, frames_bgr, self.maxdiameter.get(),
+                               minmass=self.minintensity.get(), invert=False)  # Detect particles/cells
         # Link particles, cells into dataframe format
         # Search range criteria: must travel no further than 1/3 the channel length in one frame
         # Memory here signifies a particle/cell cannot "disappear" for more than one frame
@@ -107,36 +122,16 @@ class RunBFDefAnalysis():
             uniqval = uniqvals[val]
             t_sdi['particle'] = t_sdi['particle'].replace(uniqval, val)
 
-        # Graph for display
-        graphs = plt.figure(figsize=(4, 4), dpi=80)
-        graphs.suptitle(video_basename, fontweight='bold')
-
+        # Graph for display, described here and only drawn when viewed or exported
         # If cells exist within the image
         if len(f) != 0:
-            # Subplot 212 (circularity hist)
-            plt.subplot(2, 1, 1)
-            plt.hist(df_video['Velocity (\u03bcm/s)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Velocity (\u03bcm/s)')
-            plt.ylabel('n')
-
-            # Subplot 211 (area hist)
-            plt.subplot(2, 1, 2)
-            plt.hist(df_video['Area (pix)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Area (pix)')
-            plt.ylabel('n')
-
-            plt.tight_layout()
-
-            # Prepare for saving to be later referenced in graph window and in exports
-            graphs.canvas.draw()
-            graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-            graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
-
-            plt.close()
+            panels = [graphrender.histpanel(1, df_video['Velocity (\u03bcm/s)'], 'Velocity (\u03bcm/s)'),
+                      graphrender.histpanel(2, df_video['Area (pix)'], 'Area (pix)')]
+            graphset.add(video_basename, graphrender.graphspec(video_basename, panels, figsize=(4, 4)))
 
             # Save images to special dataframe
             df_img = df_img.append({'name': video_basename,
-                                    'graph': [graphimg]}, ignore_index=True)
+                                    'graph': video_basename}, ignore_index=True)
 
             # Append individual image dataframe to larger dataframe
             f.insert(0, 'Image', video_basename)
@@ -146,6 +141,7 @@ class RunBFDefAnalysis():
             df_summary = descriptive_statistics(df_video)
             df_summary.insert(0, 'Video', video_basename)
 
+        resultcache.save(cachekey, (df_img, df_summary, df_video, t_sdi, graphset))
 
         GraphTopLevel(df_img)  # Raise graph window
 
@@ -184,18 +180,14 @@ class RunBFDefAnalysis():
     def expgraph(self):
         """Export graphical (.png image) data, including pairplots"""
 
-        array = cv2.cvtColor(df_img['graph'].iloc[0][0], cv2.COLOR_RGB2BGR)
-        cv2.imwrite(df_img['name'].iloc[0] + '_graph.png', array)
+        graphset.save(df_img['graph'].iloc[0], df_img['name'].iloc[0] + '_graph.png')
 
-        pp = plt.figure(figsize=(4, 4), dpi=300)
         df_subset = df_video[['Transit time (s)', 'Distance traveled (\u03bcm)',
                               'Velocity (\u03bcm/s)', 'Area (pix)']]
-        sns.pairplot(df_subset)
-        plt.savefig(video_basename + '_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_subset, video_basename + '_pairplot.png')
 
     def expimgs(self, frames_crop):
-        """Export image data (.png image) with processing and labeling applied"""
+        """Export image data (labeled video or .png images) with processing and labeling applied"""
 
         current_dir = os.getcwd()  # Select filepath
         img_folder = os.path.join(current_dir, 'Results, labeled image data')
@@ -206,18 +198,9 @@ class RunBFDefAnalysis():
         os.mkdir(img_folder)
         os.chdir(img_folder)
 
-        # For frame in cropped frames
-        for i in range(len(frames_crop)):
-            image_name = video_basename + '_frame_' + str(i).zfill(5)
-
-            f = t_sdi[t_sdi['frame'] == i]
-            # Set up image to label, including cropping
-            PILimg = Image.fromarray(np.dstack((frames_crop[i], frames_crop[i], frames_crop[i])))  # Color
-            drawimg = ImageDraw.Draw(PILimg)  # " "
-            for j in range(len(f)):
-                drawimg.text((f['x'].iloc[j], f['y'].iloc[j]), str(f['particle'].iloc[j]),
-                             fill="#ff0000")  # Label
-            PILimg.save(image_name + "_labeled.png")  # Save image
+        # Tracks are grouped by frame once, labels (red) drawn with OpenCV and streamed into one video,
+        # or saved as one .png image per frame if chosen
+        labeledexport.export(frames_crop, t_sdi, video_basename, float(self.fps.get()), self.expformat.get())
 
         # Close large variables
         frames_crop = None
@@ -261,7 +244,7 @@ class GraphTopLevel(tk.Toplevel):
     def displaygraph(self, idx):
         """Display graphs in toplevel window immediately after analysis is run"""
         # Add image name to image name label
-        graphimg = np.asarray(df_img['graph'].iloc[idx][0]).astype('uint8')
+        graphimg = graphset.getrgb(df_img['graph'].iloc[idx])  # Drawn now if not viewed before
         graphimgr_tk = ImageTk.PhotoImage(image=Image.fromarray(graphimg))
         self.graphimgr_tk = graphimgr_tk  # Some fix?
         self.img_canvas.create_image(0, 0, anchor='nw', image=graphimgr_tk)
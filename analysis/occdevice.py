@@ -16,14 +16,17 @@ import cv2
 from PIL import Image, ImageTk
 import numpy as np
 import pandas as pd
-from skimage import measure
-from scipy.ndimage import label
 import matplotlib.pyplot as plt
 import datetime
 import shutil
+from accessoryfn import channelmap, resultcache
 
 
-def occ_acc(filelist, map_color, colorname, thresh, layer, x, y, w, h):
+def occ_acc(filelist, index, colorname, thresh, layer, x, y, w, h):
+    """Calculates occlusion and accumulation for desired RGB channel
+
+    index is the channel map index from accessoryfn.channelmap, shared by all colors"""
+
     occlusion = [0]  # init
     occlusion_percent = [0]
     accumulation = [0]
@@ -31,6 +34,10 @@ def occ_acc(filelist, map_color, colorname, thresh, layer, x, y, w, h):
 
     df_img_single = pd.DataFrame()
 
+    map_sum = index['map_sum']  # Device area, calculated once per map
+    color = [0, 0, 0]
+    color[layer] = 255
+
     for img in filelist:
         imgname = os.path.basename(img).split(".")[0]
         channelimg = cv2.imread(img)
@@ -41,15 +48,12 @@ def occ_acc(filelist, map_color, colorname, thresh, layer, x, y, w, h):
 
         ret, array_bin = cv2.threshold(channelimg_l, thresh, 255, cv2.THRESH_BINARY)
 
-        img_to_save = map_color.copy()
-        color = [0, 0, 0]
-        color[layer] = 255
-        img_to_save[np.where(array_bin == 255)] = color
+        img_to_save = channelmap.paint(index, array_bin == 255, color)
 
         df_img_single = df_img_single.append({'name': imgname + '_' + colorname, 'img': img_to_save}, ignore_index=True)
 
-        occ = np.sum(array_bin / 255)
-        occ_per = np.sum(array_bin/np.sum(map_color[:, :, 0])) * 100 # 3 layer color cpu
+        occ = np.count_nonzero(array_bin)
+        occ_per = np.sum(array_bin) / map_sum * 100  # 3 layer color cpu
         time.append(imgname)
         occlusion.append(occ)
         occlusion_percent.append(occ_per)
@@ -73,6 +77,20 @@ class RunOccAccDeviceAnalysis():
         self.filelist_a = filelist
         self.umpix_a = umpix
 
+        # Return saved results if these images were already analyzed with these parameters
+        results = ['df', 'df_img', 'graphimg']
+        cachekey = resultcache.key('occdevice', filelist, {'map': map, 'umpix': umpix,
+                                                           'rchannel': rchannel, 'rthresh': rthresh,
+                                                           'gchannel': gchannel, 'gthresh': gthresh,
+                                                           'bchannel': bchannel, 'bthresh': bthresh},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            for name in results:
+                setattr(self, name, cached[name])
+            GraphTopLevel(self.graphimg)
+            return
+
         foldername = os.path.dirname(filelist[0])
         name = os.path.basename(foldername)
 
@@ -81,7 +99,8 @@ class RunOccAccDeviceAnalysis():
 
         crop = img[y:(y + h), x:(x + w), :]  # Create cropped image
         map_crop = map[y:(y + h), x:(x + w)]
-        map_color = np.dstack((map_crop, map_crop, map_crop)).astype('uint8')
+        # Channel map index, built once and reused for every color and image
+        index = channelmap.load_index(map_crop, x, y, w, h)
 
         graphs = plt.figure()
         graphs.suptitle(name, fontweight='bold')
@@ -100,7 +119,7 @@ class RunOccAccDeviceAnalysis():
         # Red
         if rchannel is True:
             colorname, time, occlusion, occlusion_percent, accumulation, df_img_single = \
-                occ_acc(self.filelist_a, map_color, 'red', rthresh, 2, x, y, w, h)  # Name, threshold, layer
+                occ_acc(self.filelist_a, index, 'red', rthresh, 2, x, y, w, h)  # Name, threshold, layer
 
             occlusion_umpix = np.asarray(occlusion) * self.umpix_a * self.umpix_a
             accumulation_umpix = np.asarray(accumulation) * self.umpix_a * self.umpix_a
@@ -127,7 +146,7 @@ class RunOccAccDeviceAnalysis():
         # Green
         if gchannel is True:
             colorname, time, occlusion, occlusion_percent, accumulation, df_img_single = \
-                occ_acc(self.filelist_a, map_color, 'green', gthresh, 1, x, y, w, h)  # Name, threshold, layer
+                occ_acc(self.filelist_a, index, 'green', gthresh, 1, x, y, w, h)  # Name, threshold, layer
 
             occlusion_umpix = np.asarray(occlusion) * self.umpix_a * self.umpix_a
             accumulation_umpix = np.asarray(accumulation) * self.umpix_a * self.umpix_a
@@ -154,7 +173,7 @@ class RunOccAccDeviceAnalysis():
         # Blue
         if bchannel is True:
             colorname, time, occlusion, occlusion_percent, accumulation, df_img_single = \
-                occ_acc(self.filelist_a, map_color, 'blue', bthresh, 0, x, y, w, h)  # Name, threshold, layer
+                occ_acc(self.filelist_a, index, 'blue', bthresh, 0, x, y, w, h)  # Name, threshold, layer
 
             occlusion_umpix = np.asarray(occlusion) * self.umpix_a * self.umpix_a
             accumulation_umpix = np.asarray(accumulation) * self.umpix_a * self.umpix_a
@@ -207,6 +226,8 @@ class RunOccAccDeviceAnalysis():
         mapbin_ext = None
         layered_arr = None
 
+        resultcache.save(cachekey, {name: getattr(self, name) for name in results})
+
         # Raise toplevel to show graphs
         GraphTopLevel(self.graphimg)
 
@@ -16,27 +16,25 @@ import cv2
 from PIL import Image, ImageTk
 import numpy as np
 import pandas as pd
-from skimage import measure
-from scipy.ndimage import label
 import matplotlib.pyplot as plt
 import datetime
 import shutil
+from accessoryfn import channelmap, resultcache
 
 
-def analysis_math(df_img, mapbin_ext, filelist, umpix, layer, threshold, x, y, w, h):
-    """Calculates occlusion and accumulation for desired RGB channel"""
+def analysis_math(df_img, mapbin_ext, filelist, umpix, layer, threshold, x, y, w, h, index=None):
+    """Calculates occlusion and accumulation for desired RGB channel
 
-    # Create a numbered list of channels
-    lbl, nlbls = label(mapbin_ext)
-    rp = measure.regionprops_table(lbl, properties=('label', 'bbox', 'centroid'))
-    rp_df = pd.DataFrame(rp)
-    lab = rp_df['label']
-    x1 = rp_df['bbox-0']
-    x2 = rp_df['bbox-2']
+    index is the channel map index from accessoryfn.channelmap, built (or loaded from cache) if not given"""
+
+    # Numbered list of channels, shared by all colors and repeat analyses of the same map
+    if index is None:
+        index = channelmap.load_index(mapbin_ext, x, y, w, h)
+    band_height = (index['band_end'] - index['band_start'])[:, None]  # Height of each channel
 
     data_raw = []
     data = []
-    a0 = np.zeros(len(lab))  # List of channels zero long
+    a0 = np.zeros(len(band_height))  # List of channels zero long
     # Column index titles
     # rng = range(self.w.get())
     rng = range(w)
@@ -45,6 +43,9 @@ def analysis_math(df_img, mapbin_ext, filelist, umpix, layer, threshold, x, y, w
 
     df_img = df_img.append({'name': 'map', 'color': 'map', 'img': mapbin_ext}, ignore_index=True)
 
+    color = [0, 0, 0]
+    color[layer] = 255
+
     for i in range(len(filelist)):
         img = cv2.imread(filelist[i])
         imgbasename = os.path.basename(filelist[i].split(".")[0])
@@ -56,38 +57,37 @@ def analysis_math(df_img, mapbin_ext, filelist, umpix, layer, threshold, x, y, w
 
         # Add image to array
         ret, img_thresh = cv2.threshold(img_channel, threshold, 255, cv2.THRESH_BINARY)  # Red
+        img_bin = img_thresh == 255
 
         # Layer
-        map_save = np.dstack((mapbin_ext, mapbin_ext, mapbin_ext))
-        color = [0, 0, 0]
-        color[layer] = 255
-        map_save[np.where(img_thresh == 255)] = color
+        map_save = channelmap.paint(index, img_bin, color)
 
         df_img = df_img.append({'name': imgbasename, 'color': str(layer), 'img': map_save}, ignore_index=True)
 
-        for j in range(len(lab)):  # For each channel
-            # Index channel out of threshold image
-            channel = np.array(img_thresh[x1[j]:x2[j]][:])/255
-            # Sum along one axis and divide by height for a percent
-            occ_vector = np.sum(channel, axis=0)/channel.shape[0] * 100
-
-            # Mean percent occlusion across channel
-            occ_mean = np.mean(occ_vector)
-            # Max occlusion across channel
-            occ_max = np.max(occ_vector)
-            # Total area of signal
-            area_channel = np.sum(channel)
-            # Accumulation from previous frame
-            acc_channel = area_channel - a0[j]  # Subtract previous area
-
-            # Convert numbers to microns
-            area_um = area_channel * umpix * umpix
-            acc_um = acc_channel * umpix * umpix
-            data_raw.append([i, j] + occ_vector.tolist())
-            data.append([i, j, occ_mean, occ_max, area_channel, acc_channel, area_um, acc_um])
-
-            # Reset
-            a0[j] = area_channel
+        # Signal summed along each channel, all channels at once
+        area_vector = channelmap.channel_sums(img_bin, index)
+        # Divide by height for a percent
+        occ_vectors = area_vector / band_height * 100
+
+        # Mean percent occlusion across channel
+        occ_mean = np.mean(occ_vectors, axis=1)
+        # Max occlusion across channel
+        occ_max = np.max(occ_vectors, axis=1)
+        # Total area of signal
+        area_channel = np.sum(area_vector, axis=1)
+        # Accumulation from previous frame
+        acc_channel = area_channel - a0  # Subtract previous area
+
+        # Convert numbers to microns
+        area_um = area_channel * umpix * umpix
+        acc_um = acc_channel * umpix * umpix
+
+        for j in range(len(band_height)):  # For each channel
+            data_raw.append([i, j] + occ_vectors[j].tolist())
+            data.append([i, j, occ_mean[j], occ_max[j], area_channel[j], acc_channel[j], area_um[j], acc_um[j]])
+
+        # Reset
+        a0 = area_channel
 
     # Save and return as dataframes
     df_data_raw = pd.DataFrame(data_raw, columns=col_names)
@@ -117,6 +117,17 @@ class RunOccAccMicroAnalysis():
         # Global variables for use with additional export functions within class
         global df, df_summary_frame, df_summary_all, graphimg, df_colors
 
+        # Return saved results if these images were already analyzed with these parameters
+        cachekey = resultcache.key('occmicro', filelist, {'umpix': umpix, 'rchannel': rchannel, 'rthresh': rthresh,
+                                                          'gchannel': gchannel, 'gthresh': gthresh,
+                                                          'bchannel': bchannel, 'bthresh': bthresh},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            df, df_summary_frame, df_summary_all, graphimg, df_colors = cached
+            GraphTopLevel(graphimg)
+            return
+
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
 
         foldername = os.path.dirname(filelist[0])
@@ -157,10 +168,13 @@ class RunOccAccMicroAnalysis():
         df_colors = pd.DataFrame()
         df_img = pd.DataFrame()
 
+        # Channel map index, built once and reused for every color and frame
+        index = channelmap.load_index(mapbin_ext, x, y, w, h)
+
         # For each present color, run analysis_math for by-color spatial dataframe and mean, max dataframes
         # Add to graph
         if rchannel is True:
-            df_data_raw, df_data, df_data_byframe, df_img = analysis_math(df_img, mapbin_ext, filelist, umpix, 2, rthresh, x, y, w, h)
+            df_data_raw, df_data, df_data_byframe, df_img = analysis_math(df_img, mapbin_ext, filelist, umpix, 2, rthresh, x, y, w, h, index)
 
             # Add column with color, append to overall dataframe
             df_data_raw.insert(0, 'Color', 'red')
@@ -204,7 +218,7 @@ class RunOccAccMicroAnalysis():
             plt.ylabel(u'Accumulation (\u03bcm\u00b2)')
 
         if gchannel is True:
-            df_data_raw, df_data, df_data_byframe, df_img = analysis_math(df_img, mapbin_ext, filelist, umpix, 1, gthresh, x, y, w, h)
+            df_data_raw, df_data, df_data_byframe, df_img = analysis_math(df_img, mapbin_ext, filelist, umpix, 1, gthresh, x, y, w, h, index)
 
             # Add column with color, append to overall dataframe
             df_data_raw.insert(0, 'Color', 'green')
@@ -247,7 +261,7 @@ class RunOccAccMicroAnalysis():
 
         if bchannel is True:
             df_data_raw, df_data, df_data_byframe, df_img = analysis_math(df_img, mapbin_ext, filelist, umpix,
-                                                                  0, bthresh, x, y, w, h)
+                                                                  0, bthresh, x, y, w, h, index)
 
             # Add column with color, append to overall dataframe
             df_data_raw.insert(0, 'Color', 'blue')
@@ -304,6 +318,8 @@ class RunOccAccMicroAnalysis():
         mapbin_ext = None
         layered_arr = None
 
+        resultcache.save(cachekey, (df, df_summary_frame, df_summary_all, graphimg, df_colors))
+
         # Raise toplevel to show graphs
         GraphTopLevel(graphimg)
 
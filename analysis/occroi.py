@@ -21,6 +21,7 @@ from scipy.ndimage import label
 import matplotlib.pyplot as plt
 import datetime
 import shutil
+from accessoryfn import resultcache
 
 
 def occ_acc(filelist, colorname, thresh, layer, x, y, w, h):
@@ -70,6 +71,19 @@ class RunOccAccROIAnalysis():
         self.filelist_a = filelist
         self.umpix_a = umpix
 
+        # Return saved results if these images were already analyzed with these parameters
+        results = ['df', 'df_img', 'graphimg']
+        cachekey = resultcache.key('occroi', filelist, {'umpix': umpix, 'rchannel': rchannel, 'rthresh': rthresh,
+                                                        'gchannel': gchannel, 'gthresh': gthresh,
+                                                        'bchannel': bchannel, 'bthresh': bthresh},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            for name in results:
+                setattr(self, name, cached[name])
+            GraphTopLevel(self.graphimg)
+            return
+
 
         foldername = os.path.dirname(filelist[0])
         name = os.path.basename(foldername)
@@ -195,6 +209,8 @@ class RunOccAccROIAnalysis():
         mapbin_ext = None
         layered_arr = None
 
+        resultcache.save(cachekey, {name: getattr(self, name) for name in results})
+
         # Raise toplevel to show graphs
         GraphTopLevel(self.graphimg)
 
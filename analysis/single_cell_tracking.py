@@ -11,135 +11,78 @@ import tkinter as tk
 import tkinter.font as font
 import os
 import cv2
-from PIL import Image, ImageTk, ImageDraw
+from PIL import Image, ImageTk
 import numpy as np
 import pandas as pd
 import math
 import trackpy as tp
 import warnings
 warnings.filterwarnings("ignore", module="trackpy")
-import matplotlib.pyplot as plt
-import seaborn as sns
 import datetime
 import shutil
+from accessoryfn import graphrender, pairplots, resultcache, featurecache, stagecache, labeledexport
+
+stages = stagecache.StageCache()  # Latest locate, link and filter results, reused on rerun
 
 class RunBFSCTAnalysis():
 
-    def __init__(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, search_range, min_dist, x, y, w, h):
-        super().__init__(filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, search_range, min_dist, x, y, w, h)
+    def __init__(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, search_range, min_dist, x, y, w, h, bgmethod, source=None):
+        super().__init__(filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, search_range, min_dist, x, y, w, h, bgmethod, source)
+
+    def analysis(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, search_range, min_dist, x, y, w, h, bgmethod, source=None):
+        """Function runs final analysis based on the parameters chosen in GUI
 
-    def analysis(self, filelist, frames_crop, frames_bgr, umpix, fps, maxdiameter, minintensity, search_range, min_dist, x, y, w, h):
-        """Function runs final analysis based on the parameters chosen in GUI"""
+        source identifies the frames for reusing located features, see featurecache.source"""
 
         # Global variables for use with additional export functions within class
-        global df_img, df_summary, df_video, video_basename, t_sdi
+        global df_img, df_summary, df_video, video_basename, t_sdi, graphset
 
         # Base name for files
         video_basename = os.path.basename(filelist[0].split(".")[0])
 
+        # Return saved results if this video was already analyzed with these parameters
+        cachekey = resultcache.key('sct', filelist, {'umpix': umpix, 'fps': fps, 'maxdiameter': maxdiameter,
+                                                     'minintensity': minintensity, 'search_range': search_range,
+                                                     'min_dist': min_dist, 'bgmethod': bgmethod},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            df_img, df_summary, df_video, t_sdi, graphset = cached
+            GraphTopLevel(df_img)
+            return
+
         cvfont = cv2.FONT_HERSHEY_SIMPLEX  # For labeling
 
         df_all = pd.DataFrame()  # For all events, good for plotting
         df_summary = pd.DataFrame()  # For descriptive statistics
-        df_img = pd.DataFrame(columns=['name', 'graph'])  # For images, graphs
+        df_img = pd.DataFrame(columns=['name', 'graph'])  # For images, graph names
+        graphset = graphrender.DeferredGraphs()  # Graphs, rendered on request
 
-        # Begin trackpy tracking analysis
+        # Begin trackpy tracking analysis, run as locate, link, filter and summarize stages
+        # The latest result of each stage is kept, rerunning after changing only linking or filtering parameters
+        # starts from the first stage whose parameters changed
         tp.quiet()
-        f = tp.batch(frames_bgr[:len(frames_bgr)], self.maxdiameter.get(),
-                     minmass=self.minintensity.get(), invert=False, processes=1);  # Detect particles/cells
-        # Link particles, cells into dataframe format
-        # Search range criteria: must travel no further than 1/3 the channel length in one frame
-        # Memory here signifies a particle/cell cannot "disappear" for more than one frame
-        tr = tp.link_df(f, search_range=self.search_range.get(), memory=1, adaptive_stop=1, adaptive_step=0.95)
-        # Filter stubs criteria requires a particle/cell to be present for at least three frames
-        t_final = tp.filter_stubs(tr, 3)
-
-        # Series of vectors for final results dataframe
-        p_i = []  # Particle index
-        f_start = []  # Start frame, frame where cell first detected
-        f_end = []  # End frame, frame where cell last detected
-        dist = []  # Distance traveled
-        time = []  # Time for travel
-        sizes = []  # Cell size
-        t_sdi = pd.DataFrame()  # Create dataframe
-        # For each particle, calculate RDI and save data for results dataframe:
-        for p in range(t_final['particle'].iloc[-1]):
-            df_p = tr[tr['particle'] == p]  # Region of trackpy dataframe corresponding to individual particle index
-            x_0 = df_p['x'].iloc[0]  # First x-position
-            x_n = df_p['x'].iloc[-1]  # Last x-position
-            y_0 = df_p['y'].iloc[0]  # First y-position
-            y_n = df_p['y'].iloc[-1]  # Last y-position
-            f_0 = df_p['frame'].iloc[0]  # First frame number
-            f_n = df_p['frame'].iloc[-1]  # Last frame number
-            s = df_p['mass'].mean() / 255  # Area of cell (pixels)
-            d = math.sqrt((x_n - x_0) ** 2 + (y_n - y_0) ** 2)  # Distance (pixels) - x direction only
-            t = (f_n - f_0) / float(self.fps.get())  # Time (seconds)
-            # Criteria to save cells as a valid data point:
-            # Must travel no less than 1/3 the length of channel
-            # Must travel no further than length of channel
-            if d > self.min_dist.get() / 3:
-                t_sdi = t_sdi.append(df_p, ignore_index=True)  # Save trackpy metrics
-                # Append data for particle/cell
-                p_i.append(p)
-                f_start.append(f_0)
-                f_end.append(f_n)
-                dist.append(d * float(self.umpix.get()))  # Convert to microns
-                time.append(t)
-                sizes.append(s)  # Background subtractor changes size of cell, size is a relative measurement
-
-        # Calculate sDI by dividing distance by time (um/sec)
-        sdi = []
-        sdi = np.asarray([u / v for u, v in zip(dist, time)])
-
-        # Organize time, location, and RDI data in a list format
-        df_video = pd.DataFrame(
-            {'Particle': p_i,
-             'Start frame': f_start,
-             'End frame': f_end,
-             'Transit time (s)': time,
-             'Distance traveled (\u03bcm)': dist,
-             'Velocity (\u03bcm/s)': sdi,
-             'Area (pix)': sizes
-             })
-
-        # Renumber particles 0 to n
-        df_video['Particle'] = np.arange(len(df_video))
-        uniqvals = t_sdi['particle'].unique()
-        newvals = np.arange(len(uniqvals))
-        for val in newvals:
-            uniqval = uniqvals[val]
-            t_sdi['particle'] = t_sdi['particle'].replace(uniqval, val)
-
-        # Graph for display
-        graphs = plt.figure(figsize=(4, 4), dpi=80)
-        graphs.suptitle(video_basename, fontweight='bold')
-
+        if source is None:  # Not given by the GUI
+            source = featurecache.source(filelist[0], x, y, w, h, bgmethod)
+        locate_key = (source, maxdiameter, minintensity)
+        link_key = locate_key + (search_range,)
+        filter_key = link_key + (min_dist, float(fps), float(umpix))
+        f = stages.run('locate', locate_key, locate, source, frames_bgr, maxdiameter, minintensity)
+        tr = stages.run('link', link_key, link, f, search_range)
+        t_sdi, df_video = stages.run('filter', filter_key, filtertracks, tr, min_dist, float(fps), float(umpix))
+        f, t_sdi, df_video = f.copy(), t_sdi.copy(), df_video.copy()  # Kept results are left unchanged
+
+        # Summarize stage
+        # Graph for display, described here and only drawn when viewed or exported
         # If cells exist within the image
         if len(f) != 0:
-            # Subplot 212
-            plt.subplot(2, 1, 1)
-            plt.hist(df_video['Velocity (\u03bcm/s)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Velocity (\u03bcm/s)')
-            plt.ylabel('n')
-
-            # Subplot 211 (area hist)
-            plt.subplot(2, 1, 2)
-            plt.hist(df_video['Area (pix)'], rwidth=0.8, color='orangered')
-            plt.xlabel('Area (pix)')
-            plt.ylabel('n')
-
-            plt.tight_layout()
-
-            # Prepare for saving to be later referenced in graph window and in exports
-            graphs.canvas.draw()
-            graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-            graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
-
-            plt.close()
+            panels = [graphrender.histpanel(1, df_video['Velocity (\u03bcm/s)'], 'Velocity (\u03bcm/s)'),
+                      graphrender.histpanel(2, df_video['Area (pix)'], 'Area (pix)')]
+            graphset.add(video_basename, graphrender.graphspec(video_basename, panels, figsize=(4, 4)))
 
             # Save images to special dataframe
             df_img = df_img.append({'name': video_basename,
-                                    'graph': [graphimg]}, ignore_index=True)
+                                    'graph': video_basename}, ignore_index=True)
 
             # Append individual image dataframe to larger dataframe
             f.insert(0, 'Image', video_basename)
@@ -149,6 +92,7 @@ class RunBFSCTAnalysis():
             df_summary = descriptive_statistics(df_video)
             df_summary.insert(0, 'Video', video_basename)
 
+        resultcache.save(cachekey, (df_img, df_summary, df_video, t_sdi, graphset))
 
         GraphTopLevel(df_img)  # Raise graph window
 
@@ -189,18 +133,14 @@ class RunBFSCTAnalysis():
     def expgraph(self):
         """Export graphical (.png image) data, including pairplots"""
 
-        array = cv2.cvtColor(df_img['graph'].iloc[0][0], cv2.COLOR_RGB2BGR)
-        cv2.imwrite(df_img['name'].iloc[0] + '_graph.png', array)
+        graphset.save(df_img['graph'].iloc[0], df_img['name'].iloc[0] + '_graph.png')
 
-        pp = plt.figure(figsize=(4, 4), dpi=300)
         df_subset = df_video[['Transit time (s)', 'Distance traveled (\u03bcm)',
                               'Velocity (\u03bcm/s)', 'Area (pix)']]
-        sns.pairplot(df_subset)
-        plt.savefig(video_basename + '_pairplot.png', dpi=300)
-        plt.close()
+        pairplots.savepairplot(df_subset, video_basename + '_pairplot.png')
 
     def expimgs(self, frames_crop):
-        """Export image data (.png image) with processing and labeling applied"""
+        """Export image data (labeled video or .png images) with processing and labeling applied"""
 
         current_dir = os.getcwd()  # Select filepath
         img_folder = os.path.join(current_dir, 'Results, labeled image data')
@@ -211,18 +151,9 @@ class RunBFSCTAnalysis():
         os.mkdir(img_folder)
         os.chdir(img_folder)
 
-        # For frame in cropped frames
-        for i in range(len(frames_crop)):
-            image_name = video_basename + '_frame_' + str(i).zfill(5)
-
-            f = t_sdi[t_sdi['frame'] == i]
-            # Set up image to label, including cropping
-            PILimg = Image.fromarray(np.dstack((frames_crop[i], frames_crop[i], frames_crop[i])))  # Color
-            drawimg = ImageDraw.Draw(PILimg)  # " "
-            for j in range(len(f)):
-                drawimg.text((f['x'].iloc[j], f['y'].iloc[j]), str(f['particle'].iloc[j]),
-                             fill="#ff0000")  # Label
-            PILimg.save(image_name + "_labeled.png")  # Save image
+        # Tracks are grouped by frame once, labels (red) drawn with OpenCV and streamed into one video,
+        # or saved as one .png image per frame if chosen
+        labeledexport.export(frames_crop, t_sdi, video_basename, float(self.fps.get()), self.expformat.get())
 
         # Close large variables
         frames_crop = None
@@ -266,11 +197,89 @@ class GraphTopLevel(tk.Toplevel):
     def displaygraph(self, idx):
         """Display graphs in toplevel window immediately after analysis is run"""
         # Add image name to image name label
-        graphimg = np.asarray(df_img['graph'].iloc[idx][0]).astype('uint8')
+        graphimg = graphset.getrgb(df_img['graph'].iloc[idx])  # Drawn now if not viewed before
         graphimgr_tk = ImageTk.PhotoImage(image=Image.fromarray(graphimg))
         self.graphimgr_tk = graphimgr_tk  # Some fix?
         self.img_canvas.create_image(0, 0, anchor='nw', image=graphimgr_tk)
 
+def locate(source, frames_bgr, maxdiameter, minintensity):
+    """Locate stage: detect particles/cells in every frame, frames located while choosing parameters are reused"""
+
+    # Invert false - bg removal
+    return featurecache.batch(source, frames_bgr, maxdiameter, minmass=minintensity, invert=False)
+
+
+def link(f, search_range):
+    """Link stage: join particles/cells in consecutive frames into tracks"""
+
+    # Search range criteria: must travel no further than 1/3 the channel length in one frame
+    # Memory here signifies a particle/cell cannot "disappear" for more than one frame
+    return tp.link_df(f, search_range=search_range, memory=1, adaptive_stop=1, adaptive_step=0.95)
+
+
+def filtertracks(tr, min_dist, fps, umpix):
+    """Filter stage: keep tracks that travel far enough, returns trackpy metrics and per-cell results"""
+
+    # Filter stubs criteria requires a particle/cell to be present for at least three frames
+    t_final = tp.filter_stubs(tr, 3)
+    tracks = dict(tuple(tr.groupby('particle')))  # Split once rather than searching for each particle
+
+    # Series of vectors for final results dataframe
+    p_i = []  # Particle index
+    f_start = []  # Start frame, frame where cell first detected
+    f_end = []  # End frame, frame where cell last detected
+    dist = []  # Distance traveled
+    time = []  # Time for travel
+    sizes = []  # Cell size
+    t_sdi_list = []  # Trackpy metrics of each valid particle, merged once at the end
+    # For each particle, calculate RDI and save data for results dataframe:
+    for p in range(t_final['particle'].iloc[-1]):
+        df_p = tracks[p]  # Region of trackpy dataframe corresponding to individual particle index
+        x_0 = df_p['x'].iloc[0]  # First x-position
+        x_n = df_p['x'].iloc[-1]  # Last x-position
+        y_0 = df_p['y'].iloc[0]  # First y-position
+        y_n = df_p['y'].iloc[-1]  # Last y-position
+        f_0 = df_p['frame'].iloc[0]  # First frame number
+        f_n = df_p['frame'].iloc[-1]  # Last frame number
+        s = df_p['mass'].mean() / 255  # Area of cell (pixels)
+        d = math.sqrt((x_n - x_0) ** 2 + (y_n - y_0) ** 2)  # Distance (pixels) - x direction only
+        t = (f_n - f_0) / fps  # Time (seconds)
+        # Criteria to save cells as a valid data point:
+        # Must travel no less than 1/3 the length of channel
+        # Must travel no further than length of channel
+        if d > min_dist / 3:
+            t_sdi_list.append(df_p)  # Save trackpy metrics
+            # Append data for particle/cell
+            p_i.append(p)
+            f_start.append(f_0)
+            f_end.append(f_n)
+            dist.append(d * umpix)  # Convert to microns
+            time.append(t)
+            sizes.append(s)  # Background subtractor changes size of cell, size is a relative measurement
+    t_sdi = pd.concat(t_sdi_list, ignore_index=True) if len(t_sdi_list) > 0 else pd.DataFrame()
+
+    # Calculate sDI by dividing distance by time (um/sec)
+    sdi = np.asarray([u / v for u, v in zip(dist, time)])
+
+    # Organize time, location, and RDI data in a list format
+    df_video = pd.DataFrame(
+        {'Particle': p_i,
+         'Start frame': f_start,
+         'End frame': f_end,
+         'Transit time (s)': time,
+         'Distance traveled (\u03bcm)': dist,
+         'Velocity (\u03bcm/s)': sdi,
+         'Area (pix)': sizes
+         })
+
+    # Renumber particles 0 to n
+    df_video['Particle'] = np.arange(len(df_video))
+    uniqvals = t_sdi['particle'].unique()
+    t_sdi['particle'] = t_sdi['particle'].map(dict(zip(uniqvals, np.arange(len(uniqvals)))))
+
+    return t_sdi, df_video
+
+
 def descriptive_statistics(df_input):
     """Function to calculate descriptive statistics for each population, represented as a dataframe"""
 
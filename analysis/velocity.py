@@ -17,6 +17,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import datetime
 import shutil
+from accessoryfn import videoframes, resultcache
 
 class RunVelocityAnalysis():
 
@@ -71,16 +72,30 @@ class RunVelocityAnalysis():
         # Base name for files
         self.video_basename = os.path.basename(filelist[0].split(".")[0])
 
+        # Return saved results if this video was already analyzed with these parameters
+        results = ['df_frame', 'df_img_first', 'df_img_linspace', 'data_all', 'data_frame', 'profile_data',
+                   'graphimg', 'graphimg_tc']
+        cachekey = resultcache.key('velocity', filelist, {'umpix': umpix, 'fps': fps, 'n_bins': n_bins,
+                                                          'n_points': n_points, 'block_size': block_size,
+                                                          'winsize_x': winsize_x, 'winsize_y': winsize_y},
+                                   roi=(x, y, w, h))
+        cached = resultcache.load(cachekey)
+        if cached is not None:
+            for name in results:
+                setattr(self, name, cached[name])
+            GraphTopLevel(self.graphimg)
+            return
+
         # Set up dataframes to save data for export options
         self.df_frame = pd.DataFrame()  # Frame info, to be saved as excel, graphed
         self.df_img_first = pd.DataFrame(columns=['name', 'image'])  # For images, graphs - first 100
         self.df_img_linspace = pd.DataFrame(columns=['name', 'image'])
 
-        # Read video
-        cap = cv2.VideoCapture(filelist[0])
-        n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Read video or frame stack
+        video = videoframes.openframes(filelist[0])
+        n_frames = len(video)
 
-        ret, first_frame = cap.read()
+        first_frame = video[0]
 
         init_frame = first_frame[self.y_a:(self.y_a + self.h_a), self.x_a:(self.x_a + self.w_a), :]  # Create cropped image
         init_gray = cv2.cvtColor(init_frame, cv2.COLOR_BGR2GRAY)
@@ -92,9 +107,7 @@ class RunVelocityAnalysis():
         positions = []
         velocities = []
 
-        cap_ret = True
-        while count < n_frames - 1 and cap_ret:
-            cap_ret, frame = cap.read()  # Read
+        for frame in video.iter_range(1, n_frames):  # Frames after the first, in order
             frame_crop = frame[self.y_a:(self.y_a + self.h_a), self.x_a:(self.x_a + self.w_a), :]  # Create cropped image
             frame_gray = cv2.cvtColor(frame_crop, cv2.COLOR_BGR2GRAY)  # One layer
 
@@ -144,6 +157,8 @@ class RunVelocityAnalysis():
             # Now update the previous frame
             init_gray = frame_gray.copy()
 
+        video.release()
+
         # Create a dataframe with frame, position, and displacement data
         dict_csv = {'Frame': frames, 'Channel pos. (pix)': positions, 'Velocity (\u03bcm/s)': velocities}
         self.data_all = pd.DataFrame(dict_csv)  # Convert to dictionary
@@ -211,6 +226,8 @@ class RunVelocityAnalysis():
 
         plt.close()
 
+        resultcache.save(cachekey, {name: getattr(self, name) for name in results})
+
         GraphTopLevel(self.graphimg)  # Raise graph window
 
         # Profile graph
@@ -18,7 +18,7 @@ from PIL import Image, ImageTk
 import numpy as np
 from help import adhbrightfieldhelp as hp
 from analysis import adhbrightfield as an
-from accessoryfn import chooseinput, error, invertchoice, complete
+from accessoryfn import chooseinput, error, invertchoice, complete, preview
 import datetime
 
 
@@ -40,6 +40,8 @@ class BrightfieldAdhesionGUI(tk.Toplevel):
         self.minintensity = tk.IntVar(value=1000)  # minimum intensity of cells
         self.invert = tk.BooleanVar(value='True')  # invert parameter, true = dark on light, false = light on dark
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
+        self.detections = preview.LRU(16)  # Detection images by file and parameters
 
         # Widgets
         self.title(name + " brightfield adhesion analysis")
@@ -242,13 +244,13 @@ class BrightfieldAdhesionGUI(tk.Toplevel):
         if self.maxdiameter.get() % 2 == 0:
             error.ErrorWindow(message='Maximum diameter parameter\nmust be odd integer > 1')
         else:
-            self.displayimg(self.filelist[self.img_scale.get() - 1])
+            self.displaylater(self.filelist[self.img_scale.get() - 1])
 
     # Function calls display function after each change in parameters
     def changeparameter_window(self, event):
         """As user interactively adjusts window size, the center display updates"""
 
-        self.displayimg(self.filelist[self.img_scale.get() - 1])
+        self.displaylater(self.filelist[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -258,7 +260,7 @@ class BrightfieldAdhesionGUI(tk.Toplevel):
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
-        self.displayimg(self.filelist[self.img_scale.get()-1])
+        self.displaylater(self.filelist[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -271,10 +273,11 @@ class BrightfieldAdhesionGUI(tk.Toplevel):
         name_img = os.path.basename(filename).split(".")[0]
         self.name_label.config(text=name_img)
 
-        img = cv2.imread(filename)
+        img = preview.imread(filename)  # Cached, not re-read as parameters change
 
-        # Detect cells within main image
-        manip = self.celldetect(img)
+        # Detect cells within main image, cached by parameters
+        key = (filename, self.maxdiameter.get(), self.minintensity.get(), self.invert.get())
+        manip = self.detections.get(key, lambda: self.celldetect(img))
 
         # Resize both images:
         imgr, manipr = self.resizeimg(img, manip)
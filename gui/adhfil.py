@@ -23,7 +23,7 @@ from skimage import measure
 from skimage.feature import corner_harris, corner_peaks
 from help import adhfilopodia as hp
 from analysis import adhfil as an
-from accessoryfn import chooseinput, error, fluor_single, complete
+from accessoryfn import chooseinput, error, fluor_single, complete, preview
 import datetime
 
 
@@ -50,6 +50,8 @@ class FilAdhesionGUI(tk.Toplevel):
         self.min_distance = tk.IntVar(value=5)  # minimum distance between peaks
         self.ps = tk.StringVar(value='gs')  # Primary stain color, default grayscale (r, g, b, gs)
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
+        self.detections = preview.LRU(16)  # Detection images by file and parameters
 
         # Widgets
         self.title(name + " fluorescent filopodia analysis")
@@ -330,13 +332,13 @@ class FilAdhesionGUI(tk.Toplevel):
     def changeparameter(self):
         """As user interactively edits a parameter, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get() - 1])
+        self.displaylater(filelist[self.img_scale.get() - 1])
 
     # Function calls display function after each change in parameters
     def changeparameter_window(self, event):
         """As user interactively adjusts window size, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get() - 1])
+        self.displaylater(filelist[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -347,7 +349,7 @@ class FilAdhesionGUI(tk.Toplevel):
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get()-1])
+        self.displaylater(filelist[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -360,10 +362,12 @@ class FilAdhesionGUI(tk.Toplevel):
         name_img = os.path.basename(filename).split(".")[0]
         self.name_label.config(text=name_img)
 
-        img = cv2.imread(filename)
+        img = preview.imread(filename)  # Cached, not re-read as parameters change
 
-        # Detect cells within main image
-        manip = self.celldetect(img)
+        # Detect cells within main image, cached by parameters
+        key = (filename, self.ps.get(), self.mainthresh.get(), self.minarea.get(), self.maxarea.get(),
+               self.k.get(), self.tr.get(), self.min_distance.get())
+        manip = self.detections.get(key, lambda: self.celldetect(img))
 
         # Resize both images:
         imgr, manipr = self.resizeimg(img, manip)
@@ -21,7 +21,7 @@ import pandas as pd
 from skimage import measure
 from help import adhfluorhelp as hp
 from analysis import adhfluor as an
-from accessoryfn import chooseinput, error, fluor_ps, complete
+from accessoryfn import chooseinput, error, fluor_ps, complete, preview
 import datetime
 
 
@@ -47,6 +47,8 @@ class FluorAdhesionGUI(tk.Toplevel):
         self.ps = tk.StringVar(value='gs')  # Primary stain color, default grayscale (r, g, b, gs)
         self.fs = tk.StringVar(value='n')  # Functional stain color, default none (r, g, b, n)
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
+        self.detections = preview.LRU(16)  # Detection images by file and parameters
 
         # Widgets
         self.title(name + " fluorescent adhesion analysis")
@@ -295,12 +297,12 @@ class FluorAdhesionGUI(tk.Toplevel):
     def changeparameter(self):
         """As user interactively edits a parameter, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get() - 1])
+        self.displaylater(filelist[self.img_scale.get() - 1])
 
     def changeparameter_window(self, event):
         """As user interactively adjusts window size, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get() - 1])
+        self.displaylater(filelist[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -311,7 +313,7 @@ class FluorAdhesionGUI(tk.Toplevel):
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get()-1])
+        self.displaylater(filelist[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -324,13 +326,16 @@ class FluorAdhesionGUI(tk.Toplevel):
         name_img = os.path.basename(filename).split(".")[0]
         self.name_label.config(text=name_img)
 
-        img = cv2.imread(filename)
+        img = preview.imread(filename)  # Cached, not re-read as parameters change
 
-        # Detect cells within main image
-        manip = self.celldetect(img)
+        # Detect cells within main image, large images on a downscaled proxy, cached by parameters
+        small, scale = preview.proxy(img)
+        key = (filename, self.ps.get(), self.fs.get(), self.mainthresh.get(), self.fnthresh.get(),
+               self.minarea.get(), self.maxarea.get())
+        manip = self.detections.get(key, lambda: self.celldetect(small, scale))
 
         # Resize both images:
-        imgr, manipr = self.resizeimg(img, manip)
+        imgr, manipr = self.resizeimg(small, manip)
         imgr_rgb = cv2.cvtColor(imgr, cv2.COLOR_BGR2RGB)  # Match layers to pillow convention
 
         # Add images to canvas
@@ -341,10 +346,11 @@ class FluorAdhesionGUI(tk.Toplevel):
         self.manipr_tk = manipr_tk  # A fix to keep image displayed
         self.manip_canvas.create_image(0, 0, anchor='nw', image=manipr_tk)
 
-    def celldetect(self, img):
+    def celldetect(self, img, scale=1.):
         """Returns original image with threshold(s) applied and cells detected
 
-        Primary stain: returned as white, functional stain: returned as magenta, detected events: cyan circle"""
+        Primary stain: returned as white, functional stain: returned as magenta, detected events: cyan circle
+        scale is the factor img was downscaled by for preview, area limits are scaled to match"""
 
         # Find primary color layer, set up color for labeling images
         # Here use an 'RGB' color scheme
@@ -389,8 +395,8 @@ class FluorAdhesionGUI(tk.Toplevel):
         p_df = pd.DataFrame(p_props)
         if p_df is not None:  # If any cells found
             # Filter by min, max size (two step)
-            p_df_filt = p_df[p_df['area'] > self.minarea.get()]
-            p_df_filt = p_df_filt[p_df_filt['area'] < self.maxarea.get()]
+            p_df_filt = p_df[p_df['area'] > self.minarea.get() * scale ** 2]
+            p_df_filt = p_df_filt[p_df_filt['area'] < self.maxarea.get() * scale ** 2]
 
             # Label each cell event within image (cyan)
             for i in list(zip(p_df_filt['centroid-1'], p_df_filt['centroid-0'])):
@@ -13,14 +13,13 @@ import tkinter.font as font
 import os
 import cv2
 # import pims
-import trackpy as tp
 import warnings
 warnings.filterwarnings("ignore", module="trackpy")
 from PIL import Image, ImageTk
 import numpy as np
 from help import adhvideohelp as hp
 from analysis import adhvideo as an
-from accessoryfn import chooseinput, error, invertchoice, complete
+from accessoryfn import chooseinput, error, invertchoice, complete, videoframes, preview, featurecache, labeledexport
 import datetime
 
 
@@ -44,12 +43,15 @@ class AdhesionVideoGUI(tk.Toplevel):
         self.maxintensity = tk.IntVar(value=2500)
         self.invert = tk.BooleanVar(value='True')  # invert parameter, true = dark on light, false = light on dark
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
         # To indicate if numerical data has been exported
         self.analysis_exp_bool = tk.BooleanVar(value=False)
         self.x = tk.IntVar(value=0)  # ROI
         self.y = tk.IntVar(value=0)
         self.w = tk.IntVar(value=0)
         self.h = tk.IntVar(value=0)
+        self.expformat = tk.StringVar(value=labeledexport.DEFAULT)  # Labeled frames as video or images
+        self.source = None  # Identifies the loaded frames for reusing located features
 
         # Widgets
         # self.title(name + " brightfield deformability analysis")
@@ -61,6 +63,9 @@ class AdhesionVideoGUI(tk.Toplevel):
         # Selected single file name label
         self.single_label = tk.Label(self, text="")
         self.single_label.grid(row=0, column=2, columnspan=2, padx=5, pady=5, sticky='W')
+        # Input folder of images button, each image is one frame
+        dir_images = tk.Button(self, text="Select folder of images", command=self.dirfile)
+        dir_images.grid(row=0, column=4, padx=5, pady=5)
 
         # Set parameters label
         setparam_label = tk.Label(self, text="Set parameters")
@@ -192,6 +197,9 @@ class AdhesionVideoGUI(tk.Toplevel):
         expimg_button = tk.Button(
             self, text="Export labeled images", command=self.expimgs)
         expimg_button.grid(row=5, column=4, padx=5, pady=5)
+        # Labeled image format option menu
+        expformat_menu = tk.OptionMenu(self, self.expformat, *labeledexport.FORMATS)
+        expformat_menu.grid(row=6, column=4, padx=5, pady=5)
 
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
@@ -227,7 +235,18 @@ class AdhesionVideoGUI(tk.Toplevel):
     def singlefile(self):
         """Call a toplevel GUI to choose one video file"""
 
-        filename = chooseinput.videofile()
+        self.loadframes(chooseinput.videofile(stacks=True))
+
+    # Choose folder of images, read as frames of a single video
+    def dirfile(self):
+        """Call a toplevel GUI to choose a folder of images, one image per frame"""
+
+        self.loadframes(chooseinput.imgsequence())
+
+    # Read frames from a video, frame stack or folder of images
+    def loadframes(self, filename):
+        """Read frames from any frame source and set up display"""
+
         self.filelist = [filename]
         # self.inputtype.set(True)
         self.single_label.config(text=os.path.basename(filename))
@@ -242,17 +261,11 @@ class AdhesionVideoGUI(tk.Toplevel):
         # frames = gray(pims.PyAVReaderTimed(filename))
         # frame_count = len(frames)
 
-        cap = cv2.VideoCapture(filename)  # Capture video
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # Record number of frames within video
-
-        fc = 0
-        frames = []
-        ret = True  # Initialize "true" value for video processing loop
-        while fc < frame_count and ret:
-            ret, frame = cap.read()  # Read the video capture object
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)  # Read as gray/one layer
-            frames.append(gray)
-            fc += 1  # Update count after frame is processed
+        # Read video, frame stack (.npy, multipage .tif) or folder of images
+        video = videoframes.openframes(filename)
+        frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in video]  # Read as gray/one layer
+        frame_count = len(frames)
+        video.release()
 
         # Choose ROI
         # From last window, sometimes video quality can be spotty as recording starts
@@ -266,6 +279,9 @@ class AdhesionVideoGUI(tk.Toplevel):
 
             self.frames_crop.append(frame_crop.copy())
 
+        # Identify these frames once, located features are kept under it
+        self.source = featurecache.source(self.filelist[0], self.x.get(), self.y.get(), self.w.get(), self.h.get())
+
         # Configure scale
         self.img_scale['to'] = frame_count
         self.img_scale.grid(row=7, column=2, columnspan=2, padx=5, pady=5)
@@ -305,12 +321,12 @@ class AdhesionVideoGUI(tk.Toplevel):
         if self.maxdiameter.get() % 2 == 0:
             error.ErrorWindow(message='Maximum diameter parameter\nmust be odd integer > 1')
         else:
-            self.displayimg(self.frames_crop[self.img_scale.get() - 1])
+            self.displaylater(self.frames_crop[self.img_scale.get() - 1])
 
     def changeparameter_window(self, event):
         """As user interactively adjusts window size, the center display updates"""
 
-        self.displayimg(self.frames_crop[self.img_scale.get() - 1])
+        self.displaylater(self.frames_crop[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -320,7 +336,7 @@ class AdhesionVideoGUI(tk.Toplevel):
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
-        self.displayimg(self.frames_crop[self.img_scale.get()-1])
+        self.displaylater(self.frames_crop[self.img_scale.get()-1])
 
     # Select colors
     def invertchoice(self):
@@ -346,7 +362,7 @@ class AdhesionVideoGUI(tk.Toplevel):
         img = self.frames_crop[frame_number-1]
 
         # Detect cells within main image
-        manip = self.celldetect(img)
+        manip = self.celldetect(img, frame_number-1)
 
         # Resize both images:
         imgr, manipr = self.resizeimg(img, manip)
@@ -360,8 +376,8 @@ class AdhesionVideoGUI(tk.Toplevel):
         self.manipr_tk = manipr_tk  # A fix to keep image displayed
         self.manip_canvas.create_image(0, 0, anchor='nw', image=manipr_tk)
 
-    def celldetect(self, img):
-        """Returns original image with parameters applied and cells detected"""
+    def celldetect(self, img, i):
+        """Returns original image with parameters applied and cells detected, i is the frame index"""
 
         # Convert image back to color to label with circles
         img_to_label = np.dstack((img, img, img))
@@ -369,7 +385,8 @@ class AdhesionVideoGUI(tk.Toplevel):
         # Locate particles (ideally, cells) using Trackpy
         # See walkthrough: http://soft-matter.github.io/trackpy/dev/tutorial/walkthrough.html
         # Invert false - bg removal
-        f = tp.locate(img, self.maxdiameter.get(), minmass=self.minintensity.get(), invert=False)
+        # Features are kept per frame and reused by the final analysis
+        f = featurecache.locate(self.source, img, i, self.maxdiameter.get(), minmass=self.minintensity.get(), invert=False)
         # Filter by maximum mass
         f = f[f['mass'] < self.maxintensity.get()]
 
@@ -417,7 +434,8 @@ class AdhesionVideoGUI(tk.Toplevel):
                     self.x.get(),
                     self.y.get(),
                     self.w.get(),
-                    self.h.get()
+                    self.h.get(),
+                    self.source
                     )
     # From analysis, call export functions if final analysis has already been run
     def expall(self):
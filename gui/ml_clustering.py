@@ -4,6 +4,7 @@ Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory Univers
 Last updated: 2022-10-26 for version 1.0b1
 
 Portion of machine learning application, window to finalize clustering analysis
+In out-of-core mode the dataset is clustered in chunks from disk, see accessoryfn/outofcore.py
 
 """
 
@@ -16,19 +17,20 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from statsmodels.graphics.mosaicplot import mosaic
 from sklearn.cluster import KMeans
-from sklearn import metrics
+from sklearn.preprocessing import StandardScaler
 import itertools
 from PIL import Image, ImageTk, ImageDraw
 from help import mlhelp as hp
-from accessoryfn import complete
+from accessoryfn import complete, pairplots, clusterquality, outofcore, mlmodel
 import os
 
 
 class ApplyClustering(tk.Toplevel):
-    def __init__(self, df, dirname, final_features, n_clusters):
+    def __init__(self, df, dirname, final_features, n_clusters, store=None):
         super().__init__()
 
-        self.df = df
+        self.df = df  # Sample of dataset in out-of-core mode
+        self.store = store  # Cached dataset folder, out-of-core mode only
         self.dirname = dirname
         self.final_features = final_features
         self.n_clusters = n_clusters
@@ -72,7 +74,10 @@ class ApplyClustering(tk.Toplevel):
         self.columnconfigure(1, weight=1)
 
         # Run analysis, display mosaic plot
-        self.ml_analysis()
+        if self.store is not None:
+            self.ml_analysis_outofcore()
+        else:
+            self.ml_analysis()
 
         # Tkinter protocol for x close
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -86,9 +91,16 @@ class ApplyClustering(tk.Toplevel):
         # Drop any rows with any NaN values
         df_X = df_X.dropna()
 
+        # Standardize features so no feature dominates because of its units, as in the scree plot
+        scaler = StandardScaler().fit(df_X.to_numpy())
+        X_scaled = scaler.transform(df_X.to_numpy())
+
         # Partition clusters
         kmeans = KMeans(n_clusters=self.n_clusters, random_state=100)
-        kmeans_labels = kmeans.fit_predict(df_X)  # Note each label will be an integer, starting at 0 (0, 1, 2.. etc.)
+        kmeans_labels = kmeans.fit_predict(X_scaled)  # Note each label will be an integer, starting at 0 (0, 1, 2.. etc.)
+
+        # Save scaling and centroids so new samples can be assigned to these clusters later
+        mlmodel.save(self.dirname + '_clustering-model.joblib', self.final_features, scaler, kmeans)
 
         df_final = df_X.copy()
         df_final.insert(0, 'Sample', self.df['Sample'])
@@ -122,29 +134,74 @@ class ApplyClustering(tk.Toplevel):
         count_series_df = df_size.to_frame(name='size').reset_index()
         count_series_df.to_excel(writer, sheet_name='Counts')
 
-        # Silhouette score
-        silhouette_coefficient = metrics.silhouette_score(df_X, kmeans_labels)
-        dict_sc = {'Silhouette coefficient': silhouette_coefficient}  # Dict
-        dict_df = pd.DataFrame(dict_sc, index=[0])  # Dataframe
+        # Silhouette score, sampled for large populations, and indices calculated on all events
+        dict_df = clusterquality.quality(X_scaled, kmeans_labels)  # Dataframe, includes method used
+        dict_df.to_excel(writer, sheet_name='Sil. coeff.', index=False)
+
+        writer.save()
+        writer.close()
+
+        self.savegraphs(df_final, df_size)
+
+    def ml_analysis_outofcore(self):
+        """Cluster the cached dataset in chunks, statistics are accumulated chunk by chunk"""
+
+        # Scaling and centroids fit on every event, read in chunks
+        scaler = outofcore.fit_scaler(self.store, self.final_features)
+        kmeans = outofcore.fit_model(self.store, self.final_features, scaler, self.n_clusters, self.df)
+
+        # Save scaling and centroids so new samples can be assigned to these clusters later
+        mlmodel.save(self.dirname + '_clustering-model.joblib', self.final_features, scaler, kmeans)
+
+        # Label every event, labeled data is too large for Excel so it's saved as .csv
+        csvname = self.dirname + '_clustering_labeled-data.csv'
+        stats, scaled_mean, n = outofcore.assign(self.store, self.final_features, scaler, kmeans, csvname)
+        df_min, df_mean, df_max, df_std, count_series_df = stats.tables()
+
+        # Write all data to excel
+        writer = pd.ExcelWriter(self.dirname + '_clustering.xlsx', engine='openpyxl')
+
+        # Labeled data
+        note = pd.DataFrame({'Labeled data': ['Saved as ' + csvname + ', ' + str(int(n.sum())) + ' events']})
+        note.to_excel(writer, sheet_name='Labeled data', index=False)
+
+        # Descriptive statistics - min, mean, max, stdev for all clusters (4 sheets)
+        df_min.to_excel(writer, sheet_name='Min. by cluster')
+        df_mean.to_excel(writer, sheet_name='Mean by cluster')
+        df_max.to_excel(writer, sheet_name='Max by cluster')
+        df_std.to_excel(writer, sheet_name='Stdev. by cluster')
+
+        # Cluster counts
+        count_series_df.to_excel(writer, sheet_name='Counts')
+
+        # Silhouette score on sample, indices calculated on all events
+        dict_df = outofcore.quality(self.store, self.final_features, scaler, kmeans, scaled_mean, n, self.df)
         dict_df.to_excel(writer, sheet_name='Sil. coeff.', index=False)
 
         writer.save()
         writer.close()
 
+        # Graphs from labeled sample, mosaic plot from counts of all events
+        df_final = self.df[['Sample'] + self.final_features].dropna()
+        df_final['Label'] = kmeans.predict(scaler.transform(df_final[self.final_features].to_numpy()))
+        self.savegraphs(df_final, count_series_df.set_index(['Sample', 'Label'])['size'])
+
+    def savegraphs(self, df_final, df_size):
+        """Save pairplot, pairwise scatter plots and mosaic plot (from counts by sample and label)"""
+
         # Display and save a pairplot showing relationships between features
+        # Large populations are drawn from a fixed subsample so export time stays bounded
         sns.color_palette(palette='bright')
-        sns.pairplot(df_final, hue="Label")
-        plt.savefig(self.dirname + '_pairplot.png', dpi=300)  # Save in results folder
-
-        plt.close()
+        pairplots.savepairplot(df_final, self.dirname + '_pairplot.png', hue="Label")  # Save in results folder
 
         # Also create individual pairwise graphs
         # Create a 2D scatter plot of labels from all combinations of two features
         graph_count = 1  # For saving figures
+        df_scatter = pairplots.subsample(df_final, pairplots.PAIRPLOT_CAP, hue='Label')  # Bounded number of points
 
         for pair in itertools.combinations(self.final_features, 2):
             plt.figure(figsize=(6,4))
-            sns.scatterplot(data=df_final, x=pair[0], y=pair[1], hue='Label',
+            sns.scatterplot(data=df_scatter, x=pair[0], y=pair[1], hue='Label',
                             style='Sample')  # Color: sample, shape: label
             plt.xlabel(pair[0])
             plt.ylabel(pair[1])
@@ -155,7 +212,7 @@ class ApplyClustering(tk.Toplevel):
 
         plt.figure()
 
-        mosaic(df_final, ['Sample', 'Label'])
+        mosaic(df_size)
 
         plt.tight_layout()
         plt.savefig(self.dirname + '_mosaic-plot.png', dpi=300)  # Save in results folder
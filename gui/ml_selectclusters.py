@@ -4,29 +4,32 @@ Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory Univers
 Last updated: 2022-10-26 for version 1.0b1
 
 Portion of machine learning application, window to assist user in selecting number of clusters for analysis
+The scree plot is calculated in the background and drawn as each number of clusters finishes, see accessoryfn/scree.py
 
 """
 
 import tkinter as tk
 import tkinter.font as font
 from tkinter import messagebox
-import pandas as pd
+import threading
+import queue
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from PIL import Image, ImageTk, ImageDraw
 from help import mlhelp as hp
 import os
-from accessoryfn import error
+from accessoryfn import error, scree
 from gui import ml_clustering as cl
 
 
 class SelectNClusters(tk.Toplevel):
-    def __init__(self, df, dirname, final_features):
+    def __init__(self, df, dirname, final_features, store=None):
         super().__init__()
 
-        self.df = df
+        self.df = df  # Sample of dataset in out-of-core mode
         self.dirname = dirname
+        self.store = store  # Cached dataset folder, out-of-core mode only
         self.final_features = final_features
 
         name = "iCLOTS"
@@ -35,6 +38,12 @@ class SelectNClusters(tk.Toplevel):
 
         # Variables
         self.clusters = tk.IntVar(value=2)
+        large = len(self.df) > scree.SCREE_CAP
+        self.method = tk.StringVar(value=scree.METHODS[1] if large else scree.METHODS[0])  # Mini-batch if large
+        self.warm_start = tk.BooleanVar(value=False)
+        self.sse = {}  # Number of clusters: SSE, filled in as fits finish
+        self.results = queue.Queue()  # Fits reported from background thread
+        self.running = False
 
         # Widgets
         self.title(name + " machine learning")
@@ -53,9 +62,23 @@ class SelectNClusters(tk.Toplevel):
                                          "mathematically significant clusters to retain")
         info_label.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
 
+        # Method label
+        method_label = tk.Label(self, text="Scree plot method")
+        method_label.grid(row=3, column=0, padx=5, pady=5)
+        # Method option menu
+        method_menu = tk.OptionMenu(self, self.method, *scree.METHODS)
+        method_menu.grid(row=3, column=1, padx=5, pady=5)
+
+        # Warm start check box
+        warm_check = tk.Checkbutton(self, text="Warm start from previous\nnumber of clusters", variable=self.warm_start)
+        warm_check.grid(row=4, column=0, padx=5, pady=5)
+        # Recalculate button
+        recalc_button = tk.Button(self, text="Recalculate scree plot", command=self.displaygraph)
+        recalc_button.grid(row=4, column=1, padx=5, pady=5)
+
         # Rotation angle label
         angle_label = tk.Label(self, text="n clusters")
-        angle_label.grid(row=3, column=0, padx=5, pady=5)
+        angle_label.grid(row=5, column=0, padx=5, pady=5)
         # Number of clusters spinbox
         cluster_spin = tk.Spinbox(
             self,
@@ -66,21 +89,21 @@ class SelectNClusters(tk.Toplevel):
             width=10,
             wrap=True
         )
-        cluster_spin.grid(row=3, column=1, padx=5, pady=5)
+        cluster_spin.grid(row=5, column=1, padx=5, pady=5)
 
         # Help, submit, and quit button
 
         # Help button
         help_button = tk.Button(self, text="Tutorial", command=self.help)
-        help_button.grid(row=5, column=0, padx=5, pady=5)
+        help_button.grid(row=7, column=0, padx=5, pady=5)
 
         # Submit button
         submit_button = tk.Button(self, text="Submit features", command=self.select_clusters)
-        submit_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
+        submit_button.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
 
         # Quit
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=5, column=1, padx=5, pady=5)
+        quit_button.grid(row=7, column=1, padx=5, pady=5)
 
         # Row and column configures
         self.rowconfigure(0, weight=1)
@@ -89,6 +112,8 @@ class SelectNClusters(tk.Toplevel):
         self.rowconfigure(3, weight=1)
         self.rowconfigure(4, weight=1)
         self.rowconfigure(5, weight=1)
+        self.rowconfigure(6, weight=1)
+        self.rowconfigure(7, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -99,37 +124,82 @@ class SelectNClusters(tk.Toplevel):
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     def displaygraph(self):
-        """Display scree plot based on categories from previous window"""
-
-        graphs = plt.figure(figsize=(6, 4), dpi=80)
-
-        # Create scree plot
-        sse = {}
-        df_scree = self.df[self.final_features].dropna()  # Leave original X set unchanged
-        for k in range(1, 12):  # Range of 1 to 12 clusters, could easily edit
-            kmeans = KMeans(n_clusters=k, max_iter=1000).fit(df_scree)
-            # print(data["clusters"])
-            sse[k] = kmeans.inertia_  # Inertia: Sum of distances of samples to their closest cluster center
-
-        plt.plot(list(sse.keys()), list(sse.values()))
-        plt.xlabel("Number of clusters")
-        plt.ylabel("SSE")
-
-        plt.tight_layout()
-        plt.savefig(self.dirname + '_scree-plot.png', dpi=300)  # Save in results folder
+        """Start calculating scree plot based on categories from previous window, points are drawn as they finish"""
+
+        if self.running:  # One calculation at a time
+            return
+
+        self.running = True
+        self.sse = {}
+        X, n_total = scree.prepare(self.df, self.final_features)  # Leave original X set unchanged
+        args = (X, n_total, scree.KS, self.method.get(), self.warm_start.get(), self.results.put)
+        threading.Thread(target=self.calculate, args=args, daemon=True).start()
+
+        self.drawgraph()
+        self.after(100, self.poll)
+
+    def calculate(self, *args):
+        """Background thread, fits are reported through the results queue, None when finished"""
+
+        try:
+            scree.scree(*args)
+        except Exception as e:  # Shown once calculation ends
+            self.results.put(e)
+        self.results.put(None)
+
+    def poll(self):
+        """Add any finished fits to the plot"""
+
+        finished = False
+        new = False
+        while not self.results.empty():
+            result = self.results.get()
+            if result is None:
+                finished = True
+            elif isinstance(result, Exception):
+                error.ErrorWindow(message='Scree plot could not be calculated:\n' + str(result))
+            else:
+                k, sse = result
+                self.sse[k] = sse  # Inertia: Sum of distances of samples to their closest cluster center
+                new = True
+
+        if not self.winfo_exists():
+            return
+        if new or finished:
+            self.drawgraph(save=finished)
+        if finished:
+            self.running = False
+        else:
+            self.after(100, self.poll)
+
+    def drawgraph(self, save=False):
+        """Draw scree plot of fits finished so far, saved once all have finished"""
+
+        graphs = Figure(figsize=(6, 4), dpi=80)
+        FigureCanvasAgg(graphs)
+        ax = graphs.add_subplot(1, 1, 1)
+
+        ks = sorted(self.sse)
+        ax.plot(ks, [self.sse[k] for k in ks], marker='o')
+        ax.set_xlim(0.5, max(scree.KS) + 0.5)
+        ax.set_xlabel("Number of clusters")
+        ax.set_ylabel("SSE")
+        if len(ks) < len(scree.KS):
+            ax.set_title("Calculating (%d of %d)" % (len(ks), len(scree.KS)))
+
+        graphs.tight_layout()
+        if save:
+            graphs.savefig(self.dirname + '_scree-plot.png', dpi=300)  # Save in results folder
 
         graphs.canvas.draw()
-        graphimg = np.frombuffer(graphs.canvas.tostring_rgb(), dtype=np.uint8)
-        graphimg = graphimg.reshape(graphs.canvas.get_width_height()[::-1] + (3,))
+        graphimg = np.asarray(graphs.canvas.buffer_rgba())[:, :, :3]
 
         graphimgr_tk = ImageTk.PhotoImage(image=Image.fromarray(graphimg))
         self.graphimgr_tk = graphimgr_tk  # Some fix?
         self.img_canvas.create_image(0, 0, anchor='nw', image=graphimgr_tk)
 
-        plt.close()
-
     def select_clusters(self):
-        cl.ApplyClustering(self.df, self.dirname, self.final_features, self.clusters.get())  # Raise graph window
+        cl.ApplyClustering(self.df, self.dirname, self.final_features, self.clusters.get(), self.store)  # Raise graph window
         print('test')
 
     # Open help window
@@ -4,6 +4,8 @@ Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory Univers
 Last updated: 2022-10-26 for version 1.0b1
 
 Portion of machine learning application, window to assist user in selecting features for analysis
+The correlation matrix is calculated from per-file sums cached with the dataset, see accessoryfn/correlation.py
+Above ANNOT_MAX features the heatmap is drawn without values in each cell
 
 """
 
@@ -16,16 +18,20 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from PIL import Image, ImageTk, ImageDraw
 from help import mlhelp as hp
-from accessoryfn import error
+from accessoryfn import error, correlation
 from gui import ml_selectclusters as snc
 
+ANNOT_MAX = 12  # Max. features for values written in heatmap cells
+
 
 class SelectFeatures(tk.Toplevel):
-    def __init__(self, df, dirname):
+    def __init__(self, df, dirname, store=None, outofcore=False):
         super().__init__()
 
-        self.df = df
+        self.df = df  # Sample of dataset in out-of-core mode
         self.dirname = dirname
+        self.store = store  # Cached dataset folder, given in both in-memory and out-of-core mode
+        self.outofcore = outofcore
         self.final_features = []  # Init.
 
         name = "iCLOTS"
@@ -45,9 +51,7 @@ class SelectFeatures(tk.Toplevel):
         self.img_canvas.grid(row=1, column=0, columnspan=3, padx=5, pady=5)
 
         # Find common numerical columns that may have NaN values - rows with NaN values are removed in a later step
-        drop_na_df = self.df.dropna()
-        numeric_df = drop_na_df[drop_na_df._get_numeric_data().columns]
-        categories = numeric_df.columns
+        categories = self.df._get_numeric_data().columns  # Column types, no copy of data needed
 
         # Set of check boxes
         self.var_categories = {}
@@ -94,10 +98,14 @@ class SelectFeatures(tk.Toplevel):
 
         graphs = plt.figure(figsize=(6, 4), dpi=80)
 
-        # Add image name to image name label
-        df_X = self.df[categories]  # Numerical data only, will also be used for clustering
-        corrMatrix = df_X.corr()
-        sns.heatmap(corrMatrix, annot=True)
+        # Correlation of all events from per-file sums cached with the stored dataset, so added files only
+        # calculate their own sums, calculated from the dataframe only if no store was given
+        if self.store is not None:
+            corrMatrix = correlation.storecorr(self.store, categories)
+        else:
+            corrMatrix = correlation.dfcorr(self.df, categories)
+        annot = len(categories) <= ANNOT_MAX  # Cell values unreadable and slow to draw for many features
+        sns.heatmap(corrMatrix, annot=annot, fmt='.2g')
         plt.tight_layout()
         plt.savefig(self.dirname + '_correlation-matrix.png', dpi=300)  # Save in results folder
 
@@ -121,7 +129,7 @@ class SelectFeatures(tk.Toplevel):
             error.ErrorWindow(message='Please choose 2 or more features')
         else:
             # Call next window: correlation matrix/variable selection
-            snc.SelectNClusters(self.df, self.dirname, self.final_features)  # Raise graph window
+            snc.SelectNClusters(self.df, self.dirname, self.final_features, self.store if self.outofcore else None)  # Raise graph window
             print('test')
 
 
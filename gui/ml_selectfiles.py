@@ -4,6 +4,9 @@ Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory Univers
 Last updated: 2022-10-26 for version 1.0b1
 
 Portion of machine learning application, window to assist user in selecting files for analysis
+Files are read in parallel and the combined dataset is cached for re-runs, see accessoryfn/mldata.py
+Out-of-core mode passes a stratified sample and the cached dataset on, for datasets larger than memory
+New samples can also be assigned to the clusters of a saved clustering model, see accessoryfn/mlmodel.py
 
 """
 
@@ -12,11 +15,8 @@ import tkinter.font as font
 from tkinter import messagebox
 from tkinter import filedialog
 import os
-import glob
-import pandas as pd
-import openpyxl
 from help import mlhelp as hp
-from accessoryfn import error
+from accessoryfn import error, complete, columnstore, mldata, mlmodel, outofcore
 from gui import ml_selectfeatures as sf
 import datetime
 
@@ -34,6 +34,8 @@ class SelectExcel(tk.Toplevel):
 
         self.df = []
         self.dirname = []
+        self.store = None  # Cached dataset folder
+        self.outofcore = tk.BooleanVar(value=False)
 
         # Widgets
         self.title(name + " machine learning")
@@ -45,28 +47,40 @@ class SelectExcel(tk.Toplevel):
 
         # Instructions label
         instructionslabel = tk.Label(self, text="Please select a single file folder including all datasets.\n"
-                                                "Each data set should be represented by a single Excel file.\n"
+                                                "Each data set should be represented by a single Excel file\n"
+                                                "(or a Parquet/CSV export of the same table).\n"
                                                 "Avoid spaces or punctuation in Excel sheet names.\n"
                                                 "Each Excel file should contain one sheet only.\nEach line of the sheet should "
                                                 "describe one data point with multiple metrics.")
         instructionslabel.grid(row=1, column=0, columnspan=2, padx=10, pady=10)
 
+        # Out-of-core mode check box
+        outofcore_check = tk.Checkbutton(self, text="Out-of-core mode (datasets larger than memory)",
+                                         variable=self.outofcore)
+        outofcore_check.grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+
         # Input folder of files button
         folder_button = tk.Button(self, text="Select folder of Excel file(s)", command=self.choose_folder)
-        folder_button.grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+        folder_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+
+        # Assign new files to saved clusters button
+        assign_button = tk.Button(self, text="Assign new files to saved clusters", command=self.assign_folder)
+        assign_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
 
         # Help button
         help_button = tk.Button(self, text="Tutorial", command=self.help)
-        help_button.grid(row=3, column=0, padx=5, pady=5)
+        help_button.grid(row=5, column=0, padx=5, pady=5)
 
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=3, column=1, padx=5, pady=5)
+        quit_button.grid(row=5, column=1, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
         self.rowconfigure(2, weight=1)
         self.rowconfigure(3, weight=1)
+        self.rowconfigure(4, weight=1)
+        self.rowconfigure(5, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -79,7 +93,7 @@ class SelectExcel(tk.Toplevel):
 
         inputdirectory = filedialog.askdirectory()  # Select directory
 
-        filelist = glob.glob(inputdirectory + "/*.xlsx")
+        filelist = mldata.datafiles(inputdirectory)
 
         # Create results file, change to directory directory
         now = datetime.datetime.now()
@@ -89,34 +103,65 @@ class SelectExcel(tk.Toplevel):
 
         if len(filelist) >= 1:
 
-            self.df = pd.DataFrame()  # Initial holder
             self.dirname = os.path.basename(inputdirectory)
 
-            # Combine data from all sheets into a single dataframe
-            for filename in filelist:
-
-                trigger_error = False  # Keep next window from opening if too many sheets included
-                # Check number of sheet names
-                xl = openpyxl.load_workbook(filename)
-                if len(xl.sheetnames) != 1:
-                    error.ErrorWindow(message='Too many or two few sheets included in:\n' + filename)
-                    trigger_error = True
+            # Combine data from all files into a single dataframe, files read in parallel
+            self.config(cursor='watch')
+            self.update()
+            # Combined dataset is cached in both modes, disk use is bounded by mldata.MAX_MB
+            self.store, errors = mldata.build_store(filelist)
+            if len(errors) == 0:
+                if self.outofcore.get():  # Dataset stays on disk, later windows use a stratified sample
+                    self.df = mldata.sample(self.store, outofcore.SAMPLE)
                 else:
-                    # Read excel
-                    sheet = pd.read_excel(filename, engine='openpyxl')
+                    self.df = columnstore.read(self.store)
+            self.config(cursor='')
 
-                    samplename = os.path.basename(filename).split('.')[0]  # Sample name: name of excel sheet (remove .xlsx)
-                    sheet['Sample'] = samplename  # Add as column
-                    self.df = self.df.append(sheet, ignore_index=True)
-
-            if trigger_error is False:
+            if len(errors) > 0:  # Keep next window from opening if any file can't be used
+                error.ErrorWindow(message='\n'.join(errors[:5]))
+            else:
                 # Call next window: correlation matrix/variable selection
                 # print(output_folder)
                 # sf.SelectFeatures(self.df, self.dirname, output_folder)  # Raise graph window
-                sf.SelectFeatures(self.df, self.dirname)
+                sf.SelectFeatures(self.df, self.dirname, self.store, self.outofcore.get())
+
+        else:
+            error.ErrorWindow(message='No Excel, Parquet or CSV files included')
+
+    def assign_folder(self):
+        """Label a folder of new sample files against a saved clustering model, without clustering again"""
+
+        modelfile = filedialog.askopenfilename(title='Select saved clustering model',
+                                               filetypes=[("Clustering model", "*.joblib")])
+        if not modelfile:
+            return
+        try:
+            saved = mlmodel.load(modelfile)
+        except Exception as e:
+            error.ErrorWindow(message='Clustering model could not be loaded:\n' + str(e))
+            return
+
+        inputdirectory = filedialog.askdirectory(title='Select folder of new files')  # Select directory
+        filelist = mldata.datafiles(inputdirectory)
+        if len(filelist) == 0:
+            error.ErrorWindow(message='No Excel, Parquet or CSV files included')
+            return
+
+        # Create results file, change to directory directory
+        now = datetime.datetime.now()
+        output_folder = os.path.join(inputdirectory, 'Assigned, ' + now.strftime("%m_%d_%Y, %H_%M_%S"))
+        os.mkdir(output_folder)
+        os.chdir(output_folder)
+
+        self.config(cursor='watch')
+        self.update()
+        errors = mlmodel.assign_files(filelist, saved, os.path.basename(inputdirectory))
+        self.config(cursor='')
 
+        if len(errors) > 0:
+            error.ErrorWindow(message='Some files could not be labeled:\n' + '\n'.join(errors[:5]))
         else:
-            error.ErrorWindow(message='No excel sheets included')
+            complete.DoneWindow()
 
     # Open help window
     def help(self):
@@ -131,7 +176,5 @@ class SelectExcel(tk.Toplevel):
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
             self.destroy()
             # Clear variables
-            xl = None
-            sheet = None
-            filelist = None
+            self.df = None
 
@@ -21,7 +21,7 @@ from PIL import Image, ImageTk
 import numpy as np
 from help import occmaphelp as hp  # Edit
 from analysis import occdevice as an  # Edit
-from accessoryfn import chooseinput, error, fluor_multi, complete  # Edit
+from accessoryfn import chooseinput, error, fluor_multi, complete, preview  # Edit
 import datetime
 
 
@@ -50,6 +50,7 @@ class DeviceOccGUI(tk.Toplevel):
         self.w = tk.IntVar(value=0)
         self.h = tk.IntVar(value=0)
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
 
         # Widgets
         self.title(name + " microfluidic device accumulation and occlusion analysis")
@@ -335,19 +336,19 @@ class DeviceOccGUI(tk.Toplevel):
     def changeparameter(self):
         """As user interactively edits a parameter, the center display updates"""
 
-        self.displayimg(self.filelist[self.img_scale.get() - 1])
+        self.displaylater(self.filelist[self.img_scale.get() - 1])
 
     # Function calls display function after each change in parameters
     def changeparameter_window(self, event):
         """As user interactively configures the window size, the center display updates"""
 
-        self.displayimg(self.filelist[self.img_scale.get() - 1])
+        self.displaylater(self.filelist[self.img_scale.get() - 1])
 
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
 
-        self.displayimg(self.filelist[self.img_scale.get()-1])
+        self.displaylater(self.filelist[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, file):
@@ -362,7 +363,7 @@ class DeviceOccGUI(tk.Toplevel):
         name_img = os.path.basename(file).split(".")[0]
         self.name_label.config(text=name_img)
 
-        img = cv2.imread(file)
+        img = preview.imread(file)  # Cached, not re-read as parameters change
         # Crop
         crop = img[self.y.get():(self.y.get() + self.h.get()),
                self.x.get():(self.x.get() + self.w.get()), :]  # Create cropped image
@@ -22,7 +22,7 @@ from PIL import Image, ImageTk
 import numpy as np
 from help import occmicrohelp as hp  # Edit
 from analysis import occmicro as an  # Edit
-from accessoryfn import chooseinput, error, fluor_multi, complete  # Edit
+from accessoryfn import chooseinput, error, fluor_multi, complete, preview  # Edit
 import datetime
 
 
@@ -51,6 +51,7 @@ class MicrochannelOccGUI(tk.Toplevel):
         self.w = tk.IntVar(value=0)
         self.h = tk.IntVar(value=0)
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
 
         # Widgets
         self.title(name + " microchannel accumulation and occlusion analysis")
@@ -354,19 +355,19 @@ class MicrochannelOccGUI(tk.Toplevel):
     def changeparameter(self):
         """As user interactively edits a parameter, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get() - 1])
+        self.displaylater(filelist[self.img_scale.get() - 1])
 
     # Function calls display function after each change in parameters
     def changeparameter_window(self, event):
         """As user interactively configures the window size, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get() - 1])
+        self.displaylater(filelist[self.img_scale.get() - 1])
 
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
 
-        self.displayimg(filelist[self.img_scale.get()-1])
+        self.displaylater(filelist[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -381,7 +382,7 @@ class MicrochannelOccGUI(tk.Toplevel):
         name_img = os.path.basename(filename).split(".")[0]
         self.name_label.config(text=name_img)
 
-        img = cv2.imread(filename)
+        img = preview.imread(filename)  # Cached, not re-read as parameters change
         # Crop
         crop = img[self.y.get():(self.y.get() + self.h.get()),
                self.x.get():(self.x.get() + self.w.get()), :]  # Create cropped image
@@ -21,7 +21,7 @@ from PIL import Image, ImageTk
 import numpy as np
 from help import single_cell_tracking as hp
 from analysis import sct_fluor as an
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, complete, videoframes, preview, bgremoval
 import datetime
 
 
@@ -44,6 +44,8 @@ class FluorSCTGUI(tk.Toplevel):
         self.search_range = tk.IntVar(value=60)  # search range for individual cells
         self.min_dist = tk.IntVar(value=100)  # minimum distance a cell must travel to be recorded
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.preprocessing = None  # Background removal method applied to frames for analysis
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
         # To indicate if numerical data has been exported
         self.analysis_exp_bool = tk.BooleanVar(value=False)
         self.x = tk.IntVar(value=0)  # ROI
@@ -61,6 +63,9 @@ class FluorSCTGUI(tk.Toplevel):
         # Selected single file name label
         self.single_label = tk.Label(self, text="")
         self.single_label.grid(row=0, column=2, columnspan=2, padx=5, pady=5, sticky='W')
+        # Input folder of images button, each image is one frame
+        dir_images = tk.Button(self, text="Select folder of images", command=self.dirfile)
+        dir_images.grid(row=0, column=4, padx=5, pady=5)
 
         # Set parameters label
         setparam_label = tk.Label(self, text="Set parameters")
@@ -222,9 +227,20 @@ class FluorSCTGUI(tk.Toplevel):
     def singlefile(self):
         """Call a toplevel GUI to choose one video file"""
 
+        self.loadframes(chooseinput.videofile(stacks=True))
+
+    # Choose folder of images, read as frames of a single video
+    def dirfile(self):
+        """Call a toplevel GUI to choose a folder of images, one image per frame"""
+
+        self.loadframes(chooseinput.imgsequence())
+
+    # Read frames from a video, frame stack or folder of images
+    def loadframes(self, filename):
+        """Read frames from any frame source and set up display"""
+
         global filelist, frames_crop, frames_bgr  # Required for other functions within class
 
-        filename = chooseinput.videofile()
         filelist = [filename]
         # self.inputtype.set(True)
         self.single_label.config(text=os.path.basename(filename))
@@ -239,17 +255,11 @@ class FluorSCTGUI(tk.Toplevel):
         # frames = gray(pims.PyAVReaderTimed(filename))
         # frame_count = len(frames)
 
-        cap = cv2.VideoCapture(filename)  # Capture video
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # Record number of frames within video
-
-        fc = 0
-        frames = []
-        ret = True  # Initialize "true" value for video processing loop
-        while fc < frame_count and ret:
-            ret, frame = cap.read()  # Read the video capture object
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)  # Read as gray/one layer
-            frames.append(gray)
-            fc += 1  # Update count after frame is processed
+        # Read video, frame stack (.npy, multipage .tif) or folder of images
+        video = videoframes.openframes(filename)
+        frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in video]  # Read as gray/one layer
+        frame_count = len(frames)
+        video.release()
 
         # Generate map of all signal to assist with fluorescent ROI selection
         map = sum(frames)  # Sum along layer axis
@@ -267,22 +277,16 @@ class FluorSCTGUI(tk.Toplevel):
         # From last window, sometimes video quality can be spotty as recording starts
         self.chooseroi(img_for_roi)
 
-        # Create background subtractor for analysis
-        fgbg = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
-        kernel = np.ones((5,5), np.uint8)
-
-        # Apply ROI to frames, create a series with background removed
+        # Apply ROI to frames
         frames_crop = []
-        frames_bgr = []
         for i in range(frame_count):
             frame_crop = frames[i][self.y.get():(self.y.get() + self.h.get()),
                self.x.get():(self.x.get() + self.w.get())]  # Create cropped image
-
-            frame_bgr = fgbg.apply(frame_crop)  # Apply background removal
-            frame_bgr_closed = cv2.morphologyEx(frame_bgr, cv2.MORPH_CLOSE, kernel)  # Morphological closing operation
-
             frames_crop.append(frame_crop.copy())
-            frames_bgr.append(frame_bgr_closed.copy())
+
+        # Create a series with background removed (and closed), method recorded to identify the frames analyzed
+        self.preprocessing = 'MOG2'
+        frames_bgr = list(bgremoval.iter_foreground(frames_crop, self.preprocessing))
 
         # Configure scale
         self.img_scale['to'] = frame_count
@@ -327,12 +331,12 @@ class FluorSCTGUI(tk.Toplevel):
         if self.maxdiameter.get() % 2 == 0:
             error.ErrorWindow(message='Maximum diameter parameter\nmust be odd integer > 1')
         else:
-            self.displayimg(frames_crop[self.img_scale.get() - 1])
+            self.displaylater(frames_crop[self.img_scale.get() - 1])
 
     def changeparameter_window(self, event):
         """As user interactively adjusts window size, the center display updates"""
 
-        self.displayimg(frames_crop[self.img_scale.get() - 1])
+        self.displaylater(frames_crop[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -342,7 +346,7 @@ class FluorSCTGUI(tk.Toplevel):
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
-        self.displayimg(frames_crop[self.img_scale.get()-1])
+        self.displaylater(frames_crop[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -429,7 +433,8 @@ class FluorSCTGUI(tk.Toplevel):
                     self.x.get(),
                     self.y.get(),
                     self.w.get(),
-                    self.h.get()
+                    self.h.get(),
+                    self.preprocessing
                     )
     # From analysis, call export functions if final analysis has already been run
     def expall(self):
@@ -14,14 +14,13 @@ import tkinter.font as font
 import os
 import cv2
 # import pims
-import trackpy as tp
 import warnings
 warnings.filterwarnings("ignore", module="trackpy")
 from PIL import Image, ImageTk
 import numpy as np
 from help import single_cell_tracking as hp
 from analysis import single_cell_tracking as an
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, complete, bgremoval, videoframes, preview, featurecache, labeledexport
 import datetime
 
 
@@ -45,12 +44,17 @@ class BrightfieldSCTGUI(tk.Toplevel):
         self.search_range = tk.IntVar(value=60)  # search range for individual cells
         self.min_dist = tk.IntVar(value=100)  # minimum distance a cell must travel to be recorded
         self.analysisbool = tk.BooleanVar(value=False)  # To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
+        self.bgpoll = None  # Pending redraw while background removal reaches the displayed frame
+        self.source = None  # Identifies the loaded frames for reusing located features
         # To indicate if numerical data has been exported
         self.analysis_exp_bool = tk.BooleanVar(value=False)
         self.x = tk.IntVar(value=0)  # ROI
         self.y = tk.IntVar(value=0)
         self.w = tk.IntVar(value=0)
         self.h = tk.IntVar(value=0)
+        self.expformat = tk.StringVar(value=labeledexport.DEFAULT)  # Labeled frames as video or images
+        self.bgmethod = tk.StringVar(value='MOG2')  # Background removal algorithm
 
         # Widgets
         # self.title(name + " brightfield deformability analysis")
@@ -62,6 +66,9 @@ class BrightfieldSCTGUI(tk.Toplevel):
         # Selected single file name label
         self.single_label = tk.Label(self, text="")
         self.single_label.grid(row=0, column=2, columnspan=2, padx=5, pady=5, sticky='W')
+        # Input folder of images button, each image is one frame
+        dir_images = tk.Button(self, text="Select folder of images", command=self.dirfile)
+        dir_images.grid(row=0, column=4, padx=5, pady=5)
 
         # Set parameters label
         setparam_label = tk.Label(self, text="Set parameters")
@@ -152,6 +159,14 @@ class BrightfieldSCTGUI(tk.Toplevel):
             )
         min_dist_spin.grid(row=7, column=1, padx=5, pady=5)
 
+        # Background removal label
+        bg_label = tk.Label(self, text="Background\nremoval")
+        bg_label['font'] = smallfont
+        bg_label.grid(row=8, column=0, padx=5, pady=5)
+        # Background removal option menu
+        bg_menu = tk.OptionMenu(self, self.bgmethod, *bgremoval.METHODS, command=self.changebackground)
+        bg_menu.grid(row=8, column=1, padx=5, pady=5)
+
         # Help button
         help_button = tk.Button(self, text="Tutorial", command=self.help)
         help_button.grid(row=9, column=0, padx=5, pady=5, sticky='W')
@@ -210,6 +225,9 @@ class BrightfieldSCTGUI(tk.Toplevel):
         expimg_button = tk.Button(
             self, text="Export labeled images", command=self.expimgs)
         expimg_button.grid(row=5, column=4, padx=5, pady=5)
+        # Labeled image format option menu
+        expformat_menu = tk.OptionMenu(self, self.expformat, *labeledexport.FORMATS)
+        expformat_menu.grid(row=6, column=4, padx=5, pady=5)
 
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
@@ -246,9 +264,20 @@ class BrightfieldSCTGUI(tk.Toplevel):
     def singlefile(self):
         """Call a toplevel GUI to choose one video file"""
 
-        global filelist, frames_crop, frames_bgr  # Required for other functions within class
+        self.loadframes(chooseinput.videofile(stacks=True))
+
+    # Choose folder of images, read as frames of a single video
+    def dirfile(self):
+        """Call a toplevel GUI to choose a folder of images, one image per frame"""
+
+        self.loadframes(chooseinput.imgsequence())
+
+    # Read frames from a video, frame stack or folder of images
+    def loadframes(self, filename):
+        """Read frames from any frame source and set up display"""
+
+        global filelist, frames_crop  # Required for other functions within class
 
-        filename = chooseinput.videofile()
         filelist = [filename]
         # self.inputtype.set(True)
         self.single_label.config(text=os.path.basename(filename))
@@ -263,38 +292,26 @@ class BrightfieldSCTGUI(tk.Toplevel):
         # frames = gray(pims.PyAVReaderTimed(filename))
         # frame_count = len(frames)
 
-        cap = cv2.VideoCapture(filename)  # Capture video
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # Record number of frames within video
-
-        fc = 0
-        frames = []
-        ret = True  # Initialize "true" value for video processing loop
-        while fc < frame_count and ret:
-            ret, frame = cap.read()  # Read the video capture object
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)  # Read as gray/one layer
-            frames.append(gray)
-            fc += 1  # Update count after frame is processed
+        # Read video, frame stack (.npy, multipage .tif) or folder of images
+        video = videoframes.openframes(filename)
+        frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) for frame in video]  # Read as gray/one layer
+        frame_count = len(frames)
+        video.release()
 
         # Choose ROI
         # From last window, sometimes video quality can be spotty as recording starts
         self.chooseroi(frames[frame_count-1])
 
-        # Create background subtractor for analysis
-        fgbg = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
-        kernel = np.ones((5,5), np.uint8)
-
-        # Apply ROI to frames, create a series with background removed
+        # Apply ROI to frames
         frames_crop = []
-        frames_bgr = []
         for i in range(frame_count):
             frame_crop = frames[i][self.y.get():(self.y.get() + self.h.get()),
                self.x.get():(self.x.get() + self.w.get())]  # Create cropped image
 
-            frame_bgr = fgbg.apply(frame_crop)  # Apply background removal
-            frame_bgr_closed = cv2.morphologyEx(frame_bgr, cv2.MORPH_CLOSE, kernel)  # Morphological closing operation
-
             frames_crop.append(frame_crop.copy())
-            frames_bgr.append(frame_bgr_closed.copy())
+
+        # Start background removal in a background thread, displayed frames wait only for themselves
+        self.startbackground()
 
         # Configure scale
         self.img_scale['to'] = frame_count
@@ -306,6 +323,28 @@ class BrightfieldSCTGUI(tk.Toplevel):
         self.analysisbool.set(False)  # Indicate analysis has been run
 
 
+    def startbackground(self):
+        """Create a series with background removed using the chosen method, runs in a background thread"""
+
+        global bgstage
+
+        if 'bgstage' in globals() and bgstage is not None:
+            bgstage.cancel()  # Stop any previous video or method
+
+        key = (filelist[0], self.x.get(), self.y.get(), self.w.get(), self.h.get())  # Reused if chosen again
+        bgstage = bgremoval.BackgroundStage(frames_crop, method=self.bgmethod.get(), key=key).start()
+        # Identify these frames once per method, located features are kept under it
+        self.source = featurecache.source(filelist[0], self.x.get(), self.y.get(), self.w.get(), self.h.get(),
+                                          self.bgmethod.get())
+
+    def changebackground(self, event=None):
+        """As user selects a background removal method, restart removal and update display"""
+
+        if 'frames_crop' in globals() and frames_crop is not None:
+            self.startbackground()
+            self.displayimg(frames_crop[self.img_scale.get() - 1])
+            self.analysisbool.set(False)  # Analysis must be rerun with new method
+
     # Choose ROI with microchannels
     def chooseroi(self, frame):
         """Choose region of interest, ideally, straight portions of microchannel(s) using a draggable rectangle
@@ -335,12 +374,12 @@ class BrightfieldSCTGUI(tk.Toplevel):
         if self.maxdiameter.get() % 2 == 0:
             error.ErrorWindow(message='Maximum diameter parameter\nmust be odd integer > 1')
         else:
-            self.displayimg(frames_crop[self.img_scale.get() - 1])
+            self.displaylater(frames_crop[self.img_scale.get() - 1])
 
     def changeparameter_window(self, event):
         """As user interactively adjusts window size, the center display updates"""
 
-        self.displayimg(frames_crop[self.img_scale.get() - 1])
+        self.displaylater(frames_crop[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -350,7 +389,7 @@ class BrightfieldSCTGUI(tk.Toplevel):
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
-        self.displayimg(frames_crop[self.img_scale.get()-1])
+        self.displaylater(frames_crop[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -365,8 +404,14 @@ class BrightfieldSCTGUI(tk.Toplevel):
 
         img = frames_crop[frame_number-1]
 
-        # Detect cells within main image
-        manip = self.celldetect(frames_bgr[frame_number-1])
+        # Detect cells within main image once background removal reaches this frame
+        # Until then the frame is shown as is and redrawn later, so the window never waits for removal
+        if bgstage.ready(frame_number-1):
+            manip = self.celldetect(bgstage.frame(frame_number-1), frame_number-1)
+        else:
+            manip = np.dstack((img, img, img))
+            self.name_label.config(text='Frame %d (removing background)' % frame_number)
+            self.waitbackground()
 
         # Resize both images:
         imgr, manipr = self.resizeimg(img, manip)
@@ -380,8 +425,21 @@ class BrightfieldSCTGUI(tk.Toplevel):
         self.manipr_tk = manipr_tk  # A fix to keep image displayed
         self.manip_canvas.create_image(0, 0, anchor='nw', image=manipr_tk)
 
-    def celldetect(self, img):
-        """Returns original image with parameters applied and cells detected"""
+    def waitbackground(self):
+        """Check again shortly whether background removal has reached the displayed frame"""
+
+        if self.bgpoll is not None:
+            self.after_cancel(self.bgpoll)
+        self.bgpoll = self.after(bgremoval.POLL, self.pollbackground)
+
+    def pollbackground(self):
+        """Redraw the displayed frame, detection is shown if its background removed frame is ready"""
+
+        self.bgpoll = None
+        self.displayimg(frames_crop[self.img_scale.get() - 1])
+
+    def celldetect(self, img, i):
+        """Returns original image with parameters applied and cells detected, i is the frame index"""
 
         # Convert image back to color to label with circles
         img_to_label = np.dstack((img, img, img))
@@ -389,7 +447,8 @@ class BrightfieldSCTGUI(tk.Toplevel):
         # Locate particles (ideally, cells) using Trackpy
         # See walkthrough: http://soft-matter.github.io/trackpy/dev/tutorial/walkthrough.html
         # Invert false - bg removal
-        f = tp.locate(img, self.maxdiameter.get(), minmass=self.minintensity.get(), invert=False)
+        # Features are kept per frame and reused by the final analysis
+        f = featurecache.locate(self.source, img, i, self.maxdiameter.get(), minmass=self.minintensity.get(), invert=False)
 
         if f is not None:  # If any cells found
 
@@ -427,7 +486,7 @@ class BrightfieldSCTGUI(tk.Toplevel):
                     self,
                     filelist,
                     frames_crop,
-                    frames_bgr,
+                    bgstage.frames(),  # Waits for background removal to finish
                     self.umpix.get(),
                     self.fps.get(),
                     self.maxdiameter.get(),
@@ -437,7 +496,9 @@ class BrightfieldSCTGUI(tk.Toplevel):
                     self.x.get(),
                     self.y.get(),
                     self.w.get(),
-                    self.h.get()
+                    self.h.get(),
+                    self.bgmethod.get(),
+                    self.source
                     )
     # From analysis, call export functions if final analysis has already been run
     def expall(self):
@@ -506,7 +567,11 @@ class BrightfieldSCTGUI(tk.Toplevel):
     # Closing command, clear variables
     def on_closing(self):
         """Closing command, clear variables to improve speed"""
+        global bgstage
+
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
+            if self.bgpoll is not None:
+                self.after_cancel(self.bgpoll)
             self.destroy()
             # Clear variables
             filelist = None
@@ -520,7 +585,8 @@ class BrightfieldSCTGUI(tk.Toplevel):
             frames = None
             frames_crop = None
             frames_bgr = None
-            frame_bgr = None
-            frame_bgr_closed = None
+            if 'bgstage' in globals() and bgstage is not None:
+                bgstage.cancel()  # Stop background removal, release its frames
+            bgstage = None
             f = None
 
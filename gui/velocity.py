@@ -21,7 +21,7 @@ from PIL import Image, ImageTk
 import numpy as np
 from help import velocityhelp as hp
 from analysis import velocity as an
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, complete, videoframes, preview
 import datetime
 
 
@@ -46,6 +46,7 @@ class VelocityGUI(tk.Toplevel):
         self.winsize_x = tk.IntVar(value=50)  # Window size
         self.winsize_y = tk.IntVar(value=20)
         self.analysisbool = tk.BooleanVar(value = True)# To indicate if final analysis has been run
+        self.displaylater = preview.Debounce(self, self.displayimg)  # Redraw once parameter input settles
         # To indicate if user would like frames exported
         self.expall_first = tk.BooleanVar(value=False)
         self.expall_linspace = tk.BooleanVar(value=False)
@@ -64,6 +65,9 @@ class VelocityGUI(tk.Toplevel):
         # Selected single file name label
         self.single_label = tk.Label(self, text="")
         self.single_label.grid(row=0, column=2, padx=5, pady=5, sticky='W')
+        # Input folder of images button, each image is one frame
+        dir_images = tk.Button(self, text="Select folder of images", command=self.dirfile)
+        dir_images.grid(row=0, column=3, padx=5, pady=5)
 
         # Set parameters label
         setparam_label = tk.Label(self, text="Set parameters")
@@ -254,33 +258,43 @@ class VelocityGUI(tk.Toplevel):
     def singlefile(self):
         """Call a toplevel GUI to choose one video file"""
 
+        self.loadframes(chooseinput.videofile(stacks=True))
+
+    # Choose folder of images, read as frames of a single video
+    def dirfile(self):
+        """Call a toplevel GUI to choose a folder of images, one image per frame"""
+
+        self.loadframes(chooseinput.imgsequence())
+
+    # Read frames from a video, frame stack or folder of images
+    def loadframes(self, filename):
+        """Read frames from any frame source and set up display"""
+
         global filelist, frames_crop, frames_bgr  # Required for other functions within class
 
-        filename = chooseinput.videofile()
         self.filelist = [filename]
         # self.inputtype.set(True)
         self.single_label.config(text=os.path.basename(filename))
 
-        # Read video
-        cap = cv2.VideoCapture(filename)
-        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))  # Record width of video frame (pixels)
-        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))  # Record height of video frame (pixels)
-        ret, self.first_frame = cap.read()
+        # Read video, frame stack (.npy, multipage .tif) or folder of images, only the frames needed here are read
+        video = videoframes.openframes(filename)
+        w = video.width  # Record width of video frame (pixels)
+        h = video.height  # Record height of video frame (pixels)
+        self.first_frame = video[0]
 
         # Choose ROI
         # From last window, sometimes video quality can be spotty as recording starts
         self.chooseroi(self.first_frame)
 
         # Create set of 10 frames
-        cap_ret = True
         count = 0
         self.test_frames = []  # Init list
-        while count < 10 and cap_ret:
-            cap_ret, frame = cap.read()  # Read
+        for frame in video.iter_range(1, 11):  # Read
             frame_crop = frame[self.y.get():(self.y.get() + self.h.get()), self.x.get():(self.x.get() + self.w.get()), :]  # Create cropped image
             frame_gray = cv2.cvtColor(frame_crop, cv2.COLOR_BGR2GRAY)  # One layer
             self.test_frames.append(frame_gray)
             count += 1
+        video.release()
 
         # Configure scale
         self.img_scale['to'] = 10
@@ -321,13 +335,13 @@ class VelocityGUI(tk.Toplevel):
     def changeparameter(self):
         """As user interactively edits a parameter, the center display updates"""
 
-        self.displayimg(self.test_frames[self.img_scale.get() - 1])
+        self.displaylater(self.test_frames[self.img_scale.get() - 1])
 
     # Function calls display function after each change in parameters
     def changeparameter_window(self, event):
         """As user interactively configures the window, the center display updates"""
 
-        self.displayimg(self.test_frames[self.img_scale.get() - 1])
+        self.displaylater(self.test_frames[self.img_scale.get() - 1])
 
     def setumpix(self, event=None):
         """Special parameter edit to set micron to pixel ratio"""
@@ -337,7 +351,7 @@ class VelocityGUI(tk.Toplevel):
     # Manage scale events
     def managescale(self, event):
         """As user interactively edits position of scale bar, the center display updates"""
-        self.displayimg(self.test_frames[self.img_scale.get()-1])
+        self.displaylater(self.test_frames[self.img_scale.get()-1])
 
     # Display images
     def displayimg(self, filename):
@@ -93,7 +93,8 @@ class HelpDisplay(tk.Toplevel):
 
         Output files
         --Single cell resolution
-        --Optionally, each original frame with each detected cell labeled with an index exported as .png
+        --Optionally, each original frame with each detected cell labeled with an index exported as
+        ----one labeled video (format chosen in the menu below the export button) or one .png per frame
         ----Exporting all frames can be computationally expensive (take a long time),
         -----but the developers suggest doing so anyways, at least for some portion of sample videos.
         ------It is useful for troubleshooting outliers, etc.
@@ -73,6 +73,15 @@ class HelpDisplay(tk.Toplevel):
         ---File loading is set up such that user selects a folder that contains all relevant excel sheets.
         ---Your files may fail to load if they are already open in Excel. This application will read temporary files
         ---created by having the file open. Please close any workbooks you're using before selecting a folder of files.
+        ---Parquet (.parquet) or comma-separated (.csv) exports of the same tables can be used instead of Excel files.
+        ---Files are read in parallel, and the combined data is cached so loading an unchanged folder again is fast.
+        ---Out-of-core mode is for datasets too large for memory (e.g. tens of millions of cells). Feature selection,
+        ----the scree plot and graphs use a stratified sample of 200,000 points. Clustering and descriptive statistics
+        ----use every point, read from disk in chunks. Labeled data is saved as a .csv file instead of an Excel sheet.
+        --Each clustering saves a model file (_clustering-model.joblib) with the features, scaling and centroids used.
+        ---"Assign new files to saved clusters" labels a folder of new samples with the nearest saved centroid,
+        ---without clustering again. Labeled data, counts and means by sample and cluster are saved in an
+        ---"Assigned" results folder. New files must include every feature used for the saved clustering.
         
         Step 2: select features
         --After data is loaded, all datasets are combined into one "pool." Clustering is an unsupervised algorithm:
@@ -98,6 +107,11 @@ class HelpDisplay(tk.Toplevel):
         ----The "elbow" point of the graph represents the best balance between minimizing the number of clusters
         -----and minimizing the variance in each cluster. 
         ----The user can choose any number of clusters to group data into using the clustering algorithm.
+        ----Features are standardized (mean 0, standard deviation 1) before fitting, here and in step 4.
+        ----Points are added to the plot as each number of clusters finishes. Datasets larger than 100,000 events
+        -----are fit on a subsample stratified by sample, and mini-batch k-means is selected by default.
+        ----"Warm start" fits each number of clusters from the previous centroids, which is faster but may
+        -----settle on a slightly higher SSE. Use "Recalculate scree plot" after changing either option.
         
         Step 4: k-means clustering algorithms are applied
         --After the number of clusters are selected and submitted, k-means clustering algorithms are applied
@@ -120,6 +134,10 @@ class HelpDisplay(tk.Toplevel):
         ----Descriptive statistics for clusters, cluster label count per dataset, cluster number, and silhouette score 
         -----are also included.
         ------Silhouette score is a metric with a value from -1 (inappropriate clusters) to 1 (best clustering)
+        ------Above 5,000 data points, the silhouette score is the mean of 10 random samples of 5,000 points,
+        -------reported with a 95% confidence interval. The sheet states which method was used.
+        ------Davies-Bouldin (lower is better) and Calinski-Harabasz (higher is better) indices are calculated
+        -------on all data points.
 
         Some tips from the iCLOTS team:
         --Clustering techniques are well-suited to exploring distinguishing features between known populations 
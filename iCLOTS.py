@@ -4,7 +4,12 @@ Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory Univers
 Last updated: 2022-09-06 for version 1.0b1
 
 """
-from menu import mainmenu
+import multiprocessing
+
+# Guard so worker processes started by analyses (e.g. trackpy batch location) don't reopen the menu
+if __name__ == '__main__':
+    multiprocessing.freeze_support()  # Required for process pools in packaged (PyInstaller) builds
+    from menu import mainmenu
 # import os
 # import sys
 
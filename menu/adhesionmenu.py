@@ -11,7 +11,6 @@ and filopodia counting iCLOTS applications
 import tkinter as tk
 import tkinter.font as font
 from tkinter import messagebox
-from gui import adhfluor, adhbrightfield, adhfil, adhvideo
 
 class AdhesionMenu(tk.Toplevel):
 
@@ -61,15 +60,19 @@ class AdhesionMenu(tk.Toplevel):
         self.columnconfigure(0, weight=1)
 
     def bfapp(self):
+        from gui import adhbrightfield
         adhbrightfield.BrightfieldAdhesionGUI()
 
     def fluorapp(self):
+        from gui import adhfluor
         adhfluor.FluorAdhesionGUI()
 
     def filapp(self):
+        from gui import adhfil
         adhfil.FilAdhesionGUI()
 
     def ta_app(self):
+        from gui import adhvideo
         adhvideo.AdhesionVideoGUI()
 
     def on_closing(self):
@@ -5,18 +5,27 @@ Last updated: 2022-09-06 for version 1.0b1
 
 Main menu script directs to every iCLOTS application
 
+Applications and submenus are imported when their button is first clicked, so the menu opens
+without loading the analysis libraries (trackpy, scikit-image, scikit-learn, matplotlib, etc.)
+
+Startup time can be measured by setting the ICLOTS_STARTUP_TIME environment variable:
+the time from importing this menu to the first drawn window is printed, and the menu closes
+Exits with status 1 if startup takes longer than STARTUP_TARGET
+
 """
 
+import time
+_started = time.perf_counter()  # Before any other import, for startup measurement
+
 import tkinter as tk
 import tkinter.font as font
 from tkinter import messagebox
 import sys
 import os
 from PIL import Image, ImageTk
-from gui import velocity, ml_selectfiles
-from menu import adhesionmenu, occlusionmenu, sct_menu, videomenu
 from help import mainhelp
-from accessoryfn import staytuned
+
+STARTUP_TARGET = 1.0  # Seconds from import to first drawn main menu
 
 class MainMenu(tk.Tk):
 
@@ -108,21 +117,27 @@ class MainMenu(tk.Tk):
         self.columnconfigure(2, weight=1)
 
     def adhmenu(self):
+        from menu import adhesionmenu
         adhesionmenu.AdhesionMenu()
 
     def sct_app(self):
+        from menu import sct_menu
         sct_menu.SCTMenu()
 
     def occmenu(self):
+        from menu import occlusionmenu
         occlusionmenu.OcclusionMenu()
 
     def velapp(self):
+        from gui import velocity
         velocity.VelocityGUI()
 
     def videomenu(self):
+        from menu import videomenu
         videomenu.VideoMenu()
 
     def clustermenu(self):
+        from gui import ml_selectfiles
         ml_selectfiles.SelectExcel()
 
     def gethelp(self):
@@ -138,6 +153,14 @@ class MainMenu(tk.Tk):
 
         return os.path.join(base_path, relative_path)
 
+    def startuptime(self):
+        """Print time from import to first drawn window and close, see ICLOTS_STARTUP_TIME"""
+
+        self.update()  # Draw window before stopping the clock
+        self.elapsed = time.perf_counter() - _started
+        print('iCLOTS main menu shown in %.3f s (target %.1f s)' % (self.elapsed, STARTUP_TARGET))
+        self.destroy()
+
     def on_closing(self):
         """Closing command, clear variables to improve speed, software won't close on Windows without"""
         if messagebox.askokcancel("Quit", "Do you want to quit?"):
@@ -154,4 +177,8 @@ class MainMenu(tk.Tk):
 #     return os.path.join(base_path, relative_path)
 
 root = MainMenu()
-root.mainloop()
\ No newline at end of file
+if os.environ.get('ICLOTS_STARTUP_TIME'):
+    root.after_idle(root.startuptime)
+root.mainloop()
+if os.environ.get('ICLOTS_STARTUP_TIME'):
+    sys.exit(0 if root.elapsed < STARTUP_TARGET else 1)
\ No newline at end of file
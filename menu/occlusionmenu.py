@@ -13,7 +13,6 @@ All applications are designed for RGB fluorescent data only
 import tkinter as tk
 import tkinter.font as font
 from tkinter import messagebox
-from gui import occmicro, occroi, occdevice
 from accessoryfn import staytuned
 
 class OcclusionMenu(tk.Toplevel):
@@ -60,12 +59,15 @@ class OcclusionMenu(tk.Toplevel):
         self.columnconfigure(0, weight=1)
 
     def ufapp(self):
+        from gui import occdevice
         occdevice.DeviceOccGUI()
 
     def roiapp(self):
+        from gui import occroi
         occroi.ROIOccGUI()
 
     def ucapp(self):
+        from gui import occmicro
         occmicro.MicrochannelOccGUI()
 
     def on_closing(self):
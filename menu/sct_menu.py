@@ -11,7 +11,6 @@ Specialized app versions for the deformability assay are also available
 import tkinter as tk
 import tkinter.font as font
 from tkinter import messagebox
-from gui import deform, single_cell_tracking, sct_fluor
 from accessoryfn import staytuned
 
 class SCTMenu(tk.Toplevel):
@@ -67,12 +66,15 @@ class SCTMenu(tk.Toplevel):
         self.columnconfigure(0, weight=1)
 
     def bfapp(self):
+        from gui import single_cell_tracking
         single_cell_tracking.BrightfieldSCTGUI()
 
     def flapp(self):
+        from gui import sct_fluor
         sct_fluor.FluorSCTGUI()
 
     def bf_def_app(self):
+        from gui import deform
         deform.BrightfieldDeformGUI()
 
     def fl_def_app(self):
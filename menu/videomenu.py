@@ -11,7 +11,6 @@ These are useful for preparing data for analysis
 import tkinter as tk
 import tkinter.font as font
 from tkinter import messagebox
-from videoedit import resizeapp, rotateapp, croplengthapp, video_imgapp, img_videoapp, normalize_folderapp, cropframeapp, contrastapp
 from help import videohelp as hp
 from accessoryfn import staytuned
 
@@ -59,12 +58,15 @@ class VideoMenu(tk.Toplevel):
         # Normalize intensity app
         norm_int_button = tk.Button(self, text="Normalize intensity of a folder of files", command=self.norm_int)
         norm_int_button.grid(row=8, column=0, padx=5, pady=5)
+        # Combined editing app
+        chain_button = tk.Button(self, text="Crop, trim, rotate, resize, contrast in one pass", command=self.chain)
+        chain_button.grid(row=9, column=0, padx=5, pady=5)
         # Help window
         help_button = tk.Button(self, text="Tutorial, all applications", command=self.help)
-        help_button.grid(row=9, column=0, padx=5, pady=5)
+        help_button.grid(row=10, column=0, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=10, column=0, padx=5, pady=5)
+        quit_button.grid(row=11, column=0, padx=5, pady=5)
 
         # Tkinter protocol for x close
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -81,32 +83,45 @@ class VideoMenu(tk.Toplevel):
         self.rowconfigure(8, weight=1)
         self.rowconfigure(9, weight=1)
         self.rowconfigure(10, weight=1)
+        self.rowconfigure(11, weight=1)
         self.columnconfigure(0, weight=1)
 
     def resizeapp(self):
+        from videoedit import resizeapp
         resizeapp.ResizeGUI()
 
     def rotateapp(self):
+        from videoedit import rotateapp
         rotateapp.RotateGUI()
 
     def contrastapp(self):
+        from videoedit import contrastapp
         contrastapp.EditContrastGUI()
 
     def croproi(self):
+        from videoedit import cropframeapp
         cropframeapp.CropFrames()
 
     def croplength(self):
+        from videoedit import croplengthapp
         croplengthapp.CropLengthGUI()
 
     def img_video(self):
+        from videoedit import img_videoapp
         img_videoapp.ImgtoVideo()
 
     def video_img(self):
+        from videoedit import video_imgapp
         video_imgapp.VideoToImg()
 
     def norm_int(self):
+        from videoedit import normalize_folderapp
         normalize_folderapp.NormalizeImgs()
 
+    def chain(self):
+        from videoedit import chainapp
+        chainapp.TransformChainGUI()
+
     def help(self):
         # Open help window
         hp.HelpDisplay()
@@ -0,0 +1,217 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Combined editing application applies several video editing operations to files in a single pass:
+
+Inputs:
+--A single image (.png, .jpg, .tif) file or a single video file (.avi)
+--A directory of files, which will all be edited using the same operations
+
+Parameters chosen by user, each operation can be switched on or off:
+--Crop: region of interest, chosen from the first frame/image
+--Trim: start and end frame (videos only)
+--Rotate: angle (degrees)
+--Resize: resize factor
+--Contrast: alpha (gain) and beta (bias)
+
+Operations are applied in the order listed, each video is read and written once
+Files are edited in a worker pool, with progress shown as files finish
+
+Outputs:
+--Each file, edited, saved in a new 'Edited files' directory within the folder the files were chosen from
+----Operations performed will be appended to the file name for reference
+
+The same operations, in any order, are available from the command line, see videoedit/transformchain.py
+
+"""
+
+import tkinter as tk
+import tkinter.font as font
+from tkinter import messagebox
+import os
+import shutil
+import cv2
+from accessoryfn import chooseinput, error, batchpool, videoframes, videowriters
+from videoedit import transformchain
+
+
+class TransformChainGUI(tk.Toplevel):
+
+    def __init__(self):
+        super().__init__()
+
+        # App details, subject to change
+        name = 'iCLOTS'
+
+        # Fonts
+        boldfont = font.Font(weight="bold")
+
+        # Tkinter variables
+        self.filelist = None
+        self.crop_on = tk.BooleanVar(value=False)
+        self.roi = None  # x, y, w, h
+        self.trim_on = tk.BooleanVar(value=False)
+        self.startframe = tk.IntVar(value=0)
+        self.endframe = tk.IntVar(value=0)
+        self.rotate_on = tk.BooleanVar(value=False)
+        self.angle = tk.DoubleVar(value=0)
+        self.resize_on = tk.BooleanVar(value=False)
+        self.resizefactor = tk.DoubleVar(value=1)
+        self.contrast_on = tk.BooleanVar(value=False)
+        self.alpha = tk.DoubleVar(value=1)
+        self.beta = tk.IntVar(value=0)
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
+
+        # Widgets
+        self.title(name + " combined file editing application")
+
+        # Application title
+        menutitle = tk.Label(self, text="Combined editing application")
+        menutitle["font"] = boldfont
+        menutitle.grid(row=0, column=0, columnspan=3, padx=10, pady=10)
+
+        # Input single file button
+        single_button = tk.Button(self, text="Select single file", command=self.singlefile)
+        single_button.grid(row=1, column=0, columnspan=3, padx=5, pady=5)
+        # Input directory button
+        dir_button = tk.Button(self, text="Select folder of files", command=self.dirfile)
+        dir_button.grid(row=2, column=0, columnspan=3, padx=5, pady=5)
+        # File label, blank initially
+        self.name_label = tk.Label(self, text="")
+        self.name_label.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
+
+        # Crop
+        crop_check = tk.Checkbutton(self, text="Crop", variable=self.crop_on)
+        crop_check.grid(row=4, column=0, padx=5, pady=5, sticky='W')
+        roi_button = tk.Button(self, text="Choose region of interest", command=self.chooseroi)
+        roi_button.grid(row=4, column=1, padx=5, pady=5)
+        self.roi_label = tk.Label(self, text="")
+        self.roi_label.grid(row=4, column=2, padx=5, pady=5)
+        # Trim
+        trim_check = tk.Checkbutton(self, text="Trim (start, end frame)", variable=self.trim_on)
+        trim_check.grid(row=5, column=0, padx=5, pady=5, sticky='W')
+        start_entry = tk.Entry(self, width=10, textvariable=self.startframe)
+        start_entry.grid(row=5, column=1, padx=5, pady=5)
+        end_entry = tk.Entry(self, width=10, textvariable=self.endframe)
+        end_entry.grid(row=5, column=2, padx=5, pady=5)
+        # Rotate
+        rotate_check = tk.Checkbutton(self, text="Rotate (angle)", variable=self.rotate_on)
+        rotate_check.grid(row=6, column=0, padx=5, pady=5, sticky='W')
+        angle_entry = tk.Entry(self, width=10, textvariable=self.angle)
+        angle_entry.grid(row=6, column=1, padx=5, pady=5)
+        # Resize
+        resize_check = tk.Checkbutton(self, text="Resize (factor)", variable=self.resize_on)
+        resize_check.grid(row=7, column=0, padx=5, pady=5, sticky='W')
+        resizefactor_entry = tk.Entry(self, width=10, textvariable=self.resizefactor)
+        resizefactor_entry.grid(row=7, column=1, padx=5, pady=5)
+        # Contrast
+        contrast_check = tk.Checkbutton(self, text="Contrast (alpha, beta)", variable=self.contrast_on)
+        contrast_check.grid(row=8, column=0, padx=5, pady=5, sticky='W')
+        alpha_entry = tk.Entry(self, width=10, textvariable=self.alpha)
+        alpha_entry.grid(row=8, column=1, padx=5, pady=5)
+        beta_entry = tk.Entry(self, width=10, textvariable=self.beta)
+        beta_entry.grid(row=8, column=2, padx=5, pady=5)
+        # Video output format
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label.grid(row=9, column=0, padx=5, pady=5, sticky='W')
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=9, column=1, columnspan=2, padx=5, pady=5)
+
+        # Submit button
+        submit_button = tk.Button(self, text="Submit for editing", command=self.submit)
+        submit_button.grid(row=10, column=0, columnspan=3, padx=5, pady=5)
+        # Quit button
+        quit_button = tk.Button(self, text="Quit", command=self.on_closing)
+        quit_button.grid(row=11, column=0, columnspan=3, padx=5, pady=5)
+
+        for row in range(12):
+            self.rowconfigure(row, weight=1)
+        self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=1)
+        self.columnconfigure(2, weight=1)
+
+        # Tkinter protocol for x close
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+    # Choose single file, return one-element list
+    def singlefile(self):
+        filename = chooseinput.anyfile()
+        self.filelist = [filename]
+        self.name_label.config(text=os.path.basename(filename))
+
+    # Choose folder of files, return sorted list
+    def dirfile(self):
+        dirname, self.filelist = chooseinput.diranyfile()
+        self.name_label.config(text=os.path.basename(dirname))
+
+    # Choose ROI from first frame/image
+    def chooseroi(self):
+        if self.filelist is not None:
+            if transformchain.isvideo(self.filelist[0]):
+                video = videoframes.openframes(self.filelist[0])
+                frame = video[0]
+                video.release()
+            else:
+                frame = cv2.imread(self.filelist[0])
+
+            cv2.namedWindow("Select region of interest and press enter", cv2.WINDOW_NORMAL)
+            fromCenter = False  # Set up to choose as a drag-able rectangle rather than a rectangle chosen from center
+            r = cv2.selectROI("Select region of interest and press enter", frame, fromCenter)
+            cv2.destroyAllWindows()
+
+            self.roi = (int(r[0]), int(r[1]), int(r[2]), int(r[3]))
+            self.roi_label.config(text='x %d, y %d, w %d, h %d' % self.roi)
+            self.crop_on.set(True)
+        else:
+            error.ErrorWindow(message='Please select file(s) first')
+
+    def steps(self):
+        """Selected operations, in order, as (name, parameters)"""
+
+        steps = []
+        if self.crop_on.get() and self.roi is not None:
+            steps.append(('crop', self.roi))
+        if self.trim_on.get():
+            steps.append(('trim', (self.startframe.get(), self.endframe.get())))
+        if self.rotate_on.get():
+            steps.append(('rotate', (self.angle.get(),)))
+        if self.resize_on.get():
+            steps.append(('resize', (self.resizefactor.get(),)))
+        if self.contrast_on.get():
+            steps.append(('contrast', (self.alpha.get(), self.beta.get())))
+
+        return steps
+
+    # Apply all selected operations to each file
+    def submit(self):
+        if self.filelist is None:
+            error.ErrorWindow(message='Please select file(s) to edit')
+            return
+
+        steps = self.steps()
+        if len(steps) == 0:
+            error.ErrorWindow(message='Please select at least one operation')
+            return
+
+        chain = transformchain.TransformChain(steps, self.videoformat.get())
+
+        # Make new directory to save files into
+        outputfolder = os.path.join(os.path.dirname(self.filelist[0]), 'Edited files')
+        if os.path.exists(outputfolder):  # Set up output folder
+            shutil.rmtree(outputfolder)
+        os.mkdir(outputfolder)
+
+        # Edit each file in a worker pool, progress shown as files finish
+        jobs = [(chain.process, (file, outputfolder)) for file in self.filelist]
+        batchpool.BatchProgress(jobs, labels=self.filelist, title="Editing files")
+
+    # Closing command, clear variables
+    def on_closing(self):
+        """Closing command, clear variables to improve speed"""
+        if messagebox.askokcancel("Quit", "Do you want to quit?"):
+            self.destroy()
+            # Clear variables
+            filelist = None
+            frame = None
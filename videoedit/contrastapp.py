@@ -5,6 +5,9 @@ Last updated: 2022-10-26 for version 1.0b1
 
 Resize file application edits contrast of files for use with iCLOTS analysis applications
 
+Alpha (gain), beta (bias) and gamma are compiled into a single 256-entry lookup table (see videoedit/transformchain.py),
+applied to each frame with cv2.LUT for both the preview and saved files
+
 """
 
 import tkinter as tk
@@ -15,7 +18,47 @@ import shutil
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, batchpool, videowriters
+from videoedit.transformchain import contrast_lut
+
+def contrast_file(file, alpha, beta, gamma, str_params, outputfolder, videoformat=videowriters.DEFAULT):
+    """Edit contrast of a single image or video file into the output folder, run by a batch worker"""
+
+    lut = contrast_lut(alpha, beta, gamma)  # Calculated once per file, not per pixel per frame
+
+    if '.avi' in file:
+        capture = cv2.VideoCapture(file)
+
+        # Dimensions, must be exact for videos
+        w = int(np.floor(capture.get(3)))  # float
+        h = int(np.floor(capture.get(4)))  # float
+        fps = capture.get(cv2.CAP_PROP_FPS)  # frames per second
+
+        name = os.path.basename(file).split(".")[0] + str_params  # String to save video as, extension from format
+
+        # Set up video writer object, in chosen format
+        out = videowriters.open_writer(os.path.join(outputfolder, name), fps, (w, h), videoformat)
+
+        # Edit contrast of each frame
+        while True:
+            ret, frame = capture.read()
+            if ret == True:
+                out_frame = cv2.LUT(frame, lut)
+                out.write(out_frame)
+            else:
+                break
+
+        # Finish
+        capture.release()
+        out.release()
+
+    else:  # For images
+        frame = cv2.imread(file)
+
+        out_frame = cv2.LUT(frame, lut)  # Apply lookup table
+        name = os.path.basename(file).split(".")[0] + str_params + '.png'  # String to save image as
+        cv2.imwrite(os.path.join(outputfolder, name), out_frame)
+
 
 class EditContrastGUI(tk.Toplevel):
 
@@ -31,7 +74,11 @@ class EditContrastGUI(tk.Toplevel):
         # Tkinter variables
         self.alpha = tk.DoubleVar(value=1)
         self.beta = tk.IntVar(value=0)
+        self.gamma = tk.DoubleVar(value=1)
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
         self.filelist = None
+        self.img_shown = None  # Current image
+        self.img_small = None  # Current image, downsized to canvas
 
         # Widgets
         self.title(name + " file contrast application")
@@ -90,13 +137,34 @@ class EditContrastGUI(tk.Toplevel):
             command=self.changespinbox
         )
         beta_spin.grid(row=8, column=1, padx=5, pady=5)
+        # Gamma label
+        gamma_label = tk.Label(self, text="Gamma")
+        gamma_label.grid(row=9, column=0, padx=5, pady=5)
+        # Gamma spin box
+        gamma_spin = tk.Spinbox(
+            self,
+            from_=0.1,
+            to=10,
+            increment=0.05,
+            textvariable=self.gamma,
+            width=10,
+            wrap=True,
+            command=self.changespinbox
+        )
+        gamma_spin.grid(row=9, column=1, padx=5, pady=5)
+        # Video output format label
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label.grid(row=10, column=0, padx=5, pady=5)
+        # Video output format menu
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=10, column=1, padx=5, pady=5)
 
         # Submit button
         submit_button = tk.Button(self, text="Submit", command=self.save_rotated_files)
-        submit_button.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
+        submit_button.grid(row=11, column=0, columnspan=2, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=10, column=0, columnspan=2, padx=5, pady=5)
+        quit_button.grid(row=12, column=0, columnspan=2, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -109,6 +177,8 @@ class EditContrastGUI(tk.Toplevel):
         self.rowconfigure(8, weight=1)
         self.rowconfigure(9, weight=1)
         self.rowconfigure(10, weight=1)
+        self.rowconfigure(11, weight=1)
+        self.rowconfigure(12, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -161,82 +231,40 @@ class EditContrastGUI(tk.Toplevel):
             # Create strings to indicate operations performed
             str_alpha = str(self.alpha.get()).replace('.', 'p')
             str_beta = str(self.beta.get()).replace('-', 'n')
+            str_params = '_a' + str_alpha + '_b' + str_beta
+            folder_params = 'a' + str_alpha + ', b' + str_beta
+            if self.gamma.get() != 1:  # Only noted if used, names otherwise unchanged
+                str_gamma = str(self.gamma.get()).replace('.', 'p')
+                str_params += '_g' + str_gamma
+                folder_params += ', g' + str_gamma
 
-            outputfolder = os.path.join(os.getcwd(), 'Contrast a' + str_alpha + ', b' + str_beta)
+            outputfolder = os.path.join(os.getcwd(), 'Contrast ' + folder_params)
 
             if os.path.exists(outputfolder):  # Set up outut folder
                 shutil.rmtree(outputfolder)
             os.mkdir(outputfolder)
             os.chdir(outputfolder)
 
-            # Resize each image
-            for file in self.filelist:
-                if '.avi' in file:
-                    capture = cv2.VideoCapture(file)
-
-                    # Dimensions, must be exact for videos
-                    w = int(np.floor(capture.get(3)))  # float
-                    h = int(np.floor(capture.get(4)))  # float
-                    fps = capture.get(cv2.CAP_PROP_FPS)  # frames per second
-
-                    name = os.path.basename(file).split(".")[0] + '_a' + str_alpha + '_b' + \
-                           str_beta + '.avi'  # String to save image as, .avi
-
-                    # Set up video writer object
-                    fourcc = cv2.VideoWriter_fourcc(*'XVID')  # .avi
-                    out = cv2.VideoWriter(name, fourcc, fps, (w, h))
-
-                    # Edit contrast of each frame
-                    while True:
-                        ret, frame = capture.read()
-                        if ret == True:
-                            out_frame = self.editcontrast(frame, w, h)
-                            out.write(out_frame)
-                        else:
-                            break
-
-                    # Finish
-                    capture.release()
-                    out.release()
-                    cv2.destroyAllWindows()
-
-                else:  # For images
-                    frame = cv2.imread(file)
+            # Edit contrast of each file in a worker pool, progress shown as files finish
+            alpha = self.alpha.get()
+            beta = self.beta.get()
+            gamma = self.gamma.get()
+            videoformat = self.videoformat.get()
+            jobs = [(contrast_file, (file, alpha, beta, gamma, str_params, outputfolder, videoformat))
+                    for file in self.filelist]
+            batchpool.BatchProgress(jobs, labels=self.filelist, title="Editing file contrast")
 
-                    h, w, l = frame.shape  # Dimensions of frame
-
-                    out_frame = self.editcontrast(frame, w, h)  # Apply function
-                    name = os.path.basename(file).split(".")[0] + '_a' + str_alpha + '_b' + \
-                           str_beta + '.png'  # String to save image as
-                    cv2.imwrite(name, out_frame)
-
-            complete.DoneWindow()
-
-    def editcontrast(self, frame, w, h):
-        """Function to edit contrast of a frame - can be an image file or a video frame"""
-
-        # Apply changes in contrast
-        out_frame = frame * self.alpha.get() + self.beta.get()
-        out_frame[out_frame < 0] = 0
-        out_frame[out_frame > 255] = 255  # Prevents high values from 'looping' to 0 as uint8
-        out_frame = np.uint8(out_frame)  # Prevents video errors
-
-        # Ensure dimensions are correct, important for videos
-        out_frame = cv2.resize(out_frame, (w, h), fx=0, fy=0, interpolation=cv2.INTER_CUBIC)
-
-        return out_frame
-
-    # Display images as rotated on canvas
+    # Display images with contrast edited on canvas
     def displayimg(self, img):
 
-        h, w, l = img.shape
-
-        out = self.editcontrast(img, w, h)
+        # Resize to fit on canvas once per image, spinbox changes only re-apply the lookup table
+        if img is not self.img_shown:
+            rf = 300 / np.max((img.shape[0], img.shape[1]))
+            dim = (int(img.shape[1] * rf), int(img.shape[0] * rf))
+            self.img_small = cv2.resize(img, dim, interpolation=cv2.INTER_AREA)
+            self.img_shown = img
 
-        # Resize to fit on canvas
-        rf = 300 / np.max((out.shape[0], out.shape[1]))
-        dim = (int(out.shape[1] * rf), int(out.shape[0] * rf))
-        imgr = cv2.resize(out, dim, interpolation=cv2.INTER_AREA)
+        imgr = cv2.LUT(self.img_small, contrast_lut(self.alpha.get(), self.beta.get(), self.gamma.get()))
 
         imgr_rgb = cv2.cvtColor(imgr, cv2.COLOR_BGR2RGB)  # Match layers to pillow convention
 
@@ -13,7 +13,45 @@ from tkinter import messagebox
 import os
 import shutil
 import cv2
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, batchpool, videowriters
+
+def crop_file(file, roi, outputfolder, videoformat=videowriters.DEFAULT):
+    """Crop a single image or video file to a region of interest into the output folder, run by a batch worker"""
+
+    ROI_x, ROI_y, ROI_w, ROI_h = roi
+
+    if '.avi' in file:
+        capture = cv2.VideoCapture(file)
+        # Dimensions, must be exact for videos
+        fps = capture.get(cv2.CAP_PROP_FPS)  # frames per second
+
+        name = os.path.basename(file).split(".")[0] + '_ROI'  # String to save video as, extension from format
+
+        ret, frame_0 = capture.read()  # Frame ROI was chosen from
+
+        # Set up video writer object, in chosen format
+        out = videowriters.open_writer(os.path.join(outputfolder, name), fps, (ROI_w, ROI_h), videoformat)
+
+        # Resize each frame
+        while True:
+            ret, frame = capture.read()
+            if ret == True:
+                out_frame = frame[ROI_y: (ROI_y + ROI_h), ROI_x: (ROI_x + ROI_w)]  # Crop
+                out.write(out_frame)
+            else:
+                break
+
+        # Finish
+        capture.release()
+        out.release()
+
+    else:  # If an image file
+        frame = cv2.imread(file)
+
+        out_frame = frame[ROI_y: (ROI_y + ROI_h), ROI_x: (ROI_x + ROI_w)]  # Crop
+        name = os.path.basename(file).split(".")[0] + '_ROI.png'  # String to save image as
+        cv2.imwrite(os.path.join(outputfolder, name), out_frame)
+
 
 class CropFrames(tk.Toplevel):
 
@@ -29,6 +67,7 @@ class CropFrames(tk.Toplevel):
 
         # Tkinter variables
         self.fps = tk.DoubleVar(value=10)
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
 
         # Widgets
         self.title(name + " frame cropping application")
@@ -38,20 +77,28 @@ class CropFrames(tk.Toplevel):
         menutitle["font"] = boldfont
         menutitle.grid(row=0, column=0, padx=10, pady=10)
 
+        # Video output format label
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label.grid(row=1, column=0, padx=5, pady=5)
+        # Video output format menu
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=2, column=0, padx=5, pady=5)
         # Input single file button
         single_button = tk.Button(self, text="Select a single file to crop\n to individualized regions of interest", command=self.choose_single)
-        single_button.grid(row=1, column=0, padx=5, pady=5)
+        single_button.grid(row=3, column=0, padx=5, pady=5)
         # Input series of images button
         multi_button = tk.Button(self, text="Select series of files to crop\n to individualized regions of interest", command=self.choose_folder)
-        multi_button.grid(row=2, column=0, padx=5, pady=5)
+        multi_button.grid(row=4, column=0, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=3, column=0, padx=5, pady=5)
+        quit_button.grid(row=5, column=0, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
         self.rowconfigure(2, weight=1)
         self.rowconfigure(3, weight=1)
+        self.rowconfigure(4, weight=1)
+        self.rowconfigure(5, weight=1)
         self.columnconfigure(0, weight=1)
 
         # Tkinter protocol for x close
@@ -97,44 +144,20 @@ class CropFrames(tk.Toplevel):
         os.mkdir(outputfolder)
         os.chdir(outputfolder)
 
+        # Choose each region of interest first (interactive), then crop files in a worker pool
+        videoformat = self.videoformat.get()
+        jobs = []
         for file in filelist:
             if '.avi' in file:
                 capture = cv2.VideoCapture(file)
-                # Dimensions, must be exact for videos
-                fps = capture.get(cv2.CAP_PROP_FPS)  # frames per second
-
-                name = os.path.basename(file).split(".")[0] + '_ROI.avi'  # String to save image as, .avi
-
                 ret, frame_0 = capture.read()
-                ROI_x, ROI_y, ROI_w, ROI_h = self.chooseROI(frame_0)  # Find ROI by applying function
-
-                # Set up video writer object
-                fourcc = cv2.VideoWriter_fourcc(*'XVID')  # .avi
-                out = cv2.VideoWriter(name, fourcc, fps, (ROI_w, ROI_h))
-
-                # Resize each frame
-                while True:
-                    ret, frame = capture.read()
-                    if ret == True:
-                        out_frame = frame[ROI_y: (ROI_y + ROI_h), ROI_x: (ROI_x + ROI_w)]  # Crop
-                        out.write(out_frame)
-                    else:
-                        break
-
-                # Finish
                 capture.release()
-                out.release()
-                cv2.destroyAllWindows()
-
             else:  # If an image file
-                frame = cv2.imread(file)
-                ROI_x, ROI_y, ROI_w, ROI_h = self.chooseROI(frame)  # Find ROI by applying function
-
-                out_frame = frame[ROI_y: (ROI_y + ROI_h), ROI_x: (ROI_x + ROI_w)]  # Crop
-                name = os.path.basename(file).split(".")[0] + '_ROI.png'  # String to save image as
-                cv2.imwrite(name, out_frame)
+                frame_0 = cv2.imread(file)
+            roi = self.chooseROI(frame_0)  # Find ROI by applying function
+            jobs.append((crop_file, (file, roi, outputfolder, videoformat)))
 
-        complete.DoneWindow()
+        batchpool.BatchProgress(jobs, labels=filelist, title="Cropping files")
 
     # Closing command, clear variables
     def on_closing(self):
@@ -4,6 +4,7 @@ Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory Univers
 Last updated: 2022-10-13 for version 1.0b1
 
 Video length cropping app cuts video to a specified start and end frame
+Videos (.avi) and frame stacks (.npy, multipage .tif) written by the other editing apps can be shortened
 
 """
 
@@ -16,7 +17,27 @@ import cv2
 import numpy as np
 from PIL import Image, ImageTk
 # import pims
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, complete, videoframes, videowriters
+
+
+def trim_video(filename, startframe, endframe, newfilename, videoformat=videowriters.DEFAULT):
+    """Write frames after startframe and before endframe to a new video, seeking straight to the start
+
+    newfilename is given without extension, the extension is set by the output format"""
+
+    video = videoframes.openframes(filename)
+    fps = video.fps if video.fps > 0 else videoframes.STACK_FPS
+
+    # Video writer output, in chosen format
+    out = videowriters.open_writer(newfilename, fps, (video.width, video.height), videoformat)
+
+    # Only write frames within range, frames before the start are never decoded
+    for frame in video.iter_range(max(startframe + 1, 0), endframe):
+        out.write(frame)
+
+    video.release()
+    out.release()
+
 
 class CropLengthGUI(tk.Toplevel):
 
@@ -33,6 +54,8 @@ class CropLengthGUI(tk.Toplevel):
         self.startframe = tk.IntVar(value=0)
         self.endframe = tk.IntVar(value=0)
         self.filename = None
+        self.frames = None
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
 
         # Widgets
         self.title(name + " video file length cropping application")
@@ -71,12 +94,18 @@ class CropLengthGUI(tk.Toplevel):
         # Resize factor entry box
         end_entry = tk.Entry(self, width=10, textvariable=self.endframe)
         end_entry.grid(row=7, column=1, padx=5, pady=5)
+        # Video output format label
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label.grid(row=8, column=0, padx=5, pady=5)
+        # Video output format menu
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=8, column=1, padx=5, pady=5)
         # Submit button
         submit_button = tk.Button(self, text="Submit for shortening", command=self.crop_video_length)
-        submit_button.grid(row=8, column=0, columnspan=2, padx=5, pady=5)
+        submit_button.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
+        quit_button.grid(row=10, column=0, columnspan=2, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -88,6 +117,7 @@ class CropLengthGUI(tk.Toplevel):
         self.rowconfigure(7, weight=1)
         self.rowconfigure(8, weight=1)
         self.rowconfigure(9, weight=1)
+        self.rowconfigure(10, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -97,7 +127,7 @@ class CropLengthGUI(tk.Toplevel):
 
     # Choose single video, display
     def singlevideofile(self):
-        self.filename = chooseinput.videofile()
+        self.filename = chooseinput.videofile(stacks=True)
         self.name_label.config(text=os.path.basename(self.filename))
 
         # # Create set of frames
@@ -119,17 +149,10 @@ class CropLengthGUI(tk.Toplevel):
         # # Create a frames object using pims
         # self.frames = gray(pims.PyAVReaderTimed(self.filename))
 
-        cap = cv2.VideoCapture(self.filename)  # Capture video
-        n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))  # Record number of frames within video
-
-        fc = 0
-        self.frames = []
-        ret = True  # Initialize "true" value for video processing loop
-        while fc < n_frames and ret:
-            ret, frame = cap.read()  # Read the video capture object
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)  # Read as gray/one layer
-            self.frames.append(gray)
-            fc += 1  # Update count after frame is processed
+        # Frames are decoded only when shown on the scale, not all at once
+        if self.frames is not None:
+            self.frames.release()
+        self.frames = videoframes.openframes(self.filename)
 
         frame_count = len(self.frames)
 
@@ -182,30 +205,10 @@ class CropLengthGUI(tk.Toplevel):
             os.mkdir(outputfolder)
             os.chdir(outputfolder)
 
-            video = cv2.VideoCapture(self.filename)
-            w = int(np.floor(video.get(3)))  # float
-            h = int(np.floor(video.get(4))) # float
-            fps = video.get(cv2.CAP_PROP_FPS)
-
-            newfilename = os.path.basename(self.filename).split(".")[0] + "_shortened-" + range_text + ".avi"
-
-            # Video writer output
-            fourcc = cv2.VideoWriter_fourcc(*"XVID")
-            out = cv2.VideoWriter(newfilename, fourcc, fps, (w, h))
-
-            # Only write frames within range
-            count = 0
-            while True:
-                ret, frame = video.read()
-                if ret == True:
-                    if (count > self.startframe.get()) and (count < self.endframe.get()):
-                        out.write(frame)
-                else:
-                    break
-                count += 1
-
-            video.release()
-            out.release()
+            newfilename = os.path.basename(self.filename).split(".")[0] + "_shortened-" + range_text
+
+            trim_video(self.filename, self.startframe.get(), self.endframe.get(), newfilename, self.videoformat.get())
+
             cv2.destroyAllWindows()
 
             complete.DoneWindow()
@@ -238,6 +241,8 @@ class CropLengthGUI(tk.Toplevel):
             img = None
             imgr_rgb = None
             imgr_tk = None
-            frames = None
+            if self.frames is not None:
+                self.frames.release()
+            self.frames = None
             video = None
             out = None
@@ -13,7 +13,7 @@ from tkinter import messagebox
 import os
 import shutil
 import cv2
-from accessoryfn import chooseinput, complete
+from accessoryfn import chooseinput, complete, videowriters
 
 class ImgtoVideo(tk.Toplevel):
 
@@ -29,6 +29,7 @@ class ImgtoVideo(tk.Toplevel):
 
         # Tkinter variables
         self.fps = tk.DoubleVar(value=10)
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
 
         # Widgets
         self.title(name + " image-to-video application")
@@ -45,18 +46,26 @@ class ImgtoVideo(tk.Toplevel):
         # Micron-to-pixel ratio entry box
         self.fps_entry = tk.Entry(self, textvariable=self.fps, width=8)
         self.fps_entry.grid(row=1, column=1, padx=5, pady=5)
+        # Video output format label
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label['font'] = smallfont
+        videoformat_label.grid(row=2, column=0, padx=5, pady=5)
+        # Video output format menu
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=2, column=1, padx=5, pady=5)
 
         # Input series of images button
         single_video_button = tk.Button(self, text="Select series of images\nto automatically convert to single video", command=self.choose_folder_images)
-        single_video_button.grid(row=2, column=0, columnspan=2, padx=5, pady=5)
+        single_video_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+        quit_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
         self.rowconfigure(2, weight=1)
         self.rowconfigure(3, weight=1)
+        self.rowconfigure(4, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -82,11 +91,10 @@ class ImgtoVideo(tk.Toplevel):
         testimg = cv2.imread(filelist[0])
         h, w, l = testimg.shape  # Dimensions of frame, use last called
 
-        name = os.path.basename(dirname) + '_fps_' + fps_str + '.avi'  # String to save new video as, .avi
+        name = os.path.basename(dirname) + '_fps_' + fps_str  # String to save new video as, extension from format
 
-        # Set up video writer object
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')  # .avi
-        out = cv2.VideoWriter(name, fourcc, self.fps.get(), (w, h))
+        # Set up video writer object, in chosen format
+        out = videowriters.open_writer(name, self.fps.get(), (w, h), self.videoformat.get())
 
         # Add frames to videowriter
         for imgname in filelist:
@@ -5,6 +5,18 @@ Last updated: 2022-10-26 for version 1.0b1
 
 Image normalization app normalizes images so that all pixel values of all color channels are scaled from [0, 255]
 
+Normalization modes, chosen by user:
+--Per channel: each color channel is stretched from its own min to max
+--Global: all channels are stretched by the same min and max, preserving color balance
+--Percentile clipped: each channel is stretched between a low and high percentile (e.g. 1 and 99),
+so a few saturated or dead pixels don't compress the range, values outside are clipped
+
+Optionally, limits can be calculated once from the whole folder so a timeseries shares one consistent scale,
+otherwise each image is normalized by its own limits
+
+Limits are found from per-channel 256-bin histograms (exact for 8-bit images, summed across the folder in one pass),
+and the stretch is applied as a per-channel lookup table, files are processed in parallel
+
 """
 
 import tkinter as tk
@@ -12,9 +24,88 @@ import tkinter.font as font
 from tkinter import messagebox
 import os
 import shutil
+import concurrent.futures
 import cv2
 import numpy as np
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, batchpool
+
+MODES = ['Per channel', 'Global', 'Percentile clipped']
+
+
+def histogram(img):
+    """256-bin histogram of each color channel, shape (channels, 256)"""
+
+    return np.stack([np.bincount(img[:, :, c].ravel(), minlength=256) for c in range(img.shape[2])])
+
+
+def limits(hist, mode='Per channel', percentile=1.):
+    """Low and high pixel value of each channel from channel histograms"""
+
+    if mode == 'Global':  # Same limits for every channel
+        hist = np.broadcast_to(hist.sum(axis=0), hist.shape)
+        low_q, high_q = 0., 1.
+    elif mode == 'Percentile clipped':
+        low_q, high_q = percentile / 100, 1 - percentile / 100
+    else:
+        low_q, high_q = 0., 1.
+
+    cdf = np.cumsum(hist, axis=1) / np.maximum(hist.sum(axis=1, keepdims=True), 1)
+    lo = np.array([np.searchsorted(c, low_q, side='right') if low_q > 0 else np.flatnonzero(c > 0)[0]
+                   for c in cdf], dtype=np.float32)
+    hi = np.array([min(np.searchsorted(c, high_q, side='left'), 255) for c in cdf], dtype=np.float32)
+
+    return lo, hi
+
+
+def stretch_lut(lo, hi):
+    """Per-channel lookup table stretching [lo, hi] to [0, 255], shape (1, 256, channels)
+
+    Calculated in float32, channels with no range are left unchanged"""
+
+    values = np.arange(256, dtype=np.float32)[:, None]
+    span = hi - lo
+    lut = np.where(span > 0, (values - lo) / np.where(span > 0, span, 1) * 255, values)
+
+    return np.clip(np.rint(lut), 0, 255).astype(np.uint8)[None, :, :]
+
+
+def normalize_file(imgname, outputfolder, mode='Per channel', percentile=1., hist=None):
+    """Normalize one image and save it to the output folder, hist is the folder histogram if shared"""
+
+    img = cv2.imread(imgname)
+
+    if hist is None:  # Image's own limits
+        hist = histogram(img)
+    lo, hi = limits(hist, mode, percentile)
+    img = cv2.LUT(img, stretch_lut(lo, hi))
+
+    name = os.path.basename(imgname).split(".")[0] + '_normalized.png'  # String to save image as
+    cv2.imwrite(os.path.join(outputfolder, name), img)
+
+
+def normalize_folder(filelist, outputfolder, mode='Per channel', percentile=1., shared=False, progress=None):
+    """Normalize every image in a folder in parallel, optionally by limits from the whole folder"""
+
+    n_total = len(filelist) * (2 if shared else 1)
+    n_done = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=batchpool.workers()) as pool:
+        hist = None
+        if shared:  # First pass, one histogram per image summed as they arrive
+            for h in pool.map(lambda imgname: histogram(cv2.imread(imgname)), filelist):
+                hist = h if hist is None else hist + h
+                n_done += 1
+                if progress is not None:
+                    progress(n_done, n_total)
+
+        futures = [pool.submit(normalize_file, imgname, outputfolder, mode, percentile, hist)
+                   for imgname in filelist]
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            n_done += 1
+            if progress is not None:
+                progress(n_done, n_total)
+
 
 class NormalizeImgs(tk.Toplevel):
 
@@ -27,25 +118,45 @@ class NormalizeImgs(tk.Toplevel):
         # Fonts
         boldfont = font.Font(weight="bold")
 
+        # Tkinter variables
+        self.mode = tk.StringVar(value=MODES[0])
+        self.percentile = tk.DoubleVar(value=1)
+        self.shared = tk.BooleanVar(value=False)
+
         # Widgets
         self.title(name + " image normalization application")
 
         # Application title
         menutitle = tk.Label(self, text="Pixel range normalization application")
         menutitle["font"] = boldfont
-        menutitle.grid(row=0, column=0, padx=10, pady=10)
-
+        menutitle.grid(row=0, column=0, columnspan=2, padx=10, pady=10)
+
+        # Normalization mode label
+        mode_label = tk.Label(self, text="Normalization mode")
+        mode_label.grid(row=1, column=0, padx=5, pady=5)
+        # Normalization mode menu
+        mode_menu = tk.OptionMenu(self, self.mode, *MODES)
+        mode_menu.grid(row=1, column=1, padx=5, pady=5)
+        # Percentile label
+        percentile_label = tk.Label(self, text="Clipping percentile (%)")
+        percentile_label.grid(row=2, column=0, padx=5, pady=5)
+        # Percentile entry box
+        percentile_entry = tk.Entry(self, width=10, textvariable=self.percentile)
+        percentile_entry.grid(row=2, column=1, padx=5, pady=5)
+        # Shared scale check box
+        shared_check = tk.Checkbutton(self, text="Use one scale for the whole folder", variable=self.shared)
+        shared_check.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
         # Input single video button
         single_video_button = tk.Button(self, text="Select folder of images\nto normalize to a [0, 255] pixel range", command=self.normalize_images)
-        single_video_button.grid(row=1, column=0, padx=5, pady=5)
+        single_video_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=2, column=0, padx=5, pady=5)
+        quit_button.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
 
-        self.rowconfigure(0, weight=1)
-        self.rowconfigure(1, weight=1)
-        self.rowconfigure(2, weight=1)
+        for row in range(6):
+            self.rowconfigure(row, weight=1)
         self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=1)
 
         # Tkinter protocol for x close
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -53,6 +164,10 @@ class NormalizeImgs(tk.Toplevel):
     # Choose single video, convert to avi
     def normalize_images(self):
 
+        if not 0 <= self.percentile.get() < 50:
+            error.ErrorWindow(message='Clipping percentile must be from 0 to 50')
+            return
+
         dirname, filelist = chooseinput.dirimgfile()
 
         # Make new directory to save video into, change directory
@@ -62,21 +177,9 @@ class NormalizeImgs(tk.Toplevel):
         os.mkdir(outputfolder)
         os.chdir(outputfolder)
 
-        for imgname in filelist:
-
-            img = cv2.imread(imgname)
-
-            h, w, l = img.shape  # Dimensions of frame
-
-            for i in range(l):  # For each layer
-                # Normalize
-                img[l] = (img[l] - np.amin(img)) / (np.amax(img) - np.amin(img)) * 255
-
-            name = os.path.basename(imgname).split(".")[0] + '_normalized.png'  # String to save image as
-
-            cv2.imwrite(name, img)
-
-        complete.DoneWindow()
+        batchpool.TaskProgress(normalize_folder,
+                               (filelist, outputfolder, self.mode.get(), self.percentile.get(), self.shared.get()),
+                               title="Normalizing images", unit='steps')
 
     # Closing command, clear variables
     def on_closing(self):
@@ -25,7 +25,43 @@ import os
 import shutil
 import cv2
 import numpy as np
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, batchpool, videowriters
+
+def resize_file(file, resizefactor, rf_str, outputfolder, videoformat=videowriters.DEFAULT):
+    """Resize a single image or video file into the output folder, run by a batch worker"""
+
+    filename = os.path.basename(file).split(".")[0]
+    newfilename = os.path.join(outputfolder,
+                               filename + "_resized-" + rf_str + "." + os.path.basename(file).split(".")[1])
+
+    if os.path.basename(file).split(".")[1] == "avi":  # If video
+        cap = cv2.VideoCapture(file)
+        wn = int(np.floor(cap.get(3) * resizefactor))  # float
+        hn = int(np.floor(cap.get(4) * resizefactor))  # float
+        fps = cap.get(cv2.CAP_PROP_FPS)
+
+        # Video writer output, in chosen format
+        out = videowriters.open_writer(os.path.join(outputfolder, filename + "_resized-" + rf_str), fps, (wn, hn),
+                                       videoformat)
+
+        while True:
+            ret, frame = cap.read()
+            if ret == True:
+                b = cv2.resize(frame, (wn, hn), fx=0, fy=0, interpolation=cv2.INTER_CUBIC)
+                out.write(b)
+            else:
+                break
+
+        cap.release()
+        out.release()
+    elif os.path.basename(file).split(".")[1] in ["png", "jpg", "tif"]:
+        read = cv2.imread(file)
+        size = read.shape
+        wn = int(size[1] * resizefactor)
+        hn = int(size[0] * resizefactor)
+        resizedimg = cv2.resize(read, (wn, hn), interpolation=cv2.INTER_AREA)
+        cv2.imwrite(newfilename, resizedimg)
+
 
 class ResizeGUI(tk.Toplevel):
 
@@ -40,6 +76,7 @@ class ResizeGUI(tk.Toplevel):
 
         # Tkinter variables
         self.resizefactor = tk.DoubleVar(value=1)
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
         self.filelist = None
 
         # Widgets
@@ -65,12 +102,18 @@ class ResizeGUI(tk.Toplevel):
         # Resize factor entry box
         resizefactor_entry = tk.Entry(self, width=10, textvariable=self.resizefactor)
         resizefactor_entry.grid(row=4, column=1, padx=5, pady=5)
+        # Video output format label
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label.grid(row=5, column=0, padx=5, pady=5)
+        # Video output format menu
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=5, column=1, padx=5, pady=5)
         # Resize files button
         dir_button = tk.Button(self, text="Submit for resizing", command=self.resize)
-        dir_button.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
+        dir_button.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
+        quit_button.grid(row=7, column=0, columnspan=2, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -79,6 +122,7 @@ class ResizeGUI(tk.Toplevel):
         self.rowconfigure(4, weight=1)
         self.rowconfigure(5, weight=1)
         self.rowconfigure(6, weight=1)
+        self.rowconfigure(7, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -108,40 +152,11 @@ class ResizeGUI(tk.Toplevel):
                 shutil.rmtree(outputfolder)
             os.mkdir(outputfolder)
             os.chdir(outputfolder)
-            # Resize each image
-            for file in self.filelist:
-                filename = os.path.basename(file).split(".")[0]
-                newfilename = filename + "_resized-" + rf_str + "." + os.path.basename(file).split(".")[1]
-
-                if os.path.basename(file).split(".")[1] == "avi":  # If video
-                    cap = cv2.VideoCapture(file)
-                    wn = int(np.floor(cap.get(3) * self.resizefactor.get()))  # float
-                    hn = int(np.floor(cap.get(4) * self.resizefactor.get()))  # float
-                    fps = cap.get(cv2.CAP_PROP_FPS)
-
-                    # Video writer output
-                    fourcc = cv2.VideoWriter_fourcc(*"XVID")
-                    out = cv2.VideoWriter(newfilename, fourcc, fps, (wn, hn))
-
-                    while True:
-                        ret, frame = cap.read()
-                        if ret == True:
-                            b = cv2.resize(frame, (wn, hn), fx=0, fy=0, interpolation=cv2.INTER_CUBIC)
-                            out.write(b)
-                        else:
-                            break
-
-                    cap.release()
-                    out.release()
-                    cv2.destroyAllWindows()
-                elif os.path.basename(file).split(".")[1] in ["png", "jpg", "tif"]:
-                    read = cv2.imread(file)
-                    size = read.shape
-                    wn = int(size[1] * self.resizefactor.get())
-                    hn = int(size[0] * self.resizefactor.get())
-                    resizedimg = cv2.resize(read, (wn, hn), interpolation=cv2.INTER_AREA)
-                    cv2.imwrite(newfilename, resizedimg)
-            complete.DoneWindow()
+            # Resize each file in a worker pool, progress shown as files finish
+            resizefactor = self.resizefactor.get()
+            videoformat = self.videoformat.get()
+            jobs = [(resize_file, (file, resizefactor, rf_str, outputfolder, videoformat)) for file in self.filelist]
+            batchpool.BatchProgress(jobs, labels=self.filelist, title="Resizing files")
 
         else:
             error.ErrorWindow(message='Please select file(s) to resize')
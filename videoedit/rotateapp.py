@@ -15,7 +15,42 @@ import shutil
 import cv2
 import numpy as np
 from PIL import Image, ImageTk
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, batchpool, videowriters
+from videoedit.transformchain import rotate
+
+def rotate_file(file, angle, angle_str, outputfolder, videoformat=videowriters.DEFAULT):
+    """Rotate a single image or video file into the output folder, run by a batch worker"""
+
+    filename = os.path.basename(file).split(".")[0]
+    newfilename = os.path.join(outputfolder,
+                               filename + "_rotated-" + angle_str + "." + os.path.basename(file).split(".")[1])
+
+    if os.path.basename(file).split(".")[1] == "avi":  # If video
+        video = cv2.VideoCapture(file)
+        w = int(np.floor(video.get(3)))  # float
+        h = int(np.floor(video.get(4))) # float
+        fps = video.get(cv2.CAP_PROP_FPS)
+
+        # Video writer output, in chosen format
+        out = videowriters.open_writer(os.path.join(outputfolder, filename + "_rotated-" + angle_str), fps, (w, h),
+                                       videoformat)
+
+        while True:
+            ret, frame = video.read()
+            if ret == True:
+                b = rotate(frame, angle)
+                out.write(b)
+            else:
+                break
+
+        video.release()
+        out.release()
+
+    elif os.path.basename(file).split(".")[1] in ["png", "jpg", "tif"]:
+        read = cv2.imread(file)
+        resizedimg = rotate(read, angle)
+        cv2.imwrite(newfilename, resizedimg)
+
 
 class RotateGUI(tk.Toplevel):
 
@@ -30,6 +65,7 @@ class RotateGUI(tk.Toplevel):
 
         # Tkinter variables
         self.angle = tk.DoubleVar(value=0)
+        self.videoformat = tk.StringVar(value=videowriters.DEFAULT)
         self.filelist = None
 
         # Widgets
@@ -74,12 +110,18 @@ class RotateGUI(tk.Toplevel):
             command=self.changespinbox
         )
         angle_spin.grid(row=7, column=1, padx=5, pady=5)
+        # Video output format label
+        videoformat_label = tk.Label(self, text="Video output format")
+        videoformat_label.grid(row=8, column=0, padx=5, pady=5)
+        # Video output format menu
+        videoformat_menu = tk.OptionMenu(self, self.videoformat, *videowriters.FORMATS)
+        videoformat_menu.grid(row=8, column=1, padx=5, pady=5)
         # Submit button
         submit_button = tk.Button(self, text="Submit for rotation", command=self.save_rotated_files)
-        submit_button.grid(row=8, column=0, columnspan=2, padx=5, pady=5)
+        submit_button.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=9, column=0, columnspan=2, padx=5, pady=5)
+        quit_button.grid(row=10, column=0, columnspan=2, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
@@ -91,6 +133,7 @@ class RotateGUI(tk.Toplevel):
         self.rowconfigure(7, weight=1)
         self.rowconfigure(8, weight=1)
         self.rowconfigure(9, weight=1)
+        self.rowconfigure(10, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
@@ -137,34 +180,10 @@ class RotateGUI(tk.Toplevel):
         status, self.img = video.read()
         self.displayimg(self.img)
 
-    # Resize each file
+    # Rotate a frame by the current angle
     def rotate(self, mat):
 
-        height, width = mat.shape[:2]  # image shape has 3 dimensions
-        image_center = (width / 2,
-                        height / 2)  # getRotationMatrix2D needs coordinates in reverse order (width, height) compared to shape
-
-        rotation_mat = cv2.getRotationMatrix2D(image_center, self.angle.get(), 1.)
-
-        # rotation calculates the cos and sin, taking absolutes of those.
-        abs_cos = abs(rotation_mat[0, 0])
-        abs_sin = abs(rotation_mat[0, 1])
-
-        # find the new width and height bounds
-        bound_w = int(height * abs_sin + width * abs_cos)
-        bound_h = int(height * abs_cos + width * abs_sin)
-
-        # subtract old image center (bringing image back to origo) and adding the new image center coordinates
-        rotation_mat[0, 2] += bound_w / 2 - image_center[0]
-        rotation_mat[1, 2] += bound_h / 2 - image_center[1]
-
-        # rotate image with the new bounds and translated rotation matrix
-        rmat = cv2.warpAffine(mat, rotation_mat, (bound_w, bound_h))
-
-        # Ensure dimensions are correct, important for videos
-        out = cv2.resize(rmat, (width, height), fx=0, fy=0, interpolation=cv2.INTER_CUBIC)
-
-        return out
+        return rotate(mat, self.angle.get())
 
     # Save files with angle
     def save_rotated_files(self):
@@ -177,39 +196,11 @@ class RotateGUI(tk.Toplevel):
                 shutil.rmtree(outputfolder)
             os.mkdir(outputfolder)
             os.chdir(outputfolder)
-            # Resize each image
-            for file in self.filelist:
-                filename = os.path.basename(file).split(".")[0]
-                newfilename = filename + "_rotated-" + angle_str + "." + os.path.basename(file).split(".")[1]
-
-                if os.path.basename(file).split(".")[1] == "avi":  # If video
-                    video = cv2.VideoCapture(file)
-                    w = int(np.floor(video.get(3)))  # float
-                    h = int(np.floor(video.get(4))) # float
-                    fps = video.get(cv2.CAP_PROP_FPS)
-
-                    # Video writer output
-                    fourcc = cv2.VideoWriter_fourcc(*"XVID")
-                    out = cv2.VideoWriter(newfilename, fourcc, fps, (w, h))
-
-                    while True:
-                        ret, frame = video.read()
-                        if ret == True:
-                            b = self.rotate(frame)
-                            out.write(b)
-                        else:
-                            break
-
-                    video.release()
-                    out.release()
-                    cv2.destroyAllWindows()
-
-                elif os.path.basename(file).split(".")[1] in ["png", "jpg", "tif"]:
-                    read = cv2.imread(file)
-                    resizedimg = self.rotate(read)
-                    cv2.imwrite(newfilename, resizedimg)
-
-            complete.DoneWindow()
+            # Rotate each file in a worker pool, progress shown as files finish
+            angle = self.angle.get()
+            videoformat = self.videoformat.get()
+            jobs = [(rotate_file, (file, angle, angle_str, outputfolder, videoformat)) for file in self.filelist]
+            batchpool.BatchProgress(jobs, labels=self.filelist, title="Rotating files")
 
         else:
             error.ErrorWindow(message='Please select file(s) to rotate')
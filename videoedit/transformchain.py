@@ -0,0 +1,252 @@
+"""iCLOTS is a free software created for the analysis of common hematology and/or microfluidic workflow image data
+
+Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
+Last updated: 2026-10-19 for version 1.0b1
+
+Transform chain applies an ordered set of video editing operations to files in one read/write pass:
+
+Operations (same behavior as the individual video editing applications):
+--crop: crop to a region of interest, x, y, w, h (pixels)
+--trim: keep frames between a start and end frame (videos only), of the frames kept by any earlier trim
+--rotate: rotate by an angle (degrees), output keeps the input dimensions
+--resize: scale dimensions by a resize factor
+--contrast: apply alpha (gain) and beta (bias), clipped to 0-255, and optionally gamma
+
+Each video is decoded and encoded once regardless of the number of operations,
+avoiding the time and generation loss of saving an intermediate file per operation
+Videos (.avi), raw stacks (.npy) and multipage TIFFs are edited frame by frame, other files as single images
+
+Command line use, operations are applied in the order given:
+python -m videoedit.transformchain video.avi --crop 10,20,300,100 --trim 5,500 --rotate 90 --resize 0.5
+
+"""
+
+import os
+import argparse
+import cv2
+import numpy as np
+from PIL import Image
+from accessoryfn import videoframes, videowriters
+
+OPERATIONS = ['crop', 'trim', 'rotate', 'resize', 'contrast']  # Typical preparation order
+
+
+def isvideo(file):
+    """True for files with several frames: videos (.avi), raw stacks (.npy) and multipage TIFFs"""
+
+    ext = os.path.splitext(file)[1].lower()
+    if ext in ('.avi', '.npy'):
+        return True
+    elif ext in ('.tif', '.tiff'):
+        with Image.open(file) as image:
+            return getattr(image, 'n_frames', 1) > 1
+
+    return False
+
+
+def crop(frame, x, y, w, h):
+    """Crop a frame to a region of interest"""
+
+    return frame[y:(y + h), x:(x + w)]
+
+
+def rotate(frame, angle):
+    """Rotate a frame by an angle without clipping corners, then fit back to the original dimensions"""
+
+    height, width = frame.shape[:2]
+    image_center = (width / 2, height / 2)  # getRotationMatrix2D needs coordinates as (width, height)
+
+    rotation_mat = cv2.getRotationMatrix2D(image_center, angle, 1.)
+
+    # New width and height bounds
+    abs_cos = abs(rotation_mat[0, 0])
+    abs_sin = abs(rotation_mat[0, 1])
+    bound_w = int(height * abs_sin + width * abs_cos)
+    bound_h = int(height * abs_cos + width * abs_sin)
+
+    # Move image center to the center of the new bounds
+    rotation_mat[0, 2] += bound_w / 2 - image_center[0]
+    rotation_mat[1, 2] += bound_h / 2 - image_center[1]
+
+    rmat = cv2.warpAffine(frame, rotation_mat, (bound_w, bound_h))
+
+    return cv2.resize(rmat, (width, height), fx=0, fy=0, interpolation=cv2.INTER_CUBIC)
+
+
+def resize(frame, factor):
+    """Scale frame dimensions by a resize factor"""
+
+    wn = int(np.floor(frame.shape[1] * factor))
+    hn = int(np.floor(frame.shape[0] * factor))
+    interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_CUBIC
+
+    return cv2.resize(frame, (wn, hn), interpolation=interpolation)
+
+
+def contrast_lut(alpha, beta, gamma=1.):
+    """256-entry lookup table for frame * alpha + beta, clipped so high values don't loop to 0 as uint8
+
+    Gamma is applied after contrast and brightness, values above 1 brighten midtones, 1 leaves them unchanged
+    Calculated once per setting, then applied to every frame with cv2.LUT"""
+
+    values = np.clip(np.arange(256) * alpha + beta, 0, 255)
+    if gamma != 1:
+        values = 255 * (values / 255) ** (1 / gamma)
+
+    return values.astype(np.uint8)
+
+
+def parse_step(name, text):
+    """Convert a comma-separated parameter string into a (name, parameters) step"""
+
+    values = [v.strip() for v in str(text).split(',') if v.strip() != '']
+
+    if name == 'crop':
+        params = tuple(int(float(v)) for v in values)
+        if len(params) != 4:
+            raise ValueError('crop needs x,y,w,h')
+    elif name == 'trim':
+        params = tuple(int(float(v)) for v in values)
+        if len(params) != 2:
+            raise ValueError('trim needs start,end')
+    elif name in ('rotate', 'resize'):
+        params = (float(values[0]),)
+    elif name == 'contrast':
+        params = tuple(float(v) for v in values)
+        if len(params) not in (2, 3):
+            raise ValueError('contrast needs alpha,beta or alpha,beta,gamma')
+    else:
+        raise ValueError('Unknown operation: ' + str(name))
+
+    return (name, params)
+
+
+class TransformChain():
+    """Ordered set of operations, applied to each frame of a file in a single pass"""
+
+    def __init__(self, steps, videoformat=videowriters.DEFAULT):
+        self.steps = list(steps)  # List of (name, parameters)
+        self.videoformat = videoformat  # Output format for videos, see accessoryfn/videowriters.py
+
+        # Trim applies to frame numbers, not pixels, so combine all trims into one range of source frames
+        # As in the crop video length application, frames strictly between start and end are kept when trimming
+        # Each trim counts frames from the first frame kept by the trims before it
+        self.first = 0  # First source frame kept
+        self.stop = None  # Source frame after the last kept, None for the end of the video
+        for name, params in self.steps:
+            if name == 'trim':
+                stop = self.first + params[1]
+                self.stop = stop if self.stop is None else min(self.stop, stop)
+                self.first = min(self.first + params[0] + 1, self.stop)
+
+        # Pixel operations, with contrast turned into a lookup table once
+        self.frame_steps = []
+        for name, params in self.steps:
+            if name == 'crop':
+                self.frame_steps.append((crop, params))
+            elif name == 'rotate':
+                self.frame_steps.append((rotate, params))
+            elif name == 'resize':
+                self.frame_steps.append((resize, params))
+            elif name == 'contrast':
+                self.frame_steps.append((cv2.LUT, (contrast_lut(*params),)))
+
+    def suffix(self):
+        """Short description of operations for output file names"""
+
+        parts = []
+        for name, params in self.steps:
+            parts.append(name + '-' + '-'.join(str(p).replace('.', 'p').replace('-', 'n') for p in params))
+
+        return '_'.join(parts)
+
+    def apply(self, frame):
+        """Apply every pixel operation to one frame, in order"""
+
+        for function, params in self.frame_steps:
+            frame = function(frame, *params)
+
+        return frame
+
+    def process_video(self, file, outputname):
+        """Read a video once, write frames within the trim range with all operations applied
+
+        outputname is given without extension, returns the file name written"""
+
+        video = videoframes.openframes(file)
+        end = len(video) if self.stop is None else min(self.stop, len(video))
+        fps = video.fps if video.fps > 0 else videoframes.STACK_FPS
+
+        out = None
+        for frame in video.iter_range(self.first, end):  # Seeks to start rather than decoding leading frames
+            out_frame = self.apply(frame)
+            if out is None:  # Output dimensions known after first frame is transformed
+                out = videowriters.open_writer(outputname, fps, (out_frame.shape[1], out_frame.shape[0]),
+                                               self.videoformat)
+            out.write(out_frame)
+
+        video.release()
+        if out is not None:
+            out.release()
+            return out.filename
+
+    def process_image(self, file, outputname):
+        """Apply all operations to an image file, trim is ignored"""
+
+        frame = cv2.imread(file)
+        cv2.imwrite(outputname, self.apply(frame))
+
+    def process(self, file, outputfolder):
+        """Process one file into an output folder, returns the new file name"""
+
+        basename = os.path.splitext(os.path.basename(file))[0]
+        if isvideo(file):
+            outputname = self.process_video(file, os.path.join(outputfolder, basename + '_' + self.suffix()))
+        else:
+            outputname = os.path.join(outputfolder, basename + '_' + self.suffix() + '.png')
+            self.process_image(file, outputname)
+
+        return outputname
+
+
+class _StepAction(argparse.Action):
+    """Record operations in the order they appear on the command line"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        steps = getattr(namespace, 'steps', None) or []
+        try:
+            steps.append(parse_step(self.dest, values))
+        except (ValueError, IndexError) as e:
+            parser.error(str(e))
+        namespace.steps = steps
+
+
+def main(argv=None):
+    """Command line entry point"""
+
+    parser = argparse.ArgumentParser(description='Apply ordered video editing operations in a single pass')
+    parser.add_argument('files', nargs='+', help='video (.avi), stack (.npy, multipage .tif) or image files')
+    parser.add_argument('--crop', action=_StepAction, metavar='X,Y,W,H')
+    parser.add_argument('--trim', action=_StepAction, metavar='START,END')
+    parser.add_argument('--rotate', action=_StepAction, metavar='ANGLE')
+    parser.add_argument('--resize', action=_StepAction, metavar='FACTOR')
+    parser.add_argument('--contrast', action=_StepAction, metavar='ALPHA,BETA[,GAMMA]')
+    parser.add_argument('--format', default=videowriters.DEFAULT, choices=videowriters.FORMATS,
+                        help='video output format, default ' + videowriters.DEFAULT)
+    parser.add_argument('--output', default=None, help="output folder, default 'Edited files' beside the input")
+    args = parser.parse_args(argv)
+
+    steps = getattr(args, 'steps', None) or []
+    if len(steps) == 0:
+        parser.error('choose at least one operation')
+
+    chain = TransformChain(steps, args.format)
+    outputfolder = args.output or os.path.join(os.path.dirname(os.path.abspath(args.files[0])), 'Edited files')
+    os.makedirs(outputfolder, exist_ok=True)
+
+    for file in args.files:
+        print(chain.process(file, outputfolder))
+
+
+if __name__ == '__main__':
+    main()
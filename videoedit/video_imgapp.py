@@ -3,7 +3,17 @@
 Author: Meredith Fay, Lam Lab, Georgia Institute of Technology and Emory University
 Last updated: 2022-10-13 for version 1.0b1
 
-Video-to-image app converts frames of an .avi video to a series of .png images
+Video-to-image app converts frames of an .avi video to a series of images or a single image stack
+
+Output formats, chosen by user:
+--PNG: one .png image per frame, compression level 0 (fastest, largest) to 9 (slowest, smallest)
+--TIFF (uncompressed): one .tif image per frame
+--Multipage TIFF: all frames in a single .tif file
+--NumPy stack: all frames in a single .npy array (frame, height, width, color), can be opened with numpy.load
+Both stack formats can be opened directly by the analysis applications
+
+The video is decoded in a background thread that hands frames to a pool of image writers,
+so image compression is spread across cores rather than limited by one
 
 """
 
@@ -12,8 +22,92 @@ import tkinter.font as font
 from tkinter import messagebox
 import os
 import shutil
+import threading
+import concurrent.futures
 import cv2
-from accessoryfn import chooseinput, error, complete
+from accessoryfn import chooseinput, error, batchpool, videowriters
+
+FORMATS = ['PNG', 'TIFF (uncompressed)', 'Multipage TIFF', 'NumPy stack']
+
+
+def write_image(image_name, image, params):
+    """Save one frame, run by a writer thread"""
+
+    if not cv2.imwrite(image_name, image, params):
+        raise IOError('Could not save ' + image_name)
+
+
+def write_stack(capture, length, stackname, fmt, progress=None):
+    """Save all frames to a single multipage TIFF or NumPy stack, one frame in memory at a time"""
+
+    w = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    out = videowriters.open_writer(stackname, capture.get(cv2.CAP_PROP_FPS), (w, h),
+                                   'Multipage TIFF' if fmt == 'Multipage TIFF' else 'Raw stack (.npy)')
+
+    count = 0
+    while count < length:
+        success, image = capture.read()
+        if not success:
+            break
+        out.write(image)
+        count += 1
+        if progress is not None:
+            progress(count, length)
+
+    out.release()
+
+
+def extract_frames(filename, outputfolder, fmt='PNG', png_level=3, progress=None):
+    """Save every frame of a video into the output folder in the chosen format
+
+    Frames are decoded here and passed to a pool of writer threads, bounded so decoding can't run far ahead"""
+
+    basename = os.path.basename(filename).split('.')[0]
+    capture = cv2.VideoCapture(filename)
+    length = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    if fmt in ('Multipage TIFF', 'NumPy stack'):
+        write_stack(capture, length, os.path.join(outputfolder, basename + '_frames'), fmt, progress)
+        capture.release()
+        return
+
+    if fmt == 'PNG':
+        ext, params = '.png', [cv2.IMWRITE_PNG_COMPRESSION, int(png_level)]
+    else:
+        ext, params = '.tif', [cv2.IMWRITE_TIFF_COMPRESSION, 1]  # 1: no compression
+
+    n_workers = batchpool.workers()
+    slots = threading.BoundedSemaphore(2 * n_workers)  # Frames decoded but not yet written
+    lock = threading.Lock()
+    written = [0]
+    futures = []
+
+    def finished(future):
+        slots.release()
+        with lock:
+            written[0] += 1
+            if progress is not None:
+                progress(written[0], length)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as pool:
+        count = 0
+        while count < length:
+            success, image = capture.read()
+            if not success:
+                break
+            image_name = os.path.join(outputfolder, basename + '_frame_' + str(count).zfill(5) + ext)
+            slots.acquire()
+            future = pool.submit(write_image, image_name, image, params)
+            future.add_done_callback(finished)
+            futures.append(future)
+            count += 1
+
+    capture.release()
+
+    for future in futures:  # Raise the first failed write, if any
+        future.result()
+
 
 class VideoToImg(tk.Toplevel):
 
@@ -26,31 +120,60 @@ class VideoToImg(tk.Toplevel):
         # Fonts
         boldfont = font.Font(weight="bold")
 
+        # Tkinter variables
+        self.format = tk.StringVar(value=FORMATS[0])
+        self.png_level = tk.IntVar(value=3)
+
         # Widgets
         self.title(name + " video-to-image application")
 
         # Application title
         menutitle = tk.Label(self, text="Video-to-image application")
         menutitle["font"] = boldfont
-        menutitle.grid(row=0, column=0, padx=10, pady=10)
+        menutitle.grid(row=0, column=0, columnspan=2, padx=10, pady=10)
 
         # Input single video button
         single_video_button = tk.Button(self, text="Select single video\nto automatically convert to images", command=self.singlevideofile)
-        single_video_button.grid(row=1, column=0, padx=5, pady=5)
+        single_video_button.grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+        # Output format label
+        format_label = tk.Label(self, text="Output format")
+        format_label.grid(row=2, column=0, padx=5, pady=5)
+        # Output format menu
+        format_menu = tk.OptionMenu(self, self.format, *FORMATS)
+        format_menu.grid(row=2, column=1, padx=5, pady=5)
+        # PNG compression label
+        level_label = tk.Label(self, text="PNG compression (0-9)")
+        level_label.grid(row=3, column=0, padx=5, pady=5)
+        # PNG compression entry box
+        level_entry = tk.Entry(self, width=10, textvariable=self.png_level)
+        level_entry.grid(row=3, column=1, padx=5, pady=5)
         # Quit button
         quit_button = tk.Button(self, text="Quit", command=self.on_closing)
-        quit_button.grid(row=2, column=0, padx=5, pady=5)
+        quit_button.grid(row=4, column=0, columnspan=2, padx=5, pady=5)
 
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
         self.rowconfigure(2, weight=1)
+        self.rowconfigure(3, weight=1)
+        self.rowconfigure(4, weight=1)
         self.columnconfigure(0, weight=1)
+        self.columnconfigure(1, weight=1)
 
         # Tkinter protocol for x close
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
     # Choose single video, convert to avi
     def singlevideofile(self):
+        png_level = 3  # Only used for PNG output
+        if self.format.get() == 'PNG':
+            try:
+                png_level = self.png_level.get()
+            except tk.TclError:  # Not a whole number
+                png_level = None
+            if png_level is None or not 0 <= png_level <= 9:
+                error.ErrorWindow(message='PNG compression must be a whole number from 0 to 9')
+                return
+
         filename = chooseinput.videofile()
 
         # Make new directory to save images into, change directory
@@ -60,22 +183,9 @@ class VideoToImg(tk.Toplevel):
         os.mkdir(outputfolder)
         os.chdir(outputfolder)
 
-        capture = cv2.VideoCapture(filename)
-        length = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
-
-        # Save frames
-        success, frame = capture.read()
-        count = 0
-        while success and count < length - 1:  # Length - 1 prevents "empty frame" error at end of video
-            image_name = os.path.basename(filename).split('.')[0] + '_frame_' + str(count).zfill(5) + '.png'
-            success, image = capture.read()
-            cv2.imwrite(image_name, image)  # save frame as .png file
-            count += 1
-
-        capture.release()
-        cv2.destroyAllWindows()
-
-        complete.DoneWindow()
+        # Save frames, progress shown while decoding and writing run in the background
+        batchpool.TaskProgress(extract_frames, (filename, outputfolder, self.format.get(), png_level),
+                               title="Extracting frames")
 
     # Closing command, clear variables
     def on_closing(self):